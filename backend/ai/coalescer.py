@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """An upstream call shared by every request with the same key."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer: concurrent calls with the same key share one
+    in-flight upstream call instead of each making their own.
+
+    Each waiter awaits the shared task through `asyncio.shield`, so a
+    cancelled waiter leaves the call running for the others; the shared call
+    itself is cancelled only once every waiter is gone.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """Initializes the coalescer.
+
+        Args:
+            enabled: Whether identical concurrent calls are merged at all.
+        """
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Returns the result of `call()`, sharing it with concurrent callers.
+
+        Args:
+            key: Identifies the full effective request; calls with equal keys
+                must be interchangeable.
+            call: Coroutine function that performs the upstream call.
+        """
+        if not self.enabled:
+            self.upstream_calls += 1
+            return await call()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Detach first so that a new caller starts a fresh call rather
+                # than joining one that is being cancelled.
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.cancelled += 1
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns upstream call counts and how many calls were saved."""
+        requests = self.upstream_calls + self.coalesced
+        return {
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.coalesced,
+            "cancelled_calls": self.cancelled,
+            "in_flight": len(self._flights),
+            "saved_ratio": self.coalesced / requests if requests else 0.0,
+        }
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalizes text so trivially different inputs share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_key(provider: str, model: str, text: str) -> str:
+    """Builds the content-addressed key for an embedding."""
+    digest = hashlib.sha256()
+    for part in (provider, model, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    """Packs a vector as a float32 blob."""
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    """Unpacks a float32 blob into a list of floats."""
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def _chunks(keys: List[str], size: int = 500) -> Iterable[List[str]]:
+    # Stay well under SQLite's bound-parameter limit.
+    for start in range(0, len(keys), size):
+        yield keys[start : start + size]
+
+
+class _DiskTier:
+    """
+    SQLite-backed store of packed vectors, bounded by total blob size.
+
+    The file may be shared by several processes, so the total size is kept
+    in the database by triggers and read inside each write transaction
+    rather than tracked per process.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # One transaction, so that a file written before the size row existed
+        # is counted exactly once even when several processes open it.
+        self._conn.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_embeddings_last_access
+                ON embeddings (last_access);
+            CREATE TABLE IF NOT EXISTS embeddings_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO embeddings_size (id, bytes)
+                SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_insert
+                AFTER INSERT ON embeddings BEGIN
+                    UPDATE embeddings_size SET bytes = bytes + LENGTH(NEW.vector);
+                END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_update
+                AFTER UPDATE OF vector ON embeddings BEGIN
+                    UPDATE embeddings_size
+                    SET bytes = bytes + LENGTH(NEW.vector) - LENGTH(OLD.vector);
+                END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_delete
+                AFTER DELETE ON embeddings BEGIN
+                    UPDATE embeddings_size SET bytes = bytes - LENGTH(OLD.vector);
+                END;
+            COMMIT;
+            """)
+        self._size = self._read_size()
+
+    def _read_size(self) -> int:
+        return int(
+            self._conn.execute("SELECT bytes FROM embeddings_size").fetchone()[0]
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size as of this process's last write."""
+        return self._size
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock:
+            for chunk in _chunks(keys):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: List[Tuple[str, bytes]]):
+        now = time.time()
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete
+            # would not fire the size trigger.
+            self._conn.executemany(
+                "INSERT INTO embeddings (key, vector, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "vector = excluded.vector, last_access = excluded.last_access",
+                [(key, blob, now) for key, blob in items],
+            )
+            # The write holds the database lock, so the size read here
+            # includes every other process's committed writes.
+            self._size = self._evict(self._read_size())
+            self._conn.commit()
+
+    def _evict(self, size: int) -> int:
+        while size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings "
+                "ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for key, length in rows:
+                if size <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                size -= length
+        return size
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed cache for embedding vectors.
+
+    Vectors are stored as packed float32 blobs in a bounded in-memory LRU and,
+    optionally, in a SQLite file so they survive process restarts. Both tiers
+    evict by total size in bytes.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_path: str | None = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        """Initializes the cache.
+
+        Args:
+            memory_max_bytes: Size bound of the in-memory LRU tier.
+            disk_path: SQLite file for the persistent tier, or None to disable it.
+            disk_max_bytes: Size bound of the persistent tier.
+        """
+        self.memory_max_bytes = memory_max_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._disk: _DiskTier | None = None
+        if disk_path:
+            try:
+                self._disk = _DiskTier(disk_path, disk_max_bytes)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache disabled ({disk_path}): {e}")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Looks up keys in memory, then on disk. Missing keys are omitted."""
+        found: Dict[str, bytes] = {}
+        remaining: List[str] = []
+        for key in keys:
+            blob = self._memory.get(key)
+            if blob is None:
+                remaining.append(key)
+            else:
+                self._memory.move_to_end(key)
+                found[key] = blob
+                self.memory_hits += 1
+
+        if remaining and self._disk is not None:
+            try:
+                from_disk = await asyncio.to_thread(self._disk.get_many, remaining)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+                from_disk = {}
+            for key, blob in from_disk.items():
+                self._remember(key, blob)
+                found[key] = blob
+            self.disk_hits += len(from_disk)
+            self.misses += len(remaining) - len(from_disk)
+        else:
+            self.misses += len(remaining)
+
+        return {key: unpack_vector(blob) for key, blob in found.items()}
+
+    async def put_many(self, items: Dict[str, List[float]]):
+        """Stores vectors in both tiers."""
+        if not items:
+            return
+        packed = [(key, pack_vector(vector)) for key, vector in items.items()]
+        for key, blob in packed:
+            self._remember(key, blob)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.put_many, packed)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit counters, hit rate and tier sizes."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            ),
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk.size_bytes if self._disk else 0,
+        }
+
+    def close(self):
+        """Closes the persistent tier."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def _remember(self, key: str, blob: bytes):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = blob
+        self._memory_size += len(blob)
+        while self._memory_size > self.memory_max_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
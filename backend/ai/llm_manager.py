@@ -1,14 +1,50 @@
+import asyncio
+import importlib
 import os
 import logging
-from typing import Dict, Type
+import tempfile
+import time
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Type
 
-from .providers.base import LLMProvider
-from .providers.openai_provider import OpenAIProvider
-from .providers.anthropic_provider import AnthropicProvider
-from ai.providers.gemini_provider import GeminiProvider
+import numpy as np
+
+from .providers.base import (
+    GenerationConfig,
+    LLMProvider,
+    PromptPrefix,
+    TextChunk,
+    TextGeneration,
+)
+from .providers.cassette import (
+    RecordingProvider,
+    load_replay_providers,
+)
+from .coalescer import RequestCoalescer
+from .metrics import LLM_ERRORS, LLM_TIME_TO_FIRST_TOKEN, LLM_UPSTREAM_LATENCY
+from .model_catalog import ModelCatalogCache
+from .embedding_cache import EmbeddingCache, make_key as make_embedding_key
+from .resilience import ResilientRouter, parse_fallbacks
+from .response_cache import ResponseCache, make_key as make_response_key
+from .semantic_cache import SemanticCache, normalize
 
 logger = logging.getLogger(__name__)
 
+# Provider classes by import path, so that a provider's SDKs are only imported
+# when its API key is set.
+PROVIDER_REGISTRY: Dict[str, str] = {
+    "openai": "ai.providers.openai_provider:OpenAIProvider",
+    "anthropic": "ai.providers.anthropic_provider:AnthropicProvider",
+    "gemini": "ai.providers.gemini_provider:GeminiProvider",
+    # Synthetic provider for load tests; enabled by setting FAKE_API_KEY.
+    "fake": "ai.providers.fake_provider:FakeProvider",
+}
+
+
+def load_provider_class(name: str) -> Type[LLMProvider]:
+    """Imports and returns the provider class registered under `name`."""
+    module_path, _, class_name = PROVIDER_REGISTRY[name].partition(":")
+    return getattr(importlib.import_module(module_path), class_name)
+
 
 class LLMManager:
     """
@@ -26,21 +62,34 @@ class LLMManager:
 
     def _initialize(self):
         self.providers: Dict[str, LLMProvider] = {}
+        self._validations: Dict[str, asyncio.Task] = {}
 
-        provider_registry: Dict[str, Type[LLMProvider]] = {
-            "openai": OpenAIProvider,
-            "anthropic": AnthropicProvider,
-            "gemini": GeminiProvider,
-        }
-
-        for name, provider_class in provider_registry.items():
-            api_key = os.getenv(f"{name.upper()}_API_KEY")
-            if api_key:
-                self.providers[name] = provider_class(api_key=api_key)
+        # "record" appends every provider's traffic to a cassette per provider
+        # in LLM_CASSETTE_DIR; "replay" serves those cassettes instead of the
+        # real providers, so the app runs offline.
+        cassette_mode = os.getenv("LLM_CASSETTE_MODE", "").lower()
+        cassette_dir = os.getenv("LLM_CASSETTE_DIR", "./cassettes")
+        if cassette_mode == "replay":
+            self.providers.update(
+                load_replay_providers(
+                    cassette_dir,
+                    latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1")),
+                    strict=os.getenv("LLM_CASSETTE_STRICT", "true").lower() == "true",
+                )
+            )
+        else:
+            for name in PROVIDER_REGISTRY:
+                api_key = os.getenv(f"{name.upper()}_API_KEY")
+                if api_key:
+                    provider = load_provider_class(name)(api_key=api_key)
+                    if cassette_mode == "record":
+                        provider = RecordingProvider(provider, cassette_dir)
+                    self.providers[name] = provider
 
         if not self.providers:
             raise ValueError(
-                "No LLM providers were initialized. Please set API keys in .env."
+                "No LLM providers were initialized. Please set API keys in .env"
+                " or point LLM_CASSETTE_DIR at recorded cassettes."
             )
 
         default_provider = os.getenv("DEFAULT_PROVIDER", "openai")
@@ -50,10 +99,82 @@ class LLMManager:
             else list(self.providers.keys())[0]
         )
 
+        self.model_catalog = ModelCatalogCache(
+            ttl=float(os.getenv("MODEL_CATALOG_TTL", "300")),
+            stale_ttl=float(os.getenv("MODEL_CATALOG_STALE_TTL", "3600")),
+        )
+        self.embedding_cache = EmbeddingCache(
+            memory_max_bytes=int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", "64"))
+            * 1024
+            * 1024,
+            # Defaults outside the working directory so that running from the
+            # source tree does not drop a database into it.
+            disk_path=os.getenv(
+                "EMBEDDING_CACHE_PATH",
+                os.path.join(
+                    tempfile.gettempdir(), "ai_playground_embedding_cache.sqlite3"
+                ),
+            ),
+            disk_max_bytes=int(os.getenv("EMBEDDING_CACHE_DISK_MB", "1024"))
+            * 1024
+            * 1024,
+        )
+        self.response_cache = ResponseCache(
+            enabled=os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true",
+            max_temperature=float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.0")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        )
+        self.coalescer = RequestCoalescer(
+            enabled=os.getenv("REQUEST_COALESCING_ENABLED", "true").lower() == "true"
+        )
+        self.router = ResilientRouter(
+            enabled=os.getenv("RESILIENCE_ENABLED", "false").lower() == "true",
+            fallbacks=parse_fallbacks(os.getenv("LLM_FALLBACKS", "")),
+            hedging=os.getenv("HEDGING_ENABLED", "true").lower() == "true",
+            hedge_min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+            breaker_options={
+                "window": int(os.getenv("CIRCUIT_WINDOW", "20")),
+                "min_calls": int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+                "error_threshold": float(os.getenv("CIRCUIT_ERROR_THRESHOLD", "0.5")),
+                "slow_call_ms": float(os.getenv("CIRCUIT_SLOW_CALL_MS", "30000")),
+                "cooldown": float(os.getenv("CIRCUIT_COOLDOWN", "30")),
+            },
+        )
+        self.semantic_cache = SemanticCache(
+            enabled=os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            capacity=int(os.getenv("SEMANTIC_CACHE_CAPACITY", "2048")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "8192")),
+            embedding_provider=os.getenv("SEMANTIC_CACHE_EMBEDDING_PROVIDER"),
+        )
+
     def get_current_provider(self) -> LLMProvider:
         """Returns the currently selected LLM provider instance."""
         return self.providers[self.current_provider]
 
+    def _resolve(self, provider_name: str | None) -> tuple[str, LLMProvider]:
+        name = provider_name or self.current_provider
+        if name not in self.providers:
+            raise ValueError(f"Provider '{name}' is not available.")
+        return name, self.providers[name]
+
+    async def _ready(self, provider_name: str | None) -> tuple[str, LLMProvider]:
+        """
+        Like `_resolve`, but first waits for the provider's validation if it
+        is still pending.
+        """
+        name = provider_name or self.current_provider
+        validation = self._validations.get(name)
+        if validation is not None and not validation.done():
+            await asyncio.shield(validation)
+        return self._resolve(name)
+
+    @property
+    def pending_providers(self) -> List[str]:
+        """Names of providers whose validation has not finished yet."""
+        return [name for name, task in self._validations.items() if not task.done()]
+
     def set_provider(self, provider_name: str):
         """Sets the current provider to the specified one if it exists."""
         if provider_name in self.providers:
@@ -61,24 +182,351 @@ class LLMManager:
         else:
             raise ValueError(f"Provider '{provider_name}' is not available.")
 
-    async def validate_providers(self):
-        """Validates all initialized providers and removes those that fail."""
-        validated_providers = {}
-        for name, provider in self.providers.items():
+    async def list_models(self, provider_name: str | None = None) -> List[str]:
+        """
+        Returns the model catalog for a provider, served from the catalog cache.
+
+        Args:
+            provider_name: The provider to list models for. Defaults to the
+                currently selected provider.
+        """
+        name, provider = await self._ready(provider_name)
+        return await self.model_catalog.get(name, provider.list_models)
+
+    def resolve_config(
+        self,
+        provider_name: str | None = None,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> GenerationConfig:
+        """
+        Resolves optional per-request overrides against the current settings
+        into an immutable config. Later settings changes do not affect calls
+        already holding a config. `prefix` carries the system prompt, context
+        blocks and earlier turns to send ahead of the prompt.
+
+        Raises:
+            ValueError: If the provider is not available.
+        """
+        name, provider = self._resolve(provider_name)
+        return GenerationConfig(
+            provider=name,
+            model=model or provider.model,
+            temperature=provider.temperature if temperature is None else temperature,
+            max_tokens=max_tokens,
+            prefix=prefix if prefix and (prefix.blocks or prefix.history) else None,
+        )
+
+    async def generate_text(
+        self, prompt: str, config: GenerationConfig | None = None
+    ) -> TextGeneration:
+        """
+        Generates a completion for `config` (the current settings by default),
+        consulting the response caches first.
+
+        The exact-match cache applies when it is enabled and the temperature
+        is low enough for the answer to be effectively deterministic. The
+        semantic cache, when enabled, reuses the answer of a sufficiently
+        similar earlier prompt for the same model and temperature. On a miss, concurrent
+        identical requests share a single upstream call. Answers from a
+        fallback or hedged provider are not cached under the requested config.
+        """
+        config = config or self.resolve_config()
+
+        exact_key = None
+        if self.response_cache.applies_to(config.temperature):
+            exact_key = make_response_key(
+                config.provider,
+                config.model,
+                config.temperature,
+                prompt,
+                config.max_tokens,
+                config.prefix.digest() if config.prefix else "",
+            )
+            cached = self.response_cache.get(exact_key)
+            if cached is not None:
+                return TextGeneration(text=cached, cached=True, config=config)
+
+        semantic = None
+        if self.semantic_cache.enabled:
+            semantic = await self._semantic_lookup(config, prompt)
+            if semantic is not None and semantic[2] is not None:
+                return TextGeneration(text=semantic[2], cached=True, config=config)
+
+        async def generate() -> tuple[GenerationConfig, str]:
+            if self.router.enabled:
+                winner, text = await self.router.generate(
+                    self._candidates(config),
+                    lambda candidate: self._provider_generate(prompt, candidate),
+                )
+            else:
+                winner, text = config, await self._provider_generate(prompt, config)
+            if winner == config:
+                if exact_key is not None:
+                    self.response_cache.put(exact_key, text)
+                if semantic is not None:
+                    self.semantic_cache.insert(semantic[0], semantic[1], text)
+            return winner, text
+
+        winner, text = await self.coalescer.run(("generate", config, prompt), generate)
+        return TextGeneration(text=text, config=winner)
+
+    async def stream_text(
+        self,
+        prompt: str,
+        config: GenerationConfig | None = None,
+        resilient: bool = True,
+    ) -> AsyncIterator[TextChunk]:
+        """
+        Streams a completion for `config` (the current settings by default).
+        With `resilient` and the router enabled, the stream may be served by a
+        fallback or hedged provider.
+        """
+        config = config or self.resolve_config()
+        if resilient and self.router.enabled:
+            stream = self.router.stream(
+                self._candidates(config),
+                lambda candidate: self._provider_stream(prompt, candidate),
+            )
+        else:
+            stream = self._provider_stream(prompt, config)
+        async for chunk in stream:
+            yield chunk
+
+    def _candidates(self, config: GenerationConfig) -> List[GenerationConfig]:
+        """The requested config followed by the available fallbacks."""
+        candidates = [config]
+        for name, model in self.router.fallbacks:
+            if name not in self.providers:
+                continue
+            candidate = GenerationConfig(
+                provider=name,
+                model=model or self.providers[name].model,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                prefix=config.prefix,
+            )
+            if candidate not in candidates:
+                candidates.append(candidate)
+        return candidates
+
+    async def _provider_generate(self, prompt: str, config: GenerationConfig) -> str:
+        _, provider = await self._ready(config.provider)
+        started = time.perf_counter()
+        try:
+            text = await provider.generate_text(
+                prompt,
+                model=config.model,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                prefix=config.prefix,
+            )
+        except Exception as e:
+            LLM_ERRORS.labels(config.provider, type(e).__name__).inc()
+            raise
+        LLM_UPSTREAM_LATENCY.labels(config.provider, config.model, "generate").observe(
+            time.perf_counter() - started
+        )
+        return text
+
+    async def _provider_stream(
+        self, prompt: str, config: GenerationConfig
+    ) -> AsyncGenerator[TextChunk, None]:
+        _, provider = await self._ready(config.provider)
+        started = time.perf_counter()
+        first_token = True
+        try:
+            async for chunk in provider.stream_text(
+                prompt,
+                model=config.model,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                prefix=config.prefix,
+            ):
+                if first_token and chunk.text:
+                    first_token = False
+                    LLM_TIME_TO_FIRST_TOKEN.labels(
+                        config.provider, config.model
+                    ).observe(time.perf_counter() - started)
+                chunk.config = config
+                yield chunk
+        except Exception as e:
+            LLM_ERRORS.labels(config.provider, type(e).__name__).inc()
+            raise
+        LLM_UPSTREAM_LATENCY.labels(config.provider, config.model, "stream").observe(
+            time.perf_counter() - started
+        )
+
+    async def _semantic_lookup(
+        self, config: GenerationConfig, prompt: str
+    ) -> tuple[tuple[str, ...], np.ndarray, str | None] | None:
+        """
+        Embeds the prompt and searches the semantic cache. Returns the
+        partition, the prompt vector and any cached answer, or None if the
+        prompt could not be embedded.
+        """
+        embedder = await self._semantic_embedding_provider()
+        if embedder is None:
+            return None
+        try:
+            embedding_model = await self.providers[embedder].get_embedding_model()
+            vector = normalize(await self.generate_embedding(prompt, embedder))
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup skipped: {e}")
+            return None
+        partition = (
+            embedder,
+            str(embedding_model),
+            config.provider,
+            config.model,
+            repr(float(config.temperature)),
+            str(config.max_tokens),
+            config.prefix.digest() if config.prefix else "",
+        )
+        return partition, vector, self.semantic_cache.lookup(partition, vector)
+
+    async def _semantic_embedding_provider(self) -> str | None:
+        configured = self.semantic_cache.embedding_provider
+        if configured in self.providers:
+            return configured
+        for name, provider in list(self.providers.items()):
+            if await provider.get_embedding_model() is not None:
+                self.semantic_cache.embedding_provider = name
+                return name
+        return None
+
+    async def generate_embedding(
+        self, text: str, provider_name: str | None = None
+    ) -> List[float]:
+        """
+        Returns the embedding for `text`, served from the embedding cache when
+        the same provider, model and normalized text were embedded before.
+        """
+        embeddings = await self.generate_embeddings([text], provider_name)
+        return embeddings[0]
+
+    async def generate_embeddings(
+        self, texts: List[str], provider_name: str | None = None
+    ) -> List[List[float]]:
+        """
+        Returns embeddings for `texts` in input order. Only texts missing from
+        the embedding cache are sent upstream, each at most once, and
+        concurrent requests for the same missing texts share one call.
+
+        Raises:
+            NotImplementedError: If the provider has no embedding model.
+        """
+        name, provider = await self._ready(provider_name)
+
+        embedding_model = await provider.get_embedding_model()
+        if embedding_model is None:
+            raise NotImplementedError(f"Provider '{name}' does not support embeddings.")
+
+        keys = [make_embedding_key(name, embedding_model, text) for text in texts]
+        found = await self.embedding_cache.get_many(dict.fromkeys(keys))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        async def embed() -> Dict[str, List[float]]:
+            started = time.perf_counter()
             try:
-                await provider.validate_credentials()
-                validated_providers[name] = provider
-                logger.info(f"\t✅ Provider '{name}' validated successfully.")
+                if len(missing) == 1:
+                    vectors = [await provider.generate_embedding(*missing.values())]
+                else:
+                    vectors = await provider.generate_embeddings(list(missing.values()))
             except Exception as e:
-                logger.warning(f"❌ Provider '{name}' validation failed: {e}")
+                LLM_ERRORS.labels(name, type(e).__name__).inc()
+                raise
+            LLM_UPSTREAM_LATENCY.labels(name, embedding_model, "embed").observe(
+                time.perf_counter() - started
+            )
+            fresh = dict(zip(missing.keys(), vectors))
+            await self.embedding_cache.put_many(fresh)
+            return fresh
 
-        self.providers = validated_providers
-        if not self.providers:
-            raise RuntimeError("No valid LLM providers could be initialized.")
+        if missing:
+            # The cache keys already cover provider, model and text.
+            found.update(await self.coalescer.run(("embed", *missing), embed))
 
-        if self.current_provider not in self.providers:
+        return [found[key] for key in keys]
+
+    def start_validation(self, timeout: float | None = None):
+        """
+        Starts validating all initialized providers concurrently, under one
+        shared deadline of `timeout` seconds. Until its check finishes a
+        provider is pending, and calls that use it wait for the result;
+        providers that fail or miss the deadline are removed.
+        """
+        deadline = (
+            None if timeout is None else asyncio.get_running_loop().time() + timeout
+        )
+        self._validations = {
+            name: asyncio.create_task(self._validate(name, provider, deadline))
+            for name, provider in self.providers.items()
+        }
+
+    async def _validate(
+        self, name: str, provider: LLMProvider, deadline: float | None
+    ) -> bool:
+        try:
+            async with asyncio.timeout_at(deadline):
+                await provider.validate_credentials()
+            logger.info(f"\t✅ Provider '{name}' validated successfully.")
+            return True
+        except Exception as e:
+            reason = "timed out" if isinstance(e, TimeoutError) else str(e)
+            logger.warning(f"❌ Provider '{name}' validation failed: {reason}")
+            self._remove_provider(name)
+            await provider.aclose()
+            return False
+
+    def _remove_provider(self, name: str):
+        self.providers.pop(name, None)
+        if not self.providers:
+            logger.error("No valid LLM providers remain.")
+        elif self.current_provider == name:
             logger.warning(
-                f"⚠️ Current provider '{self.current_provider}' failed validation. Resetting..."
+                f"⚠️ Current provider '{name}' failed validation. Resetting..."
             )
             self.current_provider = list(self.providers.keys())[0]
             logger.info(f"✅ Current provider reset to '{self.current_provider}'.")
+
+    async def wait_for_validation(self):
+        """Waits for validation started by `start_validation` to finish.
+
+        Raises:
+            RuntimeError: If no provider passed validation.
+        """
+        await asyncio.gather(*self._validations.values())
+        if not self.providers:
+            raise RuntimeError("No valid LLM providers could be initialized.")
+
+    async def validate_providers(self, timeout: float | None = None):
+        """Validates all initialized providers concurrently and removes those that fail."""
+        self.start_validation(timeout)
+        await self.wait_for_validation()
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the hit/miss statistics of every cache layer."""
+        return {
+            "response": self.response_cache.stats(),
+            "semantic": self.semantic_cache.stats(),
+            "embedding": self.embedding_cache.stats(),
+            "model_catalog": self.model_catalog.stats(),
+        }
+
+    async def aclose(self):
+        """Closes the pooled HTTP clients of all providers and the caches."""
+        for task in self._validations.values():
+            task.cancel()
+        self.embedding_cache.close()
+        for name, provider in self.providers.items():
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing provider '{name}': {e}")
@@ -0,0 +1,292 @@
+import contextlib
+import math
+import os
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow
+# long-form generations.
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: Tuple[str, ...], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    # Every series carries the worker's PID: each gunicorn worker keeps its
+    # own counters, so series from different workers must not be merged.
+    parts = [f'worker="{os.getpid()}"']
+    parts += [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative only when rendered.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Returns the child for these label values, creating it once."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, child in self._children.items():
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}{labels} {_format_value(child.value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds (`le`) plus +Inf."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                labels = _format_labels(self.labelnames, values, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Holds metrics and scrape-time collectors and renders them in the
+    Prometheus text format.
+
+    Each worker runs a single event loop, so recording is a dict lookup plus
+    an in-place increment with no locks; label children are created once
+    and reused. Rendering must therefore also run on the event loop, not in
+    a thread pool.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Adds a callable that returns exposition lines computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(
+    name: str, documentation: str, labelname: str, values: Dict[str, float]
+) -> List[str]:
+    """Renders a labelled gauge computed at scrape time."""
+    return _sample_lines("gauge", name, documentation, labelname, values)
+
+
+def counter_lines(
+    name: str, documentation: str, labelname: str, values: Dict[str, float]
+) -> List[str]:
+    """Renders a labelled counter kept elsewhere and read at scrape time."""
+    return _sample_lines("counter", name, documentation, labelname, values)
+
+
+def _sample_lines(
+    kind: str,
+    name: str,
+    documentation: str,
+    labelname: str,
+    values: Dict[str, float],
+) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for label, value in values.items():
+        labels = _format_labels((labelname,), (label,))
+        lines.append(f"{name}{labels} {_format_value(value)}")
+    return lines
+
+
+REGISTRY = Registry()
+
+LLM_UPSTREAM_LATENCY = REGISTRY.histogram(
+    "llm_upstream_duration_seconds",
+    "Duration of upstream provider calls.",
+    ("provider", "model", "operation"),
+)
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting a streamed provider call to its first text chunk.",
+    ("provider", "model"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Tokens reported in provider usage metadata; cache_read and cache_creation"
+    " count prompt-cache hits and writes within the input.",
+    ("provider", "model", "type"),
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total",
+    "Failed upstream provider calls by exception type.",
+    ("provider", "type"),
+)
+
+
+# Usage accumulated for the current request, if one is being tracked.
+_request_usage: ContextVar[Dict[str, Any] | None] = ContextVar(
+    "request_usage", default=None
+)
+
+
+def _add_usage(total: Dict[str, Any], usage: Dict[str, Any]):
+    for key, value in usage.items():
+        if isinstance(value, dict):
+            _add_usage(total.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            total[key] = total.get(key, 0) + value
+
+
+@contextlib.contextmanager
+def track_usage() -> Iterator[Dict[str, Any]]:
+    """
+    Collects the usage that providers record while the block runs, including
+    calls made by tasks it starts, into the yielded dict.
+    """
+    usage: Dict[str, Any] = {}
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def record_usage(provider: str, model: str, usage: Dict | None):
+    """
+    Adds langchain `usage_metadata` token counts, including prompt-cache reads
+    and writes, to LLM_TOKENS and to the usage being tracked, if any.
+    """
+    if not usage:
+        return
+    for kind in ("input_tokens", "output_tokens"):
+        count = usage.get(kind)
+        if count:
+            LLM_TOKENS.labels(provider, model, kind.removesuffix("_tokens")).inc(count)
+    details = usage.get("input_token_details") or {}
+    for kind in ("cache_read", "cache_creation"):
+        count = details.get(kind)
+        if count:
+            LLM_TOKENS.labels(provider, model, kind).inc(count)
+    tracked = _request_usage.get()
+    if tracked is not None:
+        _add_usage(tracked, usage)
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+ModelLoader = Callable[[], Awaitable[List[str]]]
+
+
+@dataclass(frozen=True)
+class _CatalogEntry:
+    models: tuple[str, ...]
+    fetched_at: float
+
+
+class ModelCatalogCache:
+    """
+    Per-provider cache for model catalogs with stale-while-revalidate semantics.
+
+    Fresh entries are served directly. Entries older than the TTL but still
+    inside the stale window are served immediately while a single background
+    refresh is scheduled. Concurrent misses for the same provider share one
+    upstream call.
+    """
+
+    def __init__(self, ttl: float = 300.0, stale_ttl: float = 3600.0):
+        """Initializes the cache.
+
+        Args:
+            ttl: Seconds an entry is considered fresh.
+            stale_ttl: Additional seconds a stale entry may be served while
+                it is being refreshed in the background.
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, _CatalogEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    async def get(self, key: str, loader: ModelLoader) -> List[str]:
+        """Returns the cached catalog for `key`, loading it if needed.
+
+        Args:
+            key: The cache key, usually the provider name.
+            loader: Coroutine function that fetches the catalog upstream.
+
+        Returns:
+            A list of model names.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return list(entry.models)
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return list(entry.models)
+
+        self.misses += 1
+        return list(await self._load(key, loader))
+
+    def invalidate(self, key: str | None = None):
+        """Drops one cached catalog, or all of them when `key` is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the overall hit ratio."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    async def _load(self, key: str, loader: ModelLoader) -> tuple[str, ...]:
+        # Shield the shared fetch so one cancelled waiter does not abort it
+        # for everyone else.
+        return await asyncio.shield(self._start_fetch(key, loader))
+
+    def _start_fetch(self, key: str, loader: ModelLoader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: str, loader: ModelLoader) -> tuple[str, ...]:
+        models = tuple(await loader())
+        self._entries[key] = _CatalogEntry(models=models, fetched_at=time.monotonic())
+        return models
+
+    def _refresh_in_background(self, key: str, loader: ModelLoader):
+        if key in self._inflight:
+            return
+        task = self._start_fetch(key, loader)
+        task.add_done_callback(lambda t: self._log_refresh_result(key, t))
+
+    def _log_refresh_result(self, key: str, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.refresh_errors += 1
+            logger.warning(
+                f"Background model catalog refresh for '{key}' failed: {error}"
+            )
@@ -1,24 +1,63 @@
 import logging
-from typing import cast
+import os
+from typing import Any, AsyncIterator
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.utils import convert_to_secret_str
-from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
 import anthropic
+import httpx
 
-from .base import LLMProvider
+from ..metrics import record_usage
+from .base import (
+    LLMProvider,
+    PromptPrefix,
+    TextChunk,
+    estimate_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
+# The Messages API requires a cap; used when a request does not set one.
+ANTHROPIC_MAX_TOKENS = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096"))
+
+
+def _usage(usage: Any) -> dict[str, Any]:
+    """
+    Converts Anthropic usage to langchain `usage_metadata` form. Anthropic
+    leaves prompt-cache reads and writes out of `input_tokens`, so they are
+    added back.
+    """
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+    input_tokens = (usage.input_tokens or 0) + cache_read + cache_creation
+    output_tokens = usage.output_tokens or 0
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "input_token_details": {
+            "cache_read": cache_read,
+            "cache_creation": cache_creation,
+        },
+    }
+
 
 class AnthropicProvider(LLMProvider):
-    """Concrete LLM provider for Anthropic models using langchain-anthropic."""
+    """
+    Concrete LLM provider for Anthropic models.
+
+    Chat, listing and validation all go through one `AsyncAnthropic` client
+    on the provider's pooled HTTP client. ChatAnthropic cannot be given a
+    client, so chat requests are made with the SDK directly rather than
+    through langchain.
+    """
+
+    name = "anthropic"
 
     def __init__(
         self,
         api_key: str,
         model: str = "claude-3-5-haiku-latest",
         temperature: float = 0.7,
+        http_client: httpx.AsyncClient | None = None,
     ):
         """Initializes the AnthropicProvider instance.
 
@@ -26,49 +65,144 @@ class AnthropicProvider(LLMProvider):
             api_key: The Anthropic API key.
             model: The model name to use, e.g., "claude-3-5-haiku-latest".
             temperature: The sampling temperature for the model.
+            http_client: Optional pooled HTTP client to share.
         """
-        super().__init__(api_key)
+        super().__init__(api_key, http_client=http_client)
         self.model = model
         self.temperature = temperature
-        self._update_llm_instance()
-
-    def _update_llm_instance(self):
-        """Creates or recreates the internal ChatAnthropic LLM instance."""
-        self.llm = ChatAnthropic(  # pyright: ignore
-            model=self.model,  # pyright: ignore
-            temperature=self.temperature,
-            api_key=convert_to_secret_str(self.api_key),
+        # Retries are handled by the provider's rate limiter, not the SDK.
+        self.client = anthropic.AsyncAnthropic(
+            api_key=self.api_key, http_client=self.http_client, max_retries=0
         )
 
-    async def generate_text(self, prompt: str) -> str:
+    def _request(
+        self,
+        prompt: str,
+        model: str | None,
+        temperature: float | None,
+        max_tokens: int | None,
+        prefix: PromptPrefix | None,
+    ) -> dict[str, Any]:
+        """Builds the Messages API request with the stable prefix first.
+
+        The system prompt and context blocks become system content blocks,
+        followed by the earlier turns. `cache_control` breakpoints after the
+        system prompt, the last context block and the last earlier turn let
+        requests sharing any of those prefixes read it from Anthropic's
+        prompt cache.
+        """
+        request: dict[str, Any] = {
+            "model": model or self.model,
+            "max_tokens": max_tokens or ANTHROPIC_MAX_TOKENS,
+            "temperature": self.temperature if temperature is None else temperature,
+        }
+        messages: list[dict[str, Any]] = []
+        if prefix is not None:
+            if prefix.blocks:
+                blocks: list[dict[str, Any]] = [
+                    {"type": "text", "text": block} for block in prefix.blocks
+                ]
+                if prefix.system:
+                    blocks[0]["cache_control"] = {"type": "ephemeral"}
+                blocks[-1]["cache_control"] = {"type": "ephemeral"}
+                request["system"] = blocks
+            for index, (role, text) in enumerate(prefix.history):
+                content: str | list[dict[str, Any]] = text
+                if index == len(prefix.history) - 1:
+                    content = [
+                        {
+                            "type": "text",
+                            "text": text,
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ]
+                messages.append({"role": role, "content": content})
+        messages.append({"role": "user", "content": prompt})
+        request["messages"] = messages
+        return request
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
         """Generates a text response for a given prompt using Anthropic.
 
         Args:
             prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Optional temperature override for this call.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt and context blocks sent first.
 
         Returns:
             The AI's text response as a string.
 
         Raises:
-            TypeError: If the model returns a non-string content type.
-            # Any exceptions from the Anthropic API will also be propagated.
+            anthropic.APIError: If the Anthropic API call fails.
         """
         try:
-            response_base: BaseMessage = await self.llm.ainvoke(
-                [HumanMessage(content=prompt)]
+            request = self._request(prompt, model, temperature, max_tokens, prefix)
+            message = await self.rate_limiter.call(
+                lambda: self.client.messages.create(**request),
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
+            )
+            record_usage(self.name, request["model"], _usage(message.usage))
+            return "".join(
+                block.text for block in message.content if block.type == "text"
             )
-            response: AIMessage = cast(AIMessage, response_base)
-
-            if isinstance(response.content, str):
-                return response.content
-            else:
-                raise TypeError(
-                    f"Expected a string response, but got {type(response.content)}"
-                )
         except Exception as e:
             logger.warning(f"Error generating Anthropic text: {e}")
             raise
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        """Streams a text response for a given prompt using Anthropic.
+
+        Args:
+            prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Optional temperature override for this call.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt and context blocks sent first.
+
+        Yields:
+            TextChunk objects carrying text deltas, followed by one carrying
+            the token usage of the whole response.
+        """
+        request = self._request(prompt, model, temperature, max_tokens, prefix)
+
+        async def open_stream() -> AsyncIterator[TextChunk]:
+            async with self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    yield TextChunk(text=text)
+                message = await stream.get_final_message()
+            yield TextChunk(usage=_usage(message.usage))
+
+        try:
+            async for chunk in self.rate_limiter.stream(
+                open_stream,
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
+            ):
+                record_usage(self.name, request["model"], chunk.usage)
+                yield chunk
+        except Exception as e:
+            logger.warning(f"Error streaming Anthropic text: {e}")
+            raise
+
     async def generate_embedding(self, text: str) -> list[float]:
         """Generates a text embedding for the given input text using Anthropic.
 
@@ -100,8 +234,7 @@ class AnthropicProvider(LLMProvider):
             A list of model names as strings.
         """
         try:
-            client = anthropic.AsyncAnthropic(api_key=self.api_key)
-            models = await client.models.list()
+            models = await self.rate_limiter.call(self.client.models.list)
             model_names = [model.id for model in models.data if "claude" in model.id]
             return model_names
         except Exception as e:
@@ -115,7 +248,6 @@ class AnthropicProvider(LLMProvider):
             model: The model name as a string.
         """
         self.model = model
-        self._update_llm_instance()
 
     async def set_temperature(self, temperature: float):
         """Sets the temperature for text generation.
@@ -124,7 +256,6 @@ class AnthropicProvider(LLMProvider):
             temperature: The sampling temperature as a float.
         """
         self.temperature = temperature
-        self._update_llm_instance()
 
     async def validate_credentials(self) -> None:
         """
@@ -134,7 +265,6 @@ class AnthropicProvider(LLMProvider):
             Exception: If the API key is invalid or another API error occurs.
         """
         try:
-            client = anthropic.AsyncAnthropic(api_key=self.api_key)
-            await client.models.retrieve("claude-3-haiku-20240307")
+            await self.client.models.retrieve("claude-3-haiku-20240307")
         except Exception as e:
             raise e
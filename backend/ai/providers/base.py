@@ -1,5 +1,142 @@
+import asyncio
+import hashlib
+import json
+import os
 from abc import ABC, abstractmethod
-from typing import List
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import httpx
+
+from .http_client import create_http_client
+from .rate_limiter import AdaptiveRateLimiter
+
+EMBEDDING_BATCH_CONCURRENCY = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))
+LLM_INSTANCE_POOL_SIZE = int(os.getenv("LLM_INSTANCE_POOL_SIZE", "16"))
+
+
+@dataclass
+class TextChunk:
+    """
+    A piece of streamed model output, with any usage metadata reported on it
+    and, once it has passed through the LLM manager, the config that served
+    it, which differs from the requested one when a fallback or hedged
+    provider answered.
+    """
+
+    text: str = ""
+    usage: Dict[str, Any] | None = None
+    config: "GenerationConfig | None" = None
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    """
+    The stable leading part of a request: a system prompt, context blocks and
+    earlier conversation turns as (role, text) pairs with role "user" or
+    "assistant". Providers send it ahead of the user prompt, in this order,
+    so that requests sharing it can be served from the provider's prompt cache.
+    """
+
+    system: str | None = None
+    context: Tuple[str, ...] = ()
+    history: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def blocks(self) -> List[str]:
+        """The non-empty system and context blocks, system prompt first."""
+        return [block for block in (self.system, *self.context) if block]
+
+    def text(self) -> str:
+        """The blocks as a single string, for providers without block content."""
+        return "\n\n".join(self.blocks)
+
+    def estimated_tokens(self) -> int:
+        """Estimated size of the whole prefix, history included."""
+        return estimate_tokens(self.text()) + sum(
+            estimate_tokens(text) for _, text in self.history
+        )
+
+    def digest(self) -> str:
+        """A short hash identifying the prefix, for cache keys."""
+        digest = hashlib.sha256()
+        for block in self.blocks:
+            digest.update(block.encode("utf-8"))
+            digest.update(b"\x00")
+        for role, text in self.history:
+            digest.update(f"\x01{role}\x00{text}\x00".encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class GenerationConfig:
+    """
+    Immutable, fully resolved parameters for a single generation call.
+    """
+
+    provider: str
+    model: str
+    temperature: float
+    max_tokens: int | None = None
+    prefix: PromptPrefix | None = None
+
+
+@dataclass
+class TextGeneration:
+    """
+    A completed text generation, whether it was served from a cache, and the
+    config that produced it, which differs from the requested one when a
+    fallback or hedged provider answered.
+    """
+
+    text: str
+    cached: bool = False
+    config: GenerationConfig | None = None
+
+
+def content_to_text(content: Any) -> str:
+    """
+    Flatten langchain message content (a string or a list of blocks) to text.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content
+            if isinstance(block, (str, dict))
+        )
+    raise TypeError(f"Unsupported message content type {type(content)}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) used for request sizing.
+    """
+    return len(text) // 4 + 1
+
+
+def split_batches(texts: List[str], max_items: int, max_tokens: int) -> List[List[str]]:
+    """
+    Split texts into consecutive batches bounded by item count and estimated
+    tokens. A single text larger than `max_tokens` still gets its own batch.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (
+            len(current) >= max_items or current_tokens + tokens > max_tokens
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
 
 
 class LLMProvider(ABC):
@@ -7,20 +144,109 @@ class LLMProvider(ABC):
     Abstract base class for LLM providers.
     """
 
-    def __init__(self, api_key: str):
+    # Upper bounds for a single upstream embedding request. Providers with
+    # native batch support override these.
+    embedding_batch_size: int = 1
+    embedding_batch_max_tokens: int = 8_000
+
+    # Registry name; also the prefix of the provider's rate limit settings.
+    name: str = ""
+
+    def __init__(self, api_key: str, http_client: httpx.AsyncClient | None = None):
         if not api_key:
             raise ValueError("API key must be provided")
         self.api_key = api_key
         self.model = ""
         self.temperature = 0.7
+        # One pooled client per provider keeps TLS connections warm across
+        # chat, embedding and listing calls.
+        self.http_client = http_client or create_http_client()
+        self._llm_pool: OrderedDict[tuple, Any] = OrderedDict()
+        self.rate_limiter = AdaptiveRateLimiter(self.name or type(self).__name__)
+
+    async def aclose(self):
+        """
+        Close the provider's shared HTTP client and its pooled connections.
+        """
+        await self.http_client.aclose()
 
     @abstractmethod
-    async def generate_text(self, prompt: str) -> str:
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
         """
         Generate text based on the given prompt.
+        `model`, `temperature` and `max_tokens` override the provider's
+        settings for this call only; `prefix` is sent ahead of the prompt.
         """
         pass
 
+    @abstractmethod
+    def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        """
+        Stream generated text for the given prompt as it is produced.
+        `model`, `temperature` and `max_tokens` override the provider's
+        settings for this call only; `prefix` is sent ahead of the prompt.
+        """
+        pass
+
+    def _create_llm(self, model: str, temperature: float, **params: Any) -> Any:
+        """
+        Build a langchain chat model for the given model, temperature and
+        extra constructor parameters.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not use a langchain chat model."
+        )
+
+    @property
+    def llm(self) -> Any:
+        """
+        The chat model for the provider's current model and temperature.
+        """
+        return self._get_llm()
+
+    def _get_llm(
+        self,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        **params: Any,
+    ) -> Any:
+        """
+        Return a chat model from the provider's LRU pool, keyed by model,
+        temperature and extra parameters, building it on first use. Pooled
+        instances share the provider's HTTP client, so switching between
+        configurations keeps connections warm.
+        """
+        model = model or self.model
+        temperature = self.temperature if temperature is None else temperature
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        # Parameters may hold dicts or lists (e.g. `model_kwargs`, `stop`).
+        key = (model, temperature, json.dumps(params, sort_keys=True, default=str))
+        llm = self._llm_pool.get(key)
+        if llm is None:
+            llm = self._create_llm(model, temperature, **params)
+            self._llm_pool[key] = llm
+            while len(self._llm_pool) > LLM_INSTANCE_POOL_SIZE:
+                self._llm_pool.popitem(last=False)
+        else:
+            self._llm_pool.move_to_end(key)
+        return llm
+
     async def generate_embedding(self, text: str) -> List[float]:
         """
         Generate an embedding for the given text.
@@ -30,6 +256,31 @@ class LLMProvider(ABC):
             f"{self.__class__.__name__} does not support embeddings."
         )
 
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts, preserving input order.
+        Inputs are split into provider-sized sub-batches that run concurrently,
+        bounded by EMBEDDING_BATCH_CONCURRENCY.
+        """
+        batches = split_batches(
+            texts, self.embedding_batch_size, self.embedding_batch_max_tokens
+        )
+        semaphore = asyncio.Semaphore(EMBEDDING_BATCH_CONCURRENCY)
+
+        async def run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_batch(batch)
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [embedding for batch in results for embedding in batch]
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed one sub-batch in a single upstream call. The default falls back
+        to one `generate_embedding` call per text.
+        """
+        return [await self.generate_embedding(text) for text in texts]
+
     @abstractmethod
     async def get_embedding_model(self) -> str | None:
         """
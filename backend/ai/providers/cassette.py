@@ -0,0 +1,436 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+import numpy as np
+
+from .base import LLMProvider, PromptPrefix, TextChunk
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_SUFFIX = ".cassette.jsonl.gz"
+
+
+class CassetteMissError(LookupError):
+    """Raised when a strict replay has no recording for a request."""
+
+
+def cassette_path(directory: str, provider: str, pid: int | None = None) -> str:
+    """The cassette a process records `provider` to, one file per process."""
+    stem = provider if pid is None else f"{provider}.{pid}"
+    return os.path.join(directory, f"{stem}{CASSETTE_SUFFIX}")
+
+
+def request_key(operation: str, *parts: Any) -> str:
+    """Identifies a request by its operation and every input that shapes it."""
+    payload = json.dumps([operation, *parts], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def generation_key(
+    model: str,
+    temperature: float,
+    max_tokens: int | None,
+    prompt: str,
+    prefix: PromptPrefix | None,
+) -> str:
+    parts: List[Any] = [model, temperature, max_tokens, prompt]
+    if prefix is not None:
+        parts.append(prefix.blocks)
+        if prefix.history:
+            parts.append(prefix.history)
+    return request_key("generate_text", *parts)
+
+
+def encode_vector(vector: List[float]) -> str:
+    """Packs an embedding as base64 float32, a quarter of its JSON size."""
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_vector(data: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(data), dtype="<f4").tolist()
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Wraps a provider and appends its traffic to a cassette: one gzipped JSON
+    line per text generation, stream, embedding or model listing, with the
+    observed latencies. Everything else is delegated unchanged.
+
+    Each process writes its own `{name}.{pid}` cassette, since gzip members
+    appended to one file by several workers interleave; replay merges them.
+    """
+
+    def __init__(self, inner: LLMProvider, directory: str):
+        """Initializes the recorder.
+
+        Args:
+            inner: The provider whose calls are recorded.
+            directory: Where cassettes are written; new recordings are
+                appended to this process's cassette.
+        """
+        # The wrapped provider owns the API key, the HTTP client and the
+        # chat model pool, so the base initializer is not run; those are
+        # delegated below instead.
+        self.inner = inner
+        self.name = inner.name
+        self.embedding_batch_size = inner.embedding_batch_size
+        self.embedding_batch_max_tokens = inner.embedding_batch_max_tokens
+        self.rate_limiter = inner.rate_limiter
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._pid: int | None = None
+
+    @property
+    def api_key(self) -> str:
+        return self.inner.api_key
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self.inner.http_client
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    @property
+    def temperature(self) -> float:
+        return self.inner.temperature
+
+    def _get_llm(self, *args: Any, **kwargs: Any) -> Any:
+        return self.inner._get_llm(*args, **kwargs)
+
+    @property
+    def path(self) -> str:
+        """This process's cassette."""
+        return cassette_path(self.directory, self.name, os.getpid())
+
+    def _write(self, entry: Dict[str, Any]):
+        if self._pid != os.getpid():
+            # First write, or a forked child: start this process's cassette.
+            self._pid = os.getpid()
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+            header = {
+                "op": "provider",
+                "name": self.name,
+                "model": self.inner.model,
+                "embedding_model": getattr(self.inner, "embedding_model", None),
+                "embedding_batch_size": self.embedding_batch_size,
+                "embedding_batch_max_tokens": self.embedding_batch_max_tokens,
+            }
+            self._file.write(json.dumps(header, separators=(",", ":")) + "\n")
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    async def aclose(self):
+        """Finishes the cassette and closes the wrapped provider."""
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._pid = None
+        await self.inner.aclose()
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
+        model = model or self.inner.model
+        temperature = self.inner.temperature if temperature is None else temperature
+        started = time.perf_counter()
+        text = await self.inner.generate_text(
+            prompt, model, temperature, max_tokens, prefix
+        )
+        self._write(
+            {
+                "op": "generate_text",
+                "key": generation_key(model, temperature, max_tokens, prompt, prefix),
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "text": text,
+            }
+        )
+        return text
+
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        model = model or self.inner.model
+        temperature = self.inner.temperature if temperature is None else temperature
+        started = time.perf_counter()
+        chunks = []
+        async for chunk in self.inner.stream_text(
+            prompt, model, temperature, max_tokens, prefix
+        ):
+            chunks.append(
+                [(time.perf_counter() - started) * 1000, chunk.text, chunk.usage]
+            )
+            yield chunk
+        self._write(
+            {
+                "op": "stream_text",
+                "key": generation_key(model, temperature, max_tokens, prompt, prefix),
+                "chunks": chunks,
+            }
+        )
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        vector = await self.inner.generate_embedding(text)
+        self._record_embeddings([text], [vector], time.perf_counter() - started)
+        return vector
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = await self.inner._embed_batch(texts)
+        self._record_embeddings(texts, vectors, time.perf_counter() - started)
+        return vectors
+
+    def _record_embeddings(
+        self, texts: List[str], vectors: List[List[float]], elapsed: float
+    ):
+        model = getattr(self.inner, "embedding_model", None)
+        for text, vector in zip(texts, vectors):
+            self._write(
+                {
+                    "op": "generate_embedding",
+                    "key": request_key("generate_embedding", model, text),
+                    "latency_ms": elapsed * 1000,
+                    "vector": encode_vector(vector),
+                }
+            )
+
+    async def get_embedding_model(self) -> str | None:
+        return await self.inner.get_embedding_model()
+
+    async def list_models(self) -> List[str]:
+        started = time.perf_counter()
+        models = await self.inner.list_models()
+        self._write(
+            {
+                "op": "list_models",
+                "key": request_key("list_models"),
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "models": models,
+            }
+        )
+        return models
+
+    async def set_model(self, model: str):
+        await self.inner.set_model(model)
+
+    async def set_temperature(self, temperature: float):
+        await self.inner.set_temperature(temperature)
+
+    async def validate_credentials(self) -> None:
+        await self.inner.validate_credentials()
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves a recorded cassette offline, sleeping the recorded latencies
+    multiplied by `latency_scale` (0 replays instantly).
+
+    Requests are matched on their operation and inputs. On a miss a strict
+    replay raises CassetteMissError; otherwise the recordings of the same
+    operation are served in rotation, which suits load tests whose prompts
+    differ from the recorded ones.
+    """
+
+    def __init__(
+        self,
+        paths: str | List[str],
+        latency_scale: float = 1.0,
+        strict: bool = True,
+    ):
+        """Loads cassettes written by RecordingProvider.
+
+        Args:
+            paths: Cassette file, or the per-process cassettes of one
+                provider, to replay together.
+            latency_scale: Factor applied to every recorded delay.
+            strict: Whether unmatched requests fail instead of rotating.
+        """
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        entries: Dict[str, Dict[str, List[dict]]] = {}
+        header: Dict[str, Any] = {}
+        for path in paths:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        entry = json.loads(line)
+                        if entry["op"] == "provider":
+                            header = header or entry
+                            continue
+                        # Streams and plain generations answer the same requests.
+                        op = (
+                            "generate_text"
+                            if entry["op"] == "stream_text"
+                            else entry["op"]
+                        )
+                        entries.setdefault(op, {}).setdefault(entry["key"], []).append(
+                            entry
+                        )
+                except (EOFError, json.JSONDecodeError) as e:
+                    # A recording that was not closed cleanly loses only its tail.
+                    logger.warning(f"Cassette {path} is truncated: {e}")
+
+        path = paths[0]
+        self.name = header.get("name") or os.path.basename(path).removesuffix(
+            CASSETTE_SUFFIX
+        )
+        super().__init__(api_key="cassette")
+        self.model = header.get("model", "")
+        self.embedding_model = header.get("embedding_model")
+        self.embedding_batch_size = header.get("embedding_batch_size", 1)
+        self.embedding_batch_max_tokens = header.get(
+            "embedding_batch_max_tokens", self.embedding_batch_max_tokens
+        )
+        self.path = ", ".join(paths)
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._entries = entries
+        self._replays = {
+            (op, key): itertools.cycle(recorded)
+            for op, by_key in entries.items()
+            for key, recorded in by_key.items()
+        }
+        self._rotations = {
+            op: itertools.cycle([e for recorded in by_key.values() for e in recorded])
+            for op, by_key in entries.items()
+        }
+        self.misses = 0
+
+    def _lookup(self, op: str, key: str) -> dict:
+        replay = self._replays.get((op, key))
+        if replay is not None:
+            return next(replay)
+        self.misses += 1
+        if self.strict or op not in self._rotations:
+            raise CassetteMissError(
+                f"No recorded {op} in {self.path} for this request."
+            )
+        return next(self._rotations[op])
+
+    async def _sleep(self, milliseconds: float):
+        if self.latency_scale > 0 and milliseconds > 0:
+            await asyncio.sleep(milliseconds * self.latency_scale / 1000)
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
+        model = model or self.model
+        temperature = self.temperature if temperature is None else temperature
+        entry = self._lookup(
+            "generate_text",
+            generation_key(model, temperature, max_tokens, prompt, prefix),
+        )
+        if "text" in entry:
+            await self._sleep(entry["latency_ms"])
+            return entry["text"]
+        await self._sleep(entry["chunks"][-1][0] if entry["chunks"] else 0)
+        return "".join(text for _, text, _ in entry["chunks"])
+
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        model = model or self.model
+        temperature = self.temperature if temperature is None else temperature
+        entry = self._lookup(
+            "generate_text",
+            generation_key(model, temperature, max_tokens, prompt, prefix),
+        )
+        if "text" in entry:
+            await self._sleep(entry["latency_ms"])
+            yield TextChunk(text=entry["text"])
+            return
+        elapsed = 0.0
+        for offset, text, usage in entry["chunks"]:
+            await self._sleep(offset - elapsed)
+            elapsed = offset
+            yield TextChunk(text=text, usage=usage)
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        embeddings = await self._embed_batch([text])
+        return embeddings[0]
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if self.embedding_model is None:
+            raise NotImplementedError(f"Cassette {self.path} has no embeddings.")
+        found = [
+            self._lookup(
+                "generate_embedding",
+                request_key("generate_embedding", self.embedding_model, text),
+            )
+            for text in texts
+        ]
+        # Recorded texts of one batch share its latency, so the max is the
+        # batch's own duration.
+        await self._sleep(max(entry["latency_ms"] for entry in found))
+        return [decode_vector(entry["vector"]) for entry in found]
+
+    async def get_embedding_model(self) -> str | None:
+        return self.embedding_model
+
+    async def list_models(self) -> List[str]:
+        entry = self._lookup("list_models", request_key("list_models"))
+        await self._sleep(entry["latency_ms"])
+        return list(entry["models"])
+
+    async def set_model(self, model: str):
+        self.model = model
+
+    async def set_temperature(self, temperature: float):
+        self.temperature = temperature
+
+    async def validate_credentials(self) -> None:
+        if not self._entries:
+            raise ValueError(f"Cassette {self.path} is empty.")
+
+
+def load_replay_providers(
+    directory: str, latency_scale: float = 1.0, strict: bool = True
+) -> Dict[str, LLMProvider]:
+    """
+    Returns a ReplayProvider for every provider with cassettes in
+    `directory`, by name, merging the cassettes recorded by each process.
+    """
+    providers: Dict[str, LLMProvider] = {}
+    if not os.path.isdir(directory):
+        return providers
+    by_provider: Dict[str, List[str]] = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(CASSETTE_SUFFIX):
+            # "openai.cassette.jsonl.gz" or, per process, "openai.1234.cassette.jsonl.gz".
+            name = filename.removesuffix(CASSETTE_SUFFIX).split(".")[0]
+            by_provider.setdefault(name, []).append(os.path.join(directory, filename))
+    for name, paths in by_provider.items():
+        provider = ReplayProvider(paths, latency_scale, strict)
+        providers[provider.name] = provider
+        logger.info(f"Replaying '{provider.name}' from {len(paths)} cassette(s).")
+    return providers
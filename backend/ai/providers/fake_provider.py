@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List
+
+import numpy as np
+
+from ..metrics import record_usage
+from .base import LLMProvider, PromptPrefix, TextChunk, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+FAKE_MODELS = ["fake-large", "fake-small"]
+FAKE_PREFIX_CACHE_SIZE = 1024
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+# Fixed vocabulary that fake completions are drawn from.
+VOCABULARY = (
+    "the model returns a deterministic answer built from this small fixed "
+    "vocabulary so that responses have realistic sizes without any network "
+    "access latency tokens stream provider backend request benchmark"
+).split()
+
+
+class FakeProviderError(Exception):
+    """An injected failure carrying an HTTP status like an SDK error."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class FakeProviderConfig:
+    """Latency, output size and failure behaviour of the fake provider."""
+
+    latency_distribution: str = "constant"
+    latency_ms: float = 50.0
+    latency_spread_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 64
+    embedding_dimensions: int = 1536
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeProviderConfig":
+        """Reads `FAKE_<SETTING>` environment variables, e.g. `FAKE_LATENCY_MS`."""
+
+        def get(setting: str, default: float) -> float:
+            value = os.getenv(f"FAKE_{setting}")
+            return float(value) if value else default
+
+        distribution = os.getenv("FAKE_LATENCY_DISTRIBUTION", cls.latency_distribution)
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"FAKE_LATENCY_DISTRIBUTION must be one of {LATENCY_DISTRIBUTIONS}."
+            )
+        return cls(
+            latency_distribution=distribution,
+            latency_ms=get("LATENCY_MS", cls.latency_ms),
+            latency_spread_ms=get("LATENCY_SPREAD_MS", cls.latency_spread_ms),
+            tokens_per_second=get("TOKENS_PER_SECOND", cls.tokens_per_second),
+            response_tokens=int(get("RESPONSE_TOKENS", cls.response_tokens)),
+            embedding_dimensions=int(
+                get("EMBEDDING_DIMENSIONS", cls.embedding_dimensions)
+            ),
+            error_rate=get("ERROR_RATE", cls.error_rate),
+            error_status=int(get("ERROR_STATUS", cls.error_status)),
+            seed=int(get("SEED", cls.seed)),
+        )
+
+
+def _stable_seed(*parts: str) -> int:
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic in-process provider for load tests and benchmarks.
+
+    Enabled by setting `FAKE_API_KEY` to any value (select it with
+    `DEFAULT_PROVIDER=fake`) and configured through `FAKE_*` variables. Text
+    and embeddings depend only on the input, so repeated runs return the same
+    payloads; latencies and injected errors come from a seeded generator.
+    """
+
+    name = "fake"
+
+    embedding_batch_size = 256
+    embedding_batch_max_tokens = 250_000
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = FAKE_MODELS[0],
+        temperature: float = 0.7,
+        config: FakeProviderConfig | None = None,
+    ):
+        """Initializes the FakeProvider instance.
+
+        Args:
+            api_key: Any non-empty value; it is never checked.
+            model: The model name to report, e.g., "fake-large".
+            temperature: The sampling temperature; accepted and ignored.
+            config: Latency and failure behaviour. Defaults to the environment.
+        """
+        super().__init__(api_key)
+        self.model = model
+        self.temperature = temperature
+        self.config = config or FakeProviderConfig.from_env()
+        self.embedding_model = (
+            "fake-embedding" if self.config.embedding_dimensions > 0 else None
+        )
+        self._random = random.Random(self.config.seed)
+        # Prefixes seen so far, to report prompt-cache reads like real providers.
+        self._cached_prefixes: Dict[str, None] = {}
+
+    def _latency(self) -> float:
+        """Samples one upstream latency in seconds."""
+        config = self.config
+        mean, spread = config.latency_ms, config.latency_spread_ms
+        if config.latency_distribution == "uniform":
+            value = self._random.uniform(mean - spread, mean + spread)
+        elif config.latency_distribution == "normal":
+            value = self._random.gauss(mean, spread)
+        elif config.latency_distribution == "lognormal" and mean > 0:
+            # Parameterized so that the samples have the given mean and spread.
+            sigma = math.sqrt(math.log(1 + (spread / mean) ** 2))
+            value = self._random.lognormvariate(math.log(mean) - sigma**2 / 2, sigma)
+        elif config.latency_distribution == "exponential" and mean > 0:
+            value = self._random.expovariate(1 / mean)
+        else:
+            value = mean
+        return max(0.0, value) / 1000
+
+    async def _upstream(self, operation: str):
+        """Waits one sampled latency, then fails if an error is injected."""
+        await asyncio.sleep(self._latency())
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            raise FakeProviderError(
+                self.config.error_status,
+                f"Injected {self.config.error_status} error for {operation}.",
+            )
+
+    def _words(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int | None,
+        prefix: PromptPrefix | None,
+    ) -> List[str]:
+        count = self.config.response_tokens
+        if max_tokens is not None:
+            count = min(count, max_tokens)
+        rng = random.Random(
+            _stable_seed(model, prefix.digest() if prefix else "", prompt)
+        )
+        return [rng.choice(VOCABULARY) for _ in range(count)]
+
+    def _usage(
+        self, prompt: str, output_tokens: int, prefix: PromptPrefix | None
+    ) -> dict:
+        input_tokens = estimate_tokens(prompt)
+        usage: dict = {"output_tokens": output_tokens}
+        if prefix is not None:
+            prefix_tokens = prefix.estimated_tokens()
+            input_tokens += prefix_tokens
+            digest = prefix.digest()
+            kind = "cache_read" if digest in self._cached_prefixes else "cache_creation"
+            self._cached_prefixes[digest] = None
+            if len(self._cached_prefixes) > FAKE_PREFIX_CACHE_SIZE:
+                del self._cached_prefixes[next(iter(self._cached_prefixes))]
+            usage["input_token_details"] = {kind: prefix_tokens}
+        usage["input_tokens"] = input_tokens
+        usage["total_tokens"] = input_tokens + output_tokens
+        return usage
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
+        """Returns a deterministic completion after a sampled latency.
+
+        Args:
+            prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Accepted for interface compatibility; ignored.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt, context blocks and earlier
+                turns; repeated prefixes are reported as prompt-cache reads.
+
+        Returns:
+            `response_tokens` words chosen from a fixed vocabulary by the
+            prompt and model.
+
+        Raises:
+            FakeProviderError: If an error is injected and retries run out.
+        """
+        model = model or self.model
+
+        async def call() -> str:
+            await self._upstream("generate_text")
+            words = self._words(prompt, model, max_tokens, prefix)
+            if self.config.tokens_per_second > 0:
+                await asyncio.sleep(len(words) / self.config.tokens_per_second)
+            record_usage(self.name, model, self._usage(prompt, len(words), prefix))
+            return " ".join(words)
+
+        return await self.rate_limiter.call(
+            call, tokens=estimate_tokens(prompt) + (max_tokens or 0)
+        )
+
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        """Streams the completion of `generate_text` one word at a time.
+
+        Args:
+            prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Accepted for interface compatibility; ignored.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt, context blocks and earlier
+                turns; repeated prefixes are reported as prompt-cache reads.
+
+        Yields:
+            One TextChunk per word, paced at `tokens_per_second`, then a
+            final chunk carrying usage metadata.
+        """
+        model = model or self.model
+
+        async def stream() -> AsyncIterator[TextChunk]:
+            await self._upstream("stream_text")
+            words = self._words(prompt, model, max_tokens, prefix)
+            delay = (
+                1 / self.config.tokens_per_second
+                if self.config.tokens_per_second > 0
+                else 0.0
+            )
+            for index, word in enumerate(words):
+                await asyncio.sleep(delay)
+                yield TextChunk(text=word if index == 0 else " " + word)
+            usage = self._usage(prompt, len(words), prefix)
+            record_usage(self.name, model, usage)
+            yield TextChunk(usage=usage)
+
+        async for chunk in self.rate_limiter.stream(
+            stream, tokens=estimate_tokens(prompt) + (max_tokens or 0)
+        ):
+            yield chunk
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """Returns a deterministic unit vector for `text`.
+
+        Args:
+            text: The input text to be converted into an embedding.
+        Returns:
+            A list of `embedding_dimensions` floats.
+        Raises:
+            NotImplementedError: If embeddings are disabled.
+        """
+        embeddings = await self._embed_batch([text])
+        return embeddings[0]
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embeds a sub-batch of texts after a single sampled latency.
+
+        Args:
+            texts: The input texts, at most `embedding_batch_size` of them.
+        Returns:
+            The embeddings, in the same order as `texts`.
+        """
+        if self.embedding_model is None:
+            raise NotImplementedError("Fake embeddings are disabled.")
+
+        async def call() -> List[List[float]]:
+            await self._upstream("generate_embedding")
+            embeddings = []
+            for text in texts:
+                rng = np.random.default_rng(_stable_seed(self.embedding_model, text))
+                vector = rng.standard_normal(self.config.embedding_dimensions)
+                embeddings.append((vector / np.linalg.norm(vector)).tolist())
+            return embeddings
+
+        return await self.rate_limiter.call(
+            call, tokens=sum(estimate_tokens(text) for text in texts)
+        )
+
+    async def get_embedding_model(self) -> str | None:
+        """Returns the name of the embedding model used.
+
+        Returns:
+            "fake-embedding", or None if embedding dimensions are set to 0.
+        """
+        return self.embedding_model
+
+    async def list_models(self) -> List[str]:
+        """Lists the fake models after a sampled latency.
+
+        Returns:
+            A list of model names as strings.
+        """
+
+        async def call() -> List[str]:
+            await self._upstream("list_models")
+            return list(FAKE_MODELS)
+
+        return await self.rate_limiter.call(call)
+
+    async def set_model(self, model: str):
+        """Sets the model to be used for text generation.
+
+        Args:
+            model: The model name as a string.
+        """
+        self.model = model
+
+    async def set_temperature(self, temperature: float):
+        """Sets the temperature for text generation.
+
+        Args:
+            temperature: The sampling temperature as a float.
+        """
+        self.temperature = temperature
+
+    async def validate_credentials(self) -> None:
+        """Always succeeds; the fake provider has no credentials to check."""
+        logger.info("Fake provider in use; responses are synthetic.")
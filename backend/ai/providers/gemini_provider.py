@@ -1,24 +1,71 @@
 import logging
-from typing import cast
+from typing import Any, AsyncIterator, cast
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.utils import convert_to_secret_str
-from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
 import google.genai as genai
+from google.genai import types
+import httpx
 
-from .base import LLMProvider
+from ..metrics import record_usage
+from .base import (
+    LLMProvider,
+    PromptPrefix,
+    TextChunk,
+    estimate_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
+EXCLUDED_MODEL_SUBSTRINGS = (
+    "preview",
+    "exp",
+    "lite",
+    "live",
+    "robotics",
+    "tts",
+    "image",
+    "audio",
+    "aqa",
+    "computer-use",
+)
+
+
+def _usage(metadata: types.GenerateContentResponseUsageMetadata | None) -> dict | None:
+    """Converts Gemini usage to langchain `usage_metadata` form."""
+    if metadata is None:
+        return None
+    input_tokens = metadata.prompt_token_count or 0
+    output_tokens = (metadata.candidates_token_count or 0) + (
+        metadata.thoughts_token_count or 0
+    )
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "input_token_details": {"cache_read": metadata.cached_content_token_count or 0},
+    }
+
 
 class GeminiProvider(LLMProvider):
-    """Concrete LLM provider for Google Gemini models using langchain-google-genai."""
+    """
+    Concrete LLM provider for Google Gemini models.
+
+    Chat, embedding, listing and validation all go through one `genai.Client`
+    on the provider's pooled HTTP client. ChatGoogleGenerativeAI always builds
+    its own client, so chat requests are made with the SDK directly rather
+    than through langchain.
+    """
+
+    name = "gemini"
+
+    embedding_batch_size = 100
+    embedding_batch_max_tokens = 20_000
 
     def __init__(
         self,
         api_key: str,
         model: str = "gemini-2.5-flash",
         temperature: float = 0.7,
+        http_client: httpx.AsyncClient | None = None,
     ):
         """Initializes the GeminiProvider instance.
 
@@ -26,57 +73,139 @@ class GeminiProvider(LLMProvider):
             api_key: The Google API key.
             model: The model name to use, e.g., "gemini-2.5-flash".
             temperature: The sampling temperature for the model.
+            http_client: Optional pooled HTTP client to share.
         """
-        super().__init__(api_key)
+        super().__init__(api_key, http_client=http_client)
         self.model = model
         self.temperature = temperature
         self.embedding_model = "models/gemini-embedding-001"
-        self._update_llm_instance()
-
-    def _update_llm_instance(self):
-        """Creates or recreates the internal ChatGoogleGenerativeAI LLM instance."""
-        self.llm = ChatGoogleGenerativeAI(
-            model=self.model,
-            temperature=self.temperature,
-            api_key=convert_to_secret_str(self.api_key),
-            convert_system_message_to_human=True,
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(httpx_async_client=self.http_client),
         )
 
-    async def generate_text(self, prompt: str) -> str:
+    def _request(
+        self,
+        prompt: str,
+        model: str | None,
+        temperature: float | None,
+        max_tokens: int | None,
+        prefix: PromptPrefix | None,
+    ) -> dict[str, Any]:
+        """Builds the generate_content request with the stable prefix first.
+
+        The system prompt and context blocks form the system instruction,
+        followed by the earlier turns and the user prompt, so Gemini's
+        implicit context caching can reuse everything before the prompt.
+        """
+        contents: list[types.Content] = []
+        system = None
+        if prefix is not None:
+            if prefix.blocks:
+                system = prefix.text()
+            for role, text in prefix.history:
+                contents.append(
+                    types.Content(
+                        role="user" if role == "user" else "model",
+                        parts=[types.Part(text=text)],
+                    )
+                )
+        contents.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
+        return {
+            "model": model or self.model,
+            "contents": contents,
+            "config": types.GenerateContentConfig(
+                system_instruction=system,
+                temperature=self.temperature if temperature is None else temperature,
+                max_output_tokens=max_tokens,
+            ),
+        }
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
         """Generates a text response for a given prompt using Gemini."""
         try:
-            response_base: BaseMessage = await self.llm.ainvoke(
-                [HumanMessage(content=prompt)]
+            request = self._request(prompt, model, temperature, max_tokens, prefix)
+            response = await self.rate_limiter.call(
+                lambda: self.client.aio.models.generate_content(**request),
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
             )
-            response: AIMessage = cast(AIMessage, response_base)
-
-            if isinstance(response.content, str):
-                return response.content
-            else:
-                raise TypeError(
-                    f"Expected a string response, but got {type(response.content)}"
-                )
+            record_usage(self.name, request["model"], _usage(response.usage_metadata))
+            return response.text or ""
         except Exception as e:
             logger.warning(f"Error generating Gemini text: {e}")
             raise
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        """
+        Streams a text response for a given prompt using Gemini, followed by
+        a chunk carrying the token usage of the whole response.
+        """
+        request = self._request(prompt, model, temperature, max_tokens, prefix)
+
+        async def open_stream() -> AsyncIterator[TextChunk]:
+            # Every chunk reports the usage so far; only the last one counts.
+            metadata = None
+            async for chunk in await self.client.aio.models.generate_content_stream(
+                **request
+            ):
+                metadata = chunk.usage_metadata or metadata
+                if chunk.text:
+                    yield TextChunk(text=chunk.text)
+            yield TextChunk(usage=_usage(metadata))
+
+        try:
+            async for chunk in self.rate_limiter.stream(
+                open_stream,
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
+            ):
+                record_usage(self.name, request["model"], chunk.usage)
+                yield chunk
+        except Exception as e:
+            logger.warning(f"Error streaming Gemini text: {e}")
+            raise
+
     async def generate_embedding(self, text: str) -> list[float]:
         """Generates a text embedding for the given input text using Google."""
+        embeddings = await self._embed_batch([text])
+        return embeddings[0]
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embeds a sub-batch of texts in one Google request."""
         try:
-            async with genai.Client(api_key=self.api_key).aio as aclient:
-                response = await aclient.models.embed_content(
+            response = await self.rate_limiter.call(
+                lambda: self.client.aio.models.embed_content(
                     model=self.embedding_model,
-                    contents=text,
-                )
+                    contents=texts,
+                ),
+                tokens=sum(estimate_tokens(text) for text in texts),
+            )
 
-                if (
-                    response.embeddings
-                    and len(response.embeddings) > 0
-                    and response.embeddings[0].values is not None
-                ):
-                    return response.embeddings[0].values
-                else:
-                    raise ValueError("No embeddings returned from the API.")
+            if (
+                response.embeddings
+                and len(response.embeddings) == len(texts)
+                and all(item.values is not None for item in response.embeddings)
+            ):
+                return [cast(list[float], item.values) for item in response.embeddings]
+            else:
+                raise ValueError("No embeddings returned from the API.")
         except Exception as e:
             logger.warning(f"Error generating Google embedding: {e}")
             raise
@@ -88,31 +217,19 @@ class GeminiProvider(LLMProvider):
     async def list_models(self) -> list[str]:
         """Lists available models from Google."""
         try:
-            excluded_substrings = [
-                "preview",
-                "exp",
-                "lite",
-                "live",
-                "robotics",
-                "tts",
-                "image",
-                "audio",
-                "aqa",
-                "computer-use",
-            ]
-
             filtered_models = []
 
-            async with genai.Client(api_key=self.api_key).aio as aclient:
-                async for model in await aclient.models.list():
-                    if (
-                        model.name
-                        and "gemini" in model.name
-                        and "embedding" not in model.name
-                        and not any(sub in model.name for sub in excluded_substrings)
-                    ):
-                        model_name = model.name.replace("models/", "")
-                        filtered_models.append(model_name)
+            async for model in await self.rate_limiter.call(
+                self.client.aio.models.list
+            ):
+                if (
+                    model.name
+                    and "gemini" in model.name
+                    and "embedding" not in model.name
+                    and not any(sub in model.name for sub in EXCLUDED_MODEL_SUBSTRINGS)
+                ):
+                    model_name = model.name.replace("models/", "")
+                    filtered_models.append(model_name)
 
             return sorted(filtered_models)
         except Exception as e:
@@ -122,12 +239,10 @@ class GeminiProvider(LLMProvider):
     async def set_model(self, model: str):
         """Sets the model to be used for text generation."""
         self.model = model
-        self._update_llm_instance()
 
     async def set_temperature(self, temperature: float):
         """Sets the temperature for text generation."""
         self.temperature = temperature
-        self._update_llm_instance()
 
     async def validate_credentials(self) -> None:
         """
@@ -137,7 +252,6 @@ class GeminiProvider(LLMProvider):
             Exception: If the API key is invalid or another API error occurs.
         """
         try:
-            async with genai.Client(api_key=self.api_key).aio as aclient:
-                await aclient.models.list()
+            await self.client.aio.models.list()
         except Exception as e:
             raise e
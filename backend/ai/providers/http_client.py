@@ -0,0 +1,39 @@
+import os
+
+import httpx
+
+
+def create_http_client(
+    max_connections: int | None = None,
+    max_keepalive_connections: int | None = None,
+    keepalive_expiry: float | None = None,
+    timeout: float | None = None,
+    connect_timeout: float | None = None,
+) -> httpx.AsyncClient:
+    """Creates the pooled async HTTP client shared by a provider's SDK clients.
+
+    Unset arguments fall back to the `LLM_HTTP_*` environment variables.
+
+    Args:
+        max_connections: Upper bound on open connections in the pool.
+        max_keepalive_connections: Idle connections kept open for reuse.
+        keepalive_expiry: Seconds an idle connection is kept alive.
+        timeout: Default read/write/pool timeout in seconds.
+        connect_timeout: Timeout for establishing a new connection in seconds.
+
+    Returns:
+        A configured `httpx.AsyncClient`.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections
+        or int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=max_keepalive_connections
+        or int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=keepalive_expiry
+        or float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeouts = httpx.Timeout(
+        timeout or float(os.getenv("LLM_HTTP_TIMEOUT", "60")),
+        connect=connect_timeout or float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10")),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeouts)
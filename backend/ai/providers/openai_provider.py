@@ -1,22 +1,56 @@
 import logging
-from typing import cast
+from typing import Any, AsyncIterator, cast
 import re
 
 from langchain_openai import ChatOpenAI
 from langchain_core.utils import convert_to_secret_str
-from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+)
+import httpx
 import openai
 
-from .base import LLMProvider
+from ..metrics import record_usage
+from .base import (
+    LLMProvider,
+    PromptPrefix,
+    TextChunk,
+    content_to_text,
+    estimate_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
+EXCLUDED_MODEL_SUBSTRINGS = (
+    "ft:",
+    "instruct",
+    "preview",
+    "vision",
+    "image",
+    "audio",
+    "embed",
+    "json",
+)
+DATED_MODEL_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
 
 class OpenAIProvider(LLMProvider):
     """Concrete LLM provider for OpenAI models using langchain-openai."""
 
+    name = "openai"
+
+    embedding_batch_size = 2048
+    embedding_batch_max_tokens = 250_000
+
     def __init__(
-        self, api_key: str, model: str = "gpt-5-nano", temperature: float = 0.7
+        self,
+        api_key: str,
+        model: str = "gpt-5-nano",
+        temperature: float = 0.7,
+        http_client: httpx.AsyncClient | None = None,
     ):
         """Initializes the OpenAIProvider instance.
 
@@ -24,26 +58,62 @@ class OpenAIProvider(LLMProvider):
             api_key: The OpenAI API key.
             model: The model name to use, e.g., "gpt-5-nano".
             temperature: The sampling temperature for the model.
+            http_client: Optional pooled HTTP client to share.
         """
-        super().__init__(api_key)
+        super().__init__(api_key, http_client=http_client)
         self.model = model
         self.temperature = temperature
         self.embedding_model = "text-embedding-3-small"
-        self._update_llm_instance()
+        # Retries are handled by the provider's rate limiter, not the SDK.
+        self.client = openai.AsyncOpenAI(
+            api_key=self.api_key, http_client=self.http_client, max_retries=0
+        )
 
-    def _update_llm_instance(self):
-        """Creates or recreates the internal ChatOpenAI LLM instance."""
-        self.llm = ChatOpenAI(
-            model=self.model,
-            temperature=self.temperature,
+    def _create_llm(self, model: str, temperature: float, **params: Any) -> ChatOpenAI:
+        """Builds a ChatOpenAI instance on the provider's shared HTTP client."""
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
             api_key=convert_to_secret_str(self.api_key),
+            http_async_client=self.http_client,
+            stream_usage=True,
+            max_retries=0,
+            **params,
         )
 
-    async def generate_text(self, prompt: str) -> str:
+    def _messages(self, prompt: str, prefix: PromptPrefix | None) -> list[BaseMessage]:
+        """Builds the chat messages with the stable prefix first.
+
+        The system prompt and context blocks form one system message, followed
+        by the earlier turns and the user prompt, so OpenAI's automatic prefix caching
+        can reuse everything before the prompt.
+        """
+        messages: list[BaseMessage] = []
+        if prefix is not None:
+            if prefix.blocks:
+                messages.append(SystemMessage(content=prefix.text()))
+            for role, text in prefix.history:
+                message_class = HumanMessage if role == "user" else AIMessage
+                messages.append(message_class(content=text))
+        messages.append(HumanMessage(content=prompt))
+        return messages
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> str:
         """Generates a text response for a given prompt using OpenAI.
 
         Args:
             prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Optional temperature override for this call.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt and context blocks sent first.
 
         Returns:
             The AI's text response as a string.
@@ -53,10 +123,16 @@ class OpenAIProvider(LLMProvider):
             # Any exceptions from the OpenAI API will also be propagated.
         """
         try:
-            response_base: BaseMessage = await self.llm.ainvoke(
-                [HumanMessage(content=prompt)]
+            llm = self._get_llm(model, temperature, max_tokens)
+            messages = self._messages(prompt, prefix)
+            response_base: BaseMessage = await self.rate_limiter.call(
+                lambda: llm.ainvoke(messages),
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
             )
             response: AIMessage = cast(AIMessage, response_base)
+            record_usage(self.name, model or self.model, response.usage_metadata)
 
             if isinstance(response.content, str):
                 return response.content
@@ -68,6 +144,43 @@ class OpenAIProvider(LLMProvider):
             logging.warning(f"Error generating OpenAI text: {e}")
             raise
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        prefix: PromptPrefix | None = None,
+    ) -> AsyncIterator[TextChunk]:
+        """Streams a text response for a given prompt using OpenAI.
+
+        Args:
+            prompt: The user's input prompt as a string.
+            model: Optional model override for this call.
+            temperature: Optional temperature override for this call.
+            max_tokens: Optional cap on generated tokens for this call.
+            prefix: Optional system prompt and context blocks sent first.
+
+        Yields:
+            TextChunk objects carrying text deltas and, on the chunks where
+            OpenAI reports it, token usage metadata.
+        """
+        try:
+            llm = self._get_llm(model, temperature, max_tokens)
+            messages = self._messages(prompt, prefix)
+            async for chunk in self.rate_limiter.stream(
+                lambda: llm.astream(messages),
+                tokens=estimate_tokens(prompt)
+                + (prefix.estimated_tokens() if prefix else 0)
+                + (max_tokens or 0),
+            ):
+                usage = dict(chunk.usage_metadata) if chunk.usage_metadata else None
+                record_usage(self.name, model or self.model, usage)
+                yield TextChunk(text=content_to_text(chunk.content), usage=usage)
+        except Exception as e:
+            logger.warning(f"Error streaming OpenAI text: {e}")
+            raise
+
     async def generate_embedding(self, text: str) -> list[float]:
         """Generates a text embedding for the given input text using OpenAI.
 
@@ -78,14 +191,29 @@ class OpenAIProvider(LLMProvider):
         Raises:
             Exception: If the embedding generation fails.
         """
-        try:
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-            text_to_embed = text.replace("\n", " ")
+        embeddings = await self._embed_batch([text])
+        return embeddings[0]
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embeds a sub-batch of texts in one OpenAI request.
 
-            response = await client.embeddings.create(
-                input=[text_to_embed], model=self.embedding_model
+        Args:
+            texts: The input texts, at most `embedding_batch_size` of them.
+        Returns:
+            The embeddings, in the same order as `texts`.
+        Raises:
+            Exception: If the embedding generation fails.
+        """
+        try:
+            response = await self.rate_limiter.call(
+                lambda: self.client.embeddings.create(
+                    input=[text.replace("\n", " ") for text in texts],
+                    model=self.embedding_model,
+                ),
+                tokens=sum(estimate_tokens(text) for text in texts),
             )
-            return response.data[0].embedding
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in ordered]
         except Exception as e:
             logger.warning(f"Error generating OpenAI embedding: {e}")
             raise
@@ -105,27 +233,14 @@ class OpenAIProvider(LLMProvider):
             A list of model names as strings.
         """
         try:
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-            models = await client.models.list()
-
-            excluded_substrings = [
-                "ft:",
-                "instruct",
-                "preview",
-                "vision",
-                "image",
-                "audio",
-                "embed",
-                "json",
-            ]
-            date_pattern = re.compile(r"\d{4}-\d{2}-\d{2}")
+            models = await self.rate_limiter.call(self.client.models.list)
 
             filtered_models = [
                 m.id
                 for m in models.data
                 if ("gpt-" in m.id or "o3" in m.id or "o4" in m.id)
-                and not any(sub in m.id for sub in excluded_substrings)
-                and not date_pattern.search(m.id)
+                and not any(sub in m.id for sub in EXCLUDED_MODEL_SUBSTRINGS)
+                and not DATED_MODEL_PATTERN.search(m.id)
             ]
 
             return sorted(filtered_models)
@@ -139,8 +254,9 @@ class OpenAIProvider(LLMProvider):
         Args:
             model: The model name as a string.
         """
+        # Build and pool the instance now so invalid settings fail here.
+        self._get_llm(model)
         self.model = model
-        self._update_llm_instance()
 
     async def set_temperature(self, temperature: float):
         """Sets the temperature for text generation.
@@ -148,8 +264,8 @@ class OpenAIProvider(LLMProvider):
         Args:
             temperature: The sampling temperature as a float.
         """
+        self._get_llm(temperature=temperature)
         self.temperature = temperature
-        self._update_llm_instance()
 
     async def validate_credentials(self) -> None:
         """
@@ -160,7 +276,6 @@ class OpenAIProvider(LLMProvider):
         """
 
         try:
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-            await client.models.retrieve("gpt-3.5-turbo")
+            await self.client.models.retrieve("gpt-3.5-turbo")
         except Exception as e:
             raise e
@@ -0,0 +1,326 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, List, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_ERROR_NAMES = ("APIConnectionError", "APITimeoutError")
+
+
+class ProviderUnavailableError(Exception):
+    """
+    Raised when a provider call still fails with a retryable error (rate
+    limit, overload, 5xx, network) after the limiter gave up retrying.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        status_code: int | None,
+        retry_after: float | None,
+        message: str,
+    ):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """Limits and retry policy for one provider. Zero disables a limit."""
+
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    max_concurrency: int = 16
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    retry_budget_ratio: float = 0.2
+    retry_budget_cap: float = 10.0
+
+    @classmethod
+    def from_env(cls, provider: str) -> "RateLimitConfig":
+        """Reads `<PROVIDER>_<SETTING>`, falling back to `LLM_<SETTING>`.
+
+        For example `OPENAI_RATE_LIMIT_RPM` overrides `LLM_RATE_LIMIT_RPM`.
+        """
+
+        def get(setting: str, default: float) -> float:
+            value = os.getenv(f"{provider.upper()}_{setting}") or os.getenv(
+                f"LLM_{setting}"
+            )
+            return float(value) if value else default
+
+        return cls(
+            requests_per_minute=get("RATE_LIMIT_RPM", cls.requests_per_minute),
+            tokens_per_minute=get("RATE_LIMIT_TPM", cls.tokens_per_minute),
+            max_concurrency=int(get("MAX_CONCURRENCY", cls.max_concurrency)),
+            max_retries=int(get("MAX_RETRIES", cls.max_retries)),
+            base_delay=get("RETRY_BASE_DELAY", cls.base_delay),
+            max_delay=get("RETRY_MAX_DELAY", cls.max_delay),
+            retry_budget_ratio=get("RETRY_BUDGET_RATIO", cls.retry_budget_ratio),
+        )
+
+
+def status_code_of(error: BaseException) -> int | None:
+    """Returns the HTTP status carried by an SDK error, if any."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    value = getattr(getattr(error, "response", None), "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after_of(error: BaseException) -> float | None:
+    """Returns the `Retry-After` delay in seconds carried by an SDK error."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for rate limits, overload, server errors and network failures."""
+    status = status_code_of(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return (
+        isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+        or type(error).__name__ in RETRYABLE_ERROR_NAMES
+    )
+
+
+class _TokenBucket:
+    """Classic token bucket refilled continuously at `rate` per second."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, scale: float):
+        now = time.monotonic()
+        self.level = min(
+            self.capacity, self.level + (now - self.updated) * self.rate * scale
+        )
+        self.updated = now
+
+    def reserve(self, amount: float, scale: float) -> float:
+        """Takes `amount` and returns how long the caller must wait for it."""
+        self._refill(scale)
+        # Oversized requests are clamped so they can ever be served at all.
+        self.level -= min(amount, self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / (self.rate * scale)
+
+
+class AdaptiveRateLimiter:
+    """
+    Client-side limiter for one provider.
+
+    Calls pass through token buckets on requests and estimated tokens per
+    minute and a concurrency cap. A 429 or `Retry-After` pauses new calls,
+    halves the concurrency cap and the bucket refill rate; successful calls
+    restore them gradually (AIMD). Retryable failures are retried with
+    capped exponential backoff and full jitter, as long as the retry budget
+    (a fraction of recent requests) allows it.
+    """
+
+    def __init__(self, provider: str, config: RateLimitConfig | None = None):
+        """Initializes the limiter.
+
+        Args:
+            provider: Provider name, used in logs and errors.
+            config: Limits and retry policy. Defaults to the environment.
+        """
+        self.provider = provider
+        self.config = config or RateLimitConfig.from_env(provider)
+        self._requests = (
+            _TokenBucket(self.config.requests_per_minute)
+            if self.config.requests_per_minute > 0
+            else None
+        )
+        self._tokens = (
+            _TokenBucket(self.config.tokens_per_minute)
+            if self.config.tokens_per_minute > 0
+            else None
+        )
+        self.concurrency_limit = float(self.config.max_concurrency)
+        self.rate_scale = 1.0
+        self._active = 0
+        self._waiters: List[asyncio.Future] = []
+        self._paused_until = 0.0
+        self._retry_budget = self.config.retry_budget_cap
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def call(self, fn: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Runs `fn()` under the limits, retrying retryable failures."""
+        attempt = 0
+        while True:
+            await self._acquire(tokens, attempt)
+            try:
+                result = await fn()
+            except Exception as e:
+                self._release()
+                attempt = await self._before_retry(e, attempt)
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release(success=True)
+            return result
+
+    async def stream(
+        self, fn: Callable[[], AsyncIterator[T]], tokens: int = 0
+    ) -> AsyncIterator[T]:
+        """Like `call` for streams; retries only until the first item arrives."""
+        attempt = 0
+        while True:
+            await self._acquire(tokens, attempt)
+            started = False
+            try:
+                async for item in fn():
+                    started = True
+                    yield item
+            except Exception as e:
+                self._release()
+                if started:
+                    raise
+                attempt = await self._before_retry(e, attempt)
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release(success=True)
+            return
+
+    async def _acquire(self, tokens: int, attempt: int):
+        if attempt == 0:
+            self._retry_budget = min(
+                self.config.retry_budget_cap,
+                self._retry_budget + self.config.retry_budget_ratio,
+            )
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self._active < max(1, int(self.concurrency_limit)):
+                self._active += 1
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.reserve(1, self.rate_scale)
+        if self._tokens is not None and tokens:
+            delay = max(delay, self._tokens.reserve(tokens, self.rate_scale))
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release()
+                raise
+
+    def _release(self, success: bool = False):
+        self._active -= 1
+        if success:
+            limit = self.config.max_concurrency
+            self.concurrency_limit = min(limit, self.concurrency_limit + 1 / limit)
+            self.rate_scale = min(1.0, self.rate_scale * 1.05)
+        # Wake every waiter; each re-checks the (possibly lowered) limit.
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _before_retry(self, error: Exception, attempt: int) -> int:
+        """Sleeps before the next attempt, or raises if it should not happen."""
+        if not is_retryable(error):
+            raise error
+
+        status = status_code_of(error)
+        retry_after = retry_after_of(error)
+        if status == 429 or retry_after is not None:
+            self.throttled += 1
+            self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+            self.rate_scale = max(0.1, self.rate_scale / 2)
+            if retry_after:
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + retry_after
+                )
+
+        if attempt >= self.config.max_retries or self._retry_budget < 1:
+            self.failures += 1
+            reason = (
+                "retries exhausted"
+                if attempt >= self.config.max_retries
+                else "retry budget exhausted"
+            )
+            raise ProviderUnavailableError(
+                self.provider,
+                status,
+                retry_after,
+                f"Provider '{self.provider}' unavailable ({reason}): {error}",
+            ) from error
+
+        self._retry_budget -= 1
+        self.retries += 1
+        backoff = min(self.config.max_delay, self.config.base_delay * 2**attempt)
+        delay = max(random.uniform(0, backoff), retry_after or 0.0)
+        logger.info(
+            f"Retrying {self.provider} call in {delay:.2f}s "
+            f"(attempt {attempt + 1}, status {status}): {error}"
+        )
+        await asyncio.sleep(delay)
+        return attempt + 1
+
+    def stats(self) -> dict:
+        """Returns the current limits and retry counters."""
+        return {
+            "active": self._active,
+            "concurrency_limit": int(self.concurrency_limit),
+            "rate_scale": self.rate_scale,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "failures": self.failures,
+            "retry_budget": self._retry_budget,
+        }
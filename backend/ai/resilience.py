@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Tuple,
+    TypeVar,
+)
+
+from .providers.base import GenerationConfig, TextChunk
+from .providers.rate_limiter import ProviderUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def parse_fallbacks(value: str) -> List[Tuple[str, str | None]]:
+    """Parses `provider[:model],provider[:model],...` into (provider, model) pairs."""
+    fallbacks = []
+    for item in value.split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider:
+            fallbacks.append((provider, model or None))
+    return fallbacks
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker over a rolling window of recent calls.
+
+    A call counts as bad if it failed or took longer than `slow_call_ms`. The
+    breaker opens once at least `min_calls` are recorded and the bad ratio
+    reaches `error_threshold`. After `cooldown` seconds it lets one probe call
+    through (half-open): success closes it again, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        error_threshold: float = 0.5,
+        slow_call_ms: float = 30_000,
+        cooldown: float = 30.0,
+    ):
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_call_ms = slow_call_ms
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """Returns True if a call may be sent, reserving the probe if half-open."""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record(self, ok: bool, latency_ms: float = 0.0):
+        """Records the outcome of an allowed call."""
+        bad = not ok or latency_ms > self.slow_call_ms
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if bad:
+                self._open()
+            else:
+                self.state = CLOSED
+                self._outcomes.clear()
+            return
+        self._outcomes.append(bad)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) / len(self._outcomes) >= self.error_threshold
+        ):
+            self._open()
+
+    def abandon(self):
+        """Releases the probe reservation of a call that was cancelled."""
+        self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+
+
+class ResilientRouter:
+    """
+    Sends a request to an ordered list of (provider, model) candidates.
+
+    Candidates whose circuit breaker is open are skipped, and a failed
+    attempt fails over to the next one. With hedging, if the running attempt
+    has not answered (or, for streams, produced its first token) within the
+    observed p95 for its provider and model, a backup is started on the next
+    healthy candidate; the first to answer wins and the other is cancelled.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        fallbacks: List[Tuple[str, str | None]] | None = None,
+        hedging: bool = True,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+        breaker_options: Dict[str, Any] | None = None,
+    ):
+        """Initializes the router.
+
+        Args:
+            enabled: Whether requests are routed through the router at all.
+            fallbacks: Ordered (provider, model) pairs tried after the
+                requested one; a None model means the provider's current model.
+            hedging: Whether backup requests are fired for slow attempts.
+            hedge_min_samples: Latency samples needed before hedging a target.
+            latency_window: Latency samples kept per target for the p95.
+            breaker_options: Keyword arguments for each CircuitBreaker.
+        """
+        self.enabled = enabled
+        self.fallbacks = fallbacks or []
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.breaker_options = breaker_options or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[tuple, Deque[float]] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self.breakers:
+            self.breakers[provider] = CircuitBreaker(**self.breaker_options)
+        return self.breakers[provider]
+
+    def p95(self, kind: str, config: GenerationConfig) -> float | None:
+        """Returns the p95 latency in seconds for a target, if enough samples exist."""
+        samples = self._latencies.get((kind, config.provider, config.model))
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    async def generate(
+        self,
+        configs: List[GenerationConfig],
+        call: Callable[[GenerationConfig], Awaitable[str]],
+    ) -> Tuple[GenerationConfig, str]:
+        """
+        Returns the first successful completion among the candidates, with
+        the candidate that produced it.
+        """
+        return await self._race("generate", configs, call)
+
+    async def stream(
+        self,
+        configs: List[GenerationConfig],
+        open_stream: Callable[[GenerationConfig], AsyncGenerator[TextChunk, None]],
+    ) -> AsyncIterator[TextChunk]:
+        """Streams from the first candidate to produce a token."""
+
+        async def first_token(
+            config: GenerationConfig,
+        ) -> Tuple[List[TextChunk], AsyncGenerator[TextChunk, None]]:
+            stream = open_stream(config)
+            head: List[TextChunk] = []
+            try:
+                async for chunk in stream:
+                    head.append(chunk)
+                    if chunk.text:
+                        break
+            except BaseException:
+                await stream.aclose()
+                raise
+            return head, stream
+
+        async def discard(
+            result: Tuple[List[TextChunk], AsyncGenerator[TextChunk, None]],
+        ):
+            await result[1].aclose()
+
+        config, (head, stream) = await self._race(
+            "stream", configs, first_token, discard
+        )
+        try:
+            for chunk in head:
+                yield chunk
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            self.breaker(config.provider).record(False)
+            raise
+        finally:
+            await stream.aclose()
+
+    async def _race(
+        self,
+        kind: str,
+        configs: List[GenerationConfig],
+        attempt: Callable[[GenerationConfig], Awaitable[T]],
+        discard: Callable[[T], Awaitable[None]] | None = None,
+    ) -> Tuple[GenerationConfig, T]:
+        queue = list(configs)
+        running: Dict[asyncio.Task, GenerationConfig] = {}
+        hedged = False
+        hedge = None
+        last_error: BaseException | None = None
+
+        def launch() -> asyncio.Task | None:
+            while queue:
+                config = queue.pop(0)
+                if self.breaker(config.provider).allow():
+                    task = asyncio.create_task(self._timed(kind, config, attempt))
+                    running[task] = config
+                    return task
+                logger.info(f"Skipping '{config.provider}': circuit open.")
+            return None
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if self.hedging and not hedged and queue and len(running) == 1:
+                    timeout = self.p95(kind, next(iter(running.values())))
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    hedge = launch()
+                    if hedge is not None:
+                        self.hedges += 1
+                    continue
+
+                winner = None
+                for task in done:
+                    config = running.pop(task)
+                    if task is hedge and task.exception() is None and winner is None:
+                        self.hedge_wins += 1
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning(
+                            f"{kind} via '{config.provider}' failed: {last_error}"
+                        )
+                    elif winner is None:
+                        winner = (config, task.result())
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    return winner
+                if not running and launch() is not None:
+                    self.failovers += 1
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                results = await asyncio.gather(*running, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+        raise ProviderUnavailableError(
+            configs[0].provider,
+            None,
+            None,
+            f"No provider could serve the request: {last_error or 'all circuits open'}",
+        ) from last_error
+
+    async def _timed(
+        self,
+        kind: str,
+        config: GenerationConfig,
+        attempt: Callable[[GenerationConfig], Awaitable[T]],
+    ) -> T:
+        breaker = self.breaker(config.provider)
+        probe = breaker.state == HALF_OPEN
+        started = time.perf_counter()
+        try:
+            result = await attempt(config)
+        except asyncio.CancelledError:
+            if probe:
+                breaker.abandon()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        elapsed = time.perf_counter() - started
+        breaker.record(True, elapsed * 1000)
+        key = (kind, config.provider, config.model)
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.latency_window)
+        samples.append(elapsed)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hedging and failover counters and each breaker's state."""
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "breakers": {
+                name: {"state": breaker.state, "opened": breaker.opened}
+                for name, breaker in self.breakers.items()
+            },
+        }
@@ -0,0 +1,93 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+def make_key(
+    provider: str,
+    model: str,
+    temperature: float,
+    prompt: str,
+    max_tokens: int | None = None,
+    prefix_digest: str = "",
+) -> str:
+    """Builds the cache key for a completion request."""
+    digest = hashlib.sha256()
+    for part in (
+        provider,
+        model,
+        repr(float(temperature)),
+        str(max_tokens),
+        prompt,
+        prefix_digest,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of completions for near-deterministic (low temperature) requests.
+
+    Only requests at or below `max_temperature` are eligible; entries expire
+    after `ttl` seconds and the least recently used entry is evicted once
+    `max_entries` is reached.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_temperature: float = 0.0,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+    ):
+        """Initializes the cache.
+
+        Args:
+            enabled: Whether completions are cached at all.
+            max_temperature: Highest temperature whose completions are cached.
+            ttl: Seconds a cached completion stays valid.
+            max_entries: Upper bound on cached completions.
+        """
+        self.enabled = enabled
+        self.max_temperature = max_temperature
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def applies_to(self, temperature: float) -> bool:
+        """Returns True if a request at `temperature` may be served from cache."""
+        return self.enabled and temperature <= self.max_temperature
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached completion for `key`, or None."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, text: str):
+        """Stores a completion, evicting the least recently used if full."""
+        self._entries[key] = (text, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the hit ratio."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+PartitionKey = Tuple[str, ...]
+
+
+def normalize(vector: List[float]) -> np.ndarray:
+    """Returns `vector` as a unit-length float32 array."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
+
+
+class _Partition:
+    """Fixed-capacity matrix of unit prompt vectors and their completions."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(capacity, 64), dim), dtype=np.float32)
+        self.last_used = np.zeros(self.vectors.shape[0], dtype=np.float64)
+        self.responses: List[str] = []
+
+    def search(self, query: np.ndarray) -> Tuple[int, float]:
+        count = len(self.responses)
+        if count == 0:
+            return -1, 0.0
+        scores = self.vectors[:count] @ query
+        index = int(np.argmax(scores))
+        return index, float(scores[index])
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def insert(self, vector: np.ndarray, response: str):
+        count = len(self.responses)
+        if count < self.capacity:
+            if count == self.vectors.shape[0]:
+                self._grow()
+            index = count
+            self.responses.append(response)
+        else:
+            index = int(np.argmin(self.last_used))
+            self.responses[index] = response
+        self.vectors[index] = vector
+        self.last_used[index] = time.monotonic()
+
+    def _grow(self):
+        rows = min(self.capacity, self.vectors.shape[0] * 2)
+        vectors = np.zeros((rows, self.vectors.shape[1]), dtype=np.float32)
+        vectors[: self.vectors.shape[0]] = self.vectors
+        last_used = np.zeros(rows, dtype=np.float64)
+        last_used[: self.last_used.shape[0]] = self.last_used
+        self.vectors, self.last_used = vectors, last_used
+
+
+class SemanticCache:
+    """
+    Completion cache that matches prompts by embedding similarity.
+
+    Prompt vectors are kept normalized in one float32 matrix per partition
+    (embedding model plus generation model and parameters), so a lookup is
+    a single matrix-vector product. Each partition holds at most `capacity`
+    entries and evicts the least recently used one when full. Requests with
+    their own parameters or prefixes each add a partition, so partitions are
+    also kept in LRU order and the least recently used ones are dropped
+    whole once all of them together hold more than `max_entries` entries.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        threshold: float = 0.95,
+        capacity: int = 2048,
+        max_entries: int = 8192,
+        embedding_provider: str | None = None,
+    ):
+        """Initializes the cache.
+
+        Args:
+            enabled: Whether semantic lookups are performed at all.
+            threshold: Minimum cosine similarity for a cached answer to be reused.
+            capacity: Maximum number of entries per partition.
+            max_entries: Maximum number of entries across all partitions.
+            embedding_provider: Provider used to embed prompts. Defaults to the
+                first provider that has an embedding model.
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self.capacity = min(capacity, max_entries)
+        self.max_entries = max_entries
+        self.embedding_provider = embedding_provider
+        self._partitions: OrderedDict[PartitionKey, _Partition] = OrderedDict()
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, partition: PartitionKey, vector: np.ndarray) -> str | None:
+        """Returns the completion of the most similar cached prompt, if close enough."""
+        store = self._partitions.get(partition)
+        if store is None:
+            self.misses += 1
+            return None
+        index, score = store.search(vector)
+        if index < 0 or score < self.threshold:
+            self.misses += 1
+            return None
+        store.last_used[index] = time.monotonic()
+        self._partitions.move_to_end(partition)
+        self.hits += 1
+        return store.responses[index]
+
+    def insert(self, partition: PartitionKey, vector: np.ndarray, response: str):
+        """Caches `response` for the prompt whose unit vector is `vector`."""
+        store = self._partitions.get(partition)
+        if store is None or store.vectors.shape[1] != vector.shape[0]:
+            if store is not None:
+                self._entries -= len(store)
+            store = _Partition(vector.shape[0], self.capacity)
+            self._partitions[partition] = store
+        self._partitions.move_to_end(partition)
+        before = len(store)
+        store.insert(vector, response)
+        self._entries += len(store) - before
+        while self._entries > self.max_entries:
+            _, evicted = self._partitions.popitem(last=False)
+            self._entries -= len(evicted)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters, the hit ratio and the number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._entries,
+            "partitions": len(self._partitions),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,32 @@
+"""Add generation job leases
+
+Revision ID: 0b4e8a6f2c19
+Revises: f2a7d9c3b815
+Create Date: 2026-10-17 19:48:12.660931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b4e8a6f2c19'
+down_revision: Union[str, Sequence[str], None] = 'f2a7d9c3b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('generation_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('generation_jobs', sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_generation_jobs_claimed_until'), 'generation_jobs', ['claimed_until'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_generation_jobs_claimed_until'), table_name='generation_jobs')
+    op.drop_column('generation_jobs', 'claimed_until')
+    op.drop_column('generation_jobs', 'attempts')
@@ -0,0 +1,31 @@
+"""Add settings version
+
+Revision ID: 5b2f0c7a91d3
+Revises: 984e3d9e48b0
+Create Date: 2026-10-17 10:12:04.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f0c7a91d3'
+down_revision: Union[str, Sequence[str], None] = '984e3d9e48b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'settings',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('settings', 'version')
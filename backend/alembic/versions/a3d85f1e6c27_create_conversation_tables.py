@@ -0,0 +1,56 @@
+"""Create conversation tables
+
+Revision ID: a3d85f1e6c27
+Revises: 7c4e1a9b2d60
+Create Date: 2026-10-17 12:41:09.274415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d85f1e6c27'
+down_revision: Union[str, Sequence[str], None] = '7c4e1a9b2d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('conversation_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('provider', sa.String(), nullable=True),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('temperature', sa.Float(), nullable=True),
+    sa.Column('system_prompt_id', sa.Integer(), nullable=True),
+    sa.Column('context_ids', sa.JSON(), nullable=False),
+    sa.Column('max_context_tokens', sa.Integer(), nullable=False),
+    sa.Column('prefix_tokens', sa.Integer(), nullable=False),
+    sa.Column('window_start', sa.Integer(), nullable=False),
+    sa.Column('window_tokens', sa.Integer(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('summary_tokens', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('conversation_messages',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('session_id', sa.String(length=32), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('tokens', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['conversation_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversation_messages_session_id'), 'conversation_messages', ['session_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_conversation_messages_session_id'), table_name='conversation_messages')
+    op.drop_table('conversation_messages')
+    op.drop_table('conversation_sessions')
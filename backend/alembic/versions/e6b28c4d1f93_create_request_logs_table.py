@@ -0,0 +1,46 @@
+"""Create request_logs table
+
+Revision ID: e6b28c4d1f93
+Revises: a3d85f1e6c27
+Create Date: 2026-10-17 15:02:37.518206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b28c4d1f93'
+down_revision: Union[str, Sequence[str], None] = 'a3d85f1e6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('request_logs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('endpoint', sa.String(), nullable=False),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt', sa.Text(), nullable=False),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('latency_ms', sa.Float(), nullable=False),
+    sa.Column('cached', sa.Boolean(), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=True),
+    sa.Column('output_tokens', sa.Integer(), nullable=True),
+    sa.Column('cache_read_tokens', sa.Integer(), nullable=True),
+    sa.Column('cache_creation_tokens', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_logs_created_at'), 'request_logs', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_request_logs_created_at'), table_name='request_logs')
+    op.drop_table('request_logs')
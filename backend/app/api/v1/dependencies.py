@@ -1,13 +1,90 @@
+import base64
+import hashlib
+import hmac
 import os
+import secrets
+import time
+
 import httpx
 from fastapi import Request, HTTPException, status
 
 HCAPTCHA_SECRET_KEY = os.getenv("HCAPTCHA_SECRET_KEY")
-HCAPTCHA_VERIFY_URL = "https://hcaptcha.com/siteverify"
+HCAPTCHA_VERIFY_URL = os.getenv(
+    "HCAPTCHA_VERIFY_URL", "https://hcaptcha.com/siteverify"
+)
+
+# When set, a successful captcha is exchanged for a short-lived signed session
+# token (returned in X-Captcha-Session) that later requests can present instead.
+# The token is bound to the client's User-Agent and, with
+# CAPTCHA_SESSION_BIND_IP, to its address. Only enable that when the server
+# sees real client addresses (e.g. uvicorn/gunicorn trusting the proxy's
+# forwarded headers); otherwise every client shares the proxy's address. A
+# token copied together with what it is bound to can be replayed until it
+# expires, so keep CAPTCHA_SESSION_TTL short.
+CAPTCHA_SESSION_SECRET = os.getenv("CAPTCHA_SESSION_SECRET")
+CAPTCHA_SESSION_TTL = int(os.getenv("CAPTCHA_SESSION_TTL", "600"))
+CAPTCHA_SESSION_BIND_IP = (
+    os.getenv("CAPTCHA_SESSION_BIND_IP", "false").lower() == "true"
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled client used for captcha verification."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(float(os.getenv("HCAPTCHA_TIMEOUT", "5"))),
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+    )
+
+
+def _sign(payload: str) -> str:
+    secret = (CAPTCHA_SESSION_SECRET or "").encode()
+    digest = hmac.new(secret, payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def _client_binding(request: Request) -> str:
+    parts = [request.headers.get("User-Agent", "")]
+    if CAPTCHA_SESSION_BIND_IP:
+        parts.append(request.client.host if request.client else "")
+    return "\x00".join(parts)
+
+
+def issue_session_token(request: Request) -> str:
+    """
+    Issue a signed captcha session token valid for CAPTCHA_SESSION_TTL seconds
+    and only for the client that made `request`.
+    """
+    payload = f"{int(time.time()) + CAPTCHA_SESSION_TTL}.{secrets.token_urlsafe(12)}"
+    return f"{payload}.{_sign(f'{payload}.{_client_binding(request)}')}"
+
+
+def is_valid_session_token(token: str, request: Request) -> bool:
+    """
+    Check a session token's signature, client and expiry without any network
+    call.
+    """
+    if not CAPTCHA_SESSION_SECRET:
+        return False
+    payload, _, signature = token.rpartition(".")
+    expires_at, _, _ = payload.partition(".")
+    if not expires_at.isdigit():
+        return False
+    expected = _sign(f"{payload}.{_client_binding(request)}")
+    if not hmac.compare_digest(expected, signature):
+        return False
+    return int(expires_at) > time.time()
 
 
 async def verify_captcha(request: Request):
-    """Verify hCaptcha token from the incoming request."""
+    """
+    Verify hCaptcha token, or a captcha session token, from the incoming request.
+    A newly issued session token is left on `request.state` for
+    CaptchaSessionMiddleware to return.
+    """
+    session_token = request.headers.get("X-Captcha-Session")
+    if session_token and is_valid_session_token(session_token, request):
+        return
+
     captcha_token = request.headers.get("X-Captcha-Token")
 
     if not HCAPTCHA_SECRET_KEY:
@@ -21,21 +98,52 @@ async def verify_captcha(request: Request):
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Captcha token is missing."
         )
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                HCAPTCHA_VERIFY_URL,
-                data={"secret": HCAPTCHA_SECRET_KEY, "response": captcha_token},
-            )
-            response.raise_for_status()
-            result = response.json()
-            if not result.get("success"):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Captcha verification failed. Please try again.",
-                )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Error during CAPTCHA verification: {str(e)}",
-            )
+    try:
+        verify_response = await request.app.state.captcha_client.post(
+            HCAPTCHA_VERIFY_URL,
+            data={"secret": HCAPTCHA_SECRET_KEY, "response": captcha_token},
+        )
+        verify_response.raise_for_status()
+        result = verify_response.json()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Error during CAPTCHA verification: {str(e)}",
+        )
+
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Captcha verification failed. Please try again.",
+        )
+
+    if CAPTCHA_SESSION_SECRET:
+        request.state.captcha_session = issue_session_token(request)
+
+
+class CaptchaSessionMiddleware:
+    """
+    ASGI middleware adding the session token issued by `verify_captcha` to
+    the response as X-Captcha-Session. Headers set on a dependency's Response
+    are dropped when an endpoint returns its own Response (streams, 204s),
+    so the token is added here instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                token = scope.get("state", {}).get("captcha_session")
+                if token:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-captcha-session", token.encode())
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from ai.llm_manager import LLMManager
+from ai.providers.base import GenerationConfig
+from app.api.v1.dependencies import verify_captcha
+from app.api.v1.schemas import (
+    CompareRequest,
+    CompareResponse,
+    CompareResult,
+    CompareTarget,
+)
+from app.api.v1.sse import SSE_HEADERS, format_sse, merge_usage
+from app.request_log import RequestLogWriter
+
+router = APIRouter()
+
+TokenCallback = Callable[[str], Awaitable[None]]
+
+
+def _resolve_targets(
+    llm_manager: LLMManager, targets: List[CompareTarget]
+) -> List[GenerationConfig]:
+    unknown = [t.provider for t in targets if t.provider not in llm_manager.providers]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown provider(s): {', '.join(unknown)}"
+        )
+    return [
+        llm_manager.resolve_config(
+            target.provider, target.model, target.temperature, target.max_tokens
+        )
+        for target in targets
+    ]
+
+
+async def _run_target(
+    llm_manager: LLMManager,
+    request_log: RequestLogWriter,
+    endpoint: str,
+    config: GenerationConfig,
+    prompt: str,
+    timeout: float,
+    on_token: TokenCallback | None = None,
+) -> CompareResult:
+    """
+    Streams one target to completion, recording latency, TTFT and usage, and
+    logs it to the request log under `endpoint`.
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    usage = None
+    parts: List[str] = []
+    error = None
+    timed_out = False
+
+    try:
+        async with asyncio.timeout(timeout):
+            # No failover here: each result must come from its own target.
+            async for chunk in llm_manager.stream_text(prompt, config, resilient=False):
+                usage = merge_usage(usage, chunk.usage)
+                if chunk.text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.text)
+                    if on_token is not None:
+                        await on_token(chunk.text)
+    except TimeoutError:
+        timed_out = True
+        error = f"Timed out after {timeout:g}s."
+    except asyncio.CancelledError:
+        request_log.record(
+            endpoint,
+            config,
+            prompt,
+            started,
+            response="".join(parts),
+            error="Client disconnected.",
+            usage=dict(usage) if usage else None,
+        )
+        raise
+    except Exception as e:
+        error = f"Error generating text: {e}"
+
+    request_log.record(
+        endpoint,
+        config,
+        prompt,
+        started,
+        response="".join(parts),
+        error=error,
+        usage=dict(usage) if usage else None,
+    )
+    return CompareResult(
+        provider=config.provider,
+        model=config.model,
+        temperature=config.temperature,
+        response="".join(parts) if parts else None,
+        error=error,
+        timed_out=timed_out,
+        time_to_first_token_ms=(
+            (first_token_at - started) * 1000 if first_token_at else None
+        ),
+        latency_ms=(time.perf_counter() - started) * 1000,
+        usage=dict(usage) if usage else None,
+    )
+
+
+@router.post(
+    "/compare",
+    response_model=CompareResponse,
+    summary="Send one prompt to several providers and models concurrently",
+    dependencies=[Depends(verify_captcha)],
+)
+async def compare(request: Request, payload: CompareRequest = Body(...)):
+    """
+    Runs the prompt against every target concurrently, each under its own
+    timeout, so the total time is that of the slowest target.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    request_log: RequestLogWriter = request.app.state.request_log
+    configs = _resolve_targets(llm_manager, payload.targets)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            _run_target(
+                llm_manager,
+                request_log,
+                "compare",
+                config,
+                payload.prompt,
+                payload.timeout,
+            )
+            for config in configs
+        )
+    )
+    return CompareResponse(
+        results=results, latency_ms=(time.perf_counter() - started) * 1000
+    )
+
+
+@router.post(
+    "/compare/stream",
+    summary="Stream a multi-target comparison as Server-Sent Events",
+    dependencies=[Depends(verify_captcha)],
+)
+async def compare_stream(request: Request, payload: CompareRequest = Body(...)):
+    """
+    Streams all targets concurrently as Server-Sent Events.
+
+    `token` events carry `{"target": index, "text": ...}` and are interleaved
+    in arrival order; each target ends with a `result` event holding its
+    CompareResult, and the stream ends with a `done` event.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    request_log: RequestLogWriter = request.app.state.request_log
+    configs = _resolve_targets(llm_manager, payload.targets)
+
+    async def event_stream():
+        started = time.perf_counter()
+        queue: asyncio.Queue[str] = asyncio.Queue()
+
+        async def run(index: int, config: GenerationConfig):
+            async def on_token(text: str):
+                await queue.put(format_sse("token", {"target": index, "text": text}))
+
+            result = await _run_target(
+                llm_manager,
+                request_log,
+                "compare_stream",
+                config,
+                payload.prompt,
+                payload.timeout,
+                on_token,
+            )
+            await queue.put(
+                format_sse("result", {"target": index, **result.model_dump()})
+            )
+
+        tasks = [
+            asyncio.create_task(run(index, config))
+            for index, config in enumerate(configs)
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event.startswith("event: result"):
+                    remaining -= 1
+                yield event
+            yield format_sse(
+                "done", {"latency_ms": (time.perf_counter() - started) * 1000}
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
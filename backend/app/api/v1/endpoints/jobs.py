@@ -0,0 +1,154 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ai.llm_manager import LLMManager
+from app import crud, models
+from app.api.v1.dependencies import verify_captcha
+from app.api.v1.schemas import JobCreateRequest, JobResponse
+from app.api.v1.sse import SSE_HEADERS, format_sse
+from app.database import get_db
+from app.jobs import FINISHED_STATUSES, JobQueueFullError, JobRunner
+from app.prompt_library import PromptLibrary
+
+router = APIRouter()
+
+# Longest a single long-poll or a quiet stream waits before answering.
+MAX_WAIT_SECONDS = 60
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _job_response(job: models.GenerationJob) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        priority=job.priority,
+        provider=job.provider,
+        model=job.model,
+        response=job.response,
+        error=job.error,
+        usage=job.usage,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _not_found(job_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+
+
+@router.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Run a generation in the background",
+    dependencies=[Depends(verify_captcha)],
+)
+async def create_job(
+    request: Request,
+    payload: JobCreateRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Accepts the same parameters as `/test` and returns a job ID right away,
+    so long completions are not cut off by request timeouts. Fetch the result
+    with `GET /jobs/{id}`. Returns 503 when too many jobs are waiting.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    library: PromptLibrary = request.app.state.prompt_library
+    runner: JobRunner = request.app.state.job_runner
+
+    if runner.full():
+        raise HTTPException(
+            status_code=503,
+            detail="The job queue is full; try again later.",
+            headers={"Retry-After": "5"},
+        )
+    # Reject bad parameters now rather than as a failed job.
+    try:
+        await library.resolve(db, payload.system_prompt_id, payload.context_ids)
+        llm_manager.resolve_config(payload.provider, payload.model)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = await crud.create_job(
+        db, claimed_until=runner.lease_until(), **payload.model_dump()
+    )
+    try:
+        runner.submit(job.id, job.priority)
+    except JobQueueFullError as e:
+        await crud.update_job(db, job.id, "queued", status="failed", error=str(e))
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+    return _job_response(job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="Get a background generation",
+)
+async def get_job(
+    request: Request,
+    job_id: str,
+    wait: float = Query(
+        0,
+        ge=0,
+        le=MAX_WAIT_SECONDS,
+        description="Seconds to wait for the job to finish before answering "
+        "(long polling). 0 answers right away.",
+    ),
+):
+    """
+    Returns the job's status and, once it has succeeded or failed, its
+    result. With `wait`, holds the request until the job finishes or the
+    wait runs out, whichever comes first.
+    """
+    runner: JobRunner = request.app.state.job_runner
+    job = await runner.wait(job_id, wait)
+    if job is None:
+        raise _not_found(job_id)
+    return _job_response(job)
+
+
+@router.get(
+    "/jobs/{job_id}/stream",
+    summary="Stream a background generation's status as Server-Sent Events",
+)
+async def stream_job(request: Request, job_id: str):
+    """
+    Emits a `status` event with the job whenever its status changes, ending
+    with the finished job. Comment lines are sent while nothing changes so
+    that proxies keep the connection open.
+    """
+    runner: JobRunner = request.app.state.job_runner
+    job = await runner.wait(job_id, 0)
+    if job is None:
+        raise _not_found(job_id)
+
+    async def event_stream():
+        current = job
+        yield format_sse("status", _job_response(current).model_dump(mode="json"))
+        while current.status not in FINISHED_STATUSES:
+            seen = current.status
+            current = await runner.wait(
+                job_id,
+                STREAM_KEEPALIVE_SECONDS,
+                statuses=[status for status in models.JOB_STATUSES if status != seen],
+            )
+            if current is None:
+                return
+            if current.status == seen:
+                yield ": keepalive\n\n"
+            else:
+                yield format_sse(
+                    "status", _job_response(current).model_dump(mode="json")
+                )
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
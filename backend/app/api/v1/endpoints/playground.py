@@ -1,18 +1,32 @@
-from fastapi import APIRouter, Depends, Body, HTTPException, Request
+import time
+
+from fastapi import APIRouter, Depends, Body, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from ai.llm_manager import LLMManager
+from ai.metrics import track_usage
+from ai.providers.base import GenerationConfig
+from ai.providers.rate_limiter import ProviderUnavailableError
 from app.api.v1.dependencies import verify_captcha
+from app.api.v1.errors import provider_unavailable
+from app.api.v1.sse import SSE_HEADERS, format_sse, merge_usage
 from app.api.v1.schemas import (
     TestPromptRequest,
     TestPromptResponse,
+    StreamSummary,
     EmbeddingRequest,
     EmbeddingResponse,
+    BatchEmbeddingRequest,
+    BatchEmbeddingResponse,
     ModelListResponse,
     SettingsResponse,
     UpdateSettingsRequest,
 )
 from app.database import get_db
 from app import crud
+from app.models import SettingsSnapshot
+from app.prompt_library import PromptLibrary
+from app.request_log import RequestLogWriter
 
 router = APIRouter()
 
@@ -32,8 +46,7 @@ async def get_models_for_provider(request: Request, provider_name: str):
         )
 
     try:
-        provider = llm_manager.providers[provider_name]
-        available_models = await provider.list_models()
+        available_models = await llm_manager.list_models(provider_name)
         return ModelListResponse(models=available_models)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving models: {e}")
@@ -42,25 +55,21 @@ async def get_models_for_provider(request: Request, provider_name: str):
 @router.get(
     "/settings", response_model=SettingsResponse, summary="Get current LLM settings"
 )
-async def get_settings(request: Request, db: AsyncSession = Depends(get_db)):
-    """Retrieves the current LLM settings from the database."""
+async def get_settings(request: Request):
+    """Returns the current LLM settings from the in-process settings snapshot."""
     llm_manager: LLMManager = request.app.state.llm_manager
-
-    db_settings = await crud.get_settings(db)
-    if not db_settings:
-        raise HTTPException(
-            status_code=500, detail="Settings not found in the database."
-        )
+    snapshot: SettingsSnapshot = request.app.state.settings_snapshot
 
     provider = llm_manager.get_current_provider()
 
-    available_models = await provider.list_models()
+    available_models = await llm_manager.list_models()
 
     return SettingsResponse(
-        provider=db_settings.provider,
-        model=db_settings.model,
+        provider=snapshot.provider,
+        model=snapshot.model,
         embedding_model=await provider.get_embedding_model(),
-        temperature=db_settings.temperature,
+        temperature=snapshot.temperature,
+        version=snapshot.version,
         available_models=available_models,
         available_providers=list(llm_manager.providers.keys()),
     )
@@ -76,56 +85,194 @@ async def update_settings(
     payload: UpdateSettingsRequest = Body(...),
     db: AsyncSession = Depends(get_db),
 ):
-    """Updates the LLM settings in the database and synchronizes the LLM manager."""
+    """
+    Updates the LLM settings and synchronizes the LLM manager. The new values
+    are applied to the provider first, which builds its chat model, so invalid
+    settings are rejected with 400 before they are stored and picked up by
+    the other worker processes.
+    """
     llm_manager: LLMManager = request.app.state.llm_manager
 
+    provider_name = payload.provider or llm_manager.current_provider
+    if provider_name not in llm_manager.providers:
+        raise HTTPException(
+            status_code=400, detail=f"Provider '{provider_name}' is not available."
+        )
+    provider = llm_manager.providers[provider_name]
+    previous = (provider.model, provider.temperature)
+    try:
+        if payload.temperature is not None:
+            await provider.set_temperature(payload.temperature)
+        if payload.model is not None:
+            await provider.set_model(payload.model)
+    except ValueError as e:
+        provider.model, provider.temperature = previous
+        raise HTTPException(status_code=400, detail=f"Invalid settings: {e}")
+
     settings_data = payload.model_dump(exclude_unset=True)
-    updated_db_settings = await crud.update_settings(db, settings_data)
+    snapshot = await crud.update_settings(db, settings_data)
 
-    if not updated_db_settings:
+    if not snapshot:
+        provider.model, provider.temperature = previous
         raise HTTPException(
             status_code=500, detail="Failed to update settings in the database."
         )
 
-    if payload.provider is not None:
-        llm_manager.set_provider(payload.provider)
-
-    provider = llm_manager.get_current_provider()
-
-    if payload.temperature is not None:
-        await provider.set_temperature(payload.temperature)
+    llm_manager.set_provider(provider_name)
+    request.app.state.settings_snapshot = snapshot
 
-    if payload.model is not None:
-        await provider.set_model(payload.model)
-
-    available_models = await provider.list_models()
+    available_models = await llm_manager.list_models()
     return SettingsResponse(
-        provider=updated_db_settings.provider,
-        model=updated_db_settings.model,
+        provider=snapshot.provider,
+        model=snapshot.model,
         embedding_model=await provider.get_embedding_model(),
-        temperature=updated_db_settings.temperature,
+        temperature=snapshot.temperature,
+        version=snapshot.version,
         available_models=available_models,
         available_providers=list(llm_manager.providers.keys()),
     )
 
 
+async def _resolve_config(
+    request: Request, payload: TestPromptRequest, db: AsyncSession
+) -> GenerationConfig:
+    llm_manager: LLMManager = request.app.state.llm_manager
+    library: PromptLibrary = request.app.state.prompt_library
+    try:
+        prefix = await library.resolve(
+            db, payload.system_prompt_id, payload.context_ids
+        )
+        # Return the connection to the pool before the (long) generation.
+        await db.close()
+        return llm_manager.resolve_config(
+            payload.provider,
+            payload.model,
+            payload.temperature,
+            payload.max_tokens,
+            prefix,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post(
     "/test",
     response_model=TestPromptResponse,
     summary="Test LLM with a prompt",
     dependencies=[Depends(verify_captcha)],
 )
-async def test_prompt(request: Request, payload: TestPromptRequest = Body(...)):
-    """Sends a test prompt to the current LLM provider and returns the response."""
+async def test_prompt(
+    request: Request,
+    response: Response,
+    payload: TestPromptRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Sends a test prompt to the current LLM provider, or to the provider, model,
+    temperature and max_tokens given in the request, and returns the response.
+    A stored system prompt and context blocks, given by ID, are sent ahead of
+    the prompt so that providers can serve them from their prompt cache.
+    The `X-Cache` header reports whether it was served from the response cache.
+    """
     llm_manager: LLMManager = request.app.state.llm_manager
+    request_log: RequestLogWriter = request.app.state.request_log
+    config = await _resolve_config(request, payload, db)
 
-    provider = llm_manager.get_current_provider()
+    started = time.perf_counter()
     try:
-        response_text = await provider.generate_text(payload.prompt)
-        return TestPromptResponse(response=response_text)
+        with track_usage() as usage:
+            generation = await llm_manager.generate_text(payload.prompt, config)
+    except ProviderUnavailableError as e:
+        request_log.record("test_prompt", config, payload.prompt, started, error=str(e))
+        raise provider_unavailable(e)
     except Exception as e:
+        request_log.record("test_prompt", config, payload.prompt, started, error=str(e))
         raise HTTPException(status_code=500, detail=f"Error generating text: {e}")
 
+    request_log.record(
+        "test_prompt",
+        generation.config or config,
+        payload.prompt,
+        started,
+        response=generation.text,
+        usage=usage,
+        cached=generation.cached,
+    )
+    response.headers["X-Cache"] = "HIT" if generation.cached else "MISS"
+    return TestPromptResponse(response=generation.text, usage=usage or None)
+
+
+@router.post(
+    "/test/stream",
+    summary="Stream an LLM response as Server-Sent Events",
+    dependencies=[Depends(verify_captcha)],
+)
+async def test_prompt_stream(
+    request: Request,
+    payload: TestPromptRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streams the response as Server-Sent Events, honouring the same per-request
+    overrides as `/test`.
+
+    Emits a `token` event per text chunk, followed by a `done` event with
+    time-to-first-token, total latency and usage metadata, or an `error`
+    event if generation fails midway.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    request_log: RequestLogWriter = request.app.state.request_log
+    config = await _resolve_config(request, payload, db)
+
+    async def event_stream():
+        started = time.perf_counter()
+        first_token_at = None
+        usage = None
+        parts = []
+        # The config that actually serves the stream, after any failover.
+        served = config
+        # Cleared when the stream completes; kept if the client goes away.
+        error = "Client disconnected."
+        try:
+            async for chunk in llm_manager.stream_text(payload.prompt, config):
+                served = chunk.config or served
+                usage = merge_usage(usage, chunk.usage)
+                if chunk.text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.text)
+                    yield format_sse("token", {"text": chunk.text})
+            error = None
+        except Exception as e:
+            error = str(e)
+            yield format_sse("error", {"detail": f"Error generating text: {e}"})
+            return
+        finally:
+            request_log.record(
+                "test_prompt_stream",
+                served,
+                payload.prompt,
+                started,
+                response="".join(parts),
+                error=error,
+                usage=dict(usage) if usage else None,
+            )
+
+        summary = StreamSummary(
+            time_to_first_token_ms=(
+                (first_token_at - started) * 1000 if first_token_at else None
+            ),
+            latency_ms=(time.perf_counter() - started) * 1000,
+            usage=dict(usage) if usage else None,
+        )
+        yield format_sse("done", summary.model_dump())
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
 
 @router.post(
     "/embed",
@@ -144,7 +291,7 @@ async def create_embedding(request: Request, payload: EmbeddingRequest = Body(..
     provider = llm_manager.get_current_provider()
     try:
         provider = llm_manager.get_current_provider()
-        embedding = await provider.generate_embedding(payload.text)
+        embedding = await llm_manager.generate_embedding(payload.text)
         embedding_model = await provider.get_embedding_model()
 
         if embedding_model is None:
@@ -159,5 +306,44 @@ async def create_embedding(request: Request, payload: EmbeddingRequest = Body(..
             status_code=400,
             detail=f"Provider '{llm_manager.current_provider}' does not support embeddings.",
         )
+    except ProviderUnavailableError as e:
+        raise provider_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating embedding: {e}")
+
+
+@router.post(
+    "/embed/batch",
+    response_model=BatchEmbeddingResponse,
+    summary="Generate embeddings for many texts",
+    dependencies=[Depends(verify_captcha)],
+)
+async def create_embeddings(
+    request: Request, payload: BatchEmbeddingRequest = Body(...)
+):
+    """
+    Generates full embedding vectors for a list of texts, in input order.
+    Texts are sent to the provider in native batches with bounded concurrency.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+
+    provider = llm_manager.get_current_provider()
+    embedding_model = await provider.get_embedding_model()
+    if embedding_model is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provider '{llm_manager.current_provider}' does not support embeddings.",
+        )
+
+    try:
+        embeddings = await llm_manager.generate_embeddings(payload.texts)
+        return BatchEmbeddingResponse(model=embedding_model, embeddings=embeddings)
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provider '{llm_manager.current_provider}' does not support embeddings.",
+        )
+    except ProviderUnavailableError as e:
+        raise provider_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating embeddings: {e}")
@@ -0,0 +1,104 @@
+from dataclasses import asdict
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.v1.dependencies import verify_captcha
+from app.api.v1.schemas import (
+    PromptBlockCreateRequest,
+    PromptBlockListResponse,
+    PromptBlockResponse,
+)
+from app.database import get_db
+from app.prompt_library import PromptLibrary
+
+router = APIRouter()
+
+
+@router.post(
+    "/prompts",
+    response_model=PromptBlockResponse,
+    status_code=201,
+    summary="Store a system prompt or context block",
+    dependencies=[Depends(verify_captcha)],
+)
+async def create_prompt_block(
+    request: Request,
+    payload: PromptBlockCreateRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stores a block that `/test` requests can reference by ID. Blocks cannot be
+    edited; store a new one to change the content, so that prefixes already
+    cached by providers stay valid.
+    """
+    library: PromptLibrary = request.app.state.prompt_library
+    block = await crud.create_prompt_block(
+        db, payload.kind, payload.name, payload.content
+    )
+    library.remember(block)
+    return PromptBlockResponse(**asdict(block))
+
+
+@router.get(
+    "/prompts",
+    response_model=PromptBlockListResponse,
+    summary="List stored prompt blocks",
+)
+async def list_prompt_blocks(
+    kind: Literal["system", "context"] | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Lists stored prompt blocks, optionally only system prompts or context."""
+    blocks = await crud.list_prompt_blocks(db, kind)
+    return PromptBlockListResponse(
+        blocks=[PromptBlockResponse(**asdict(block)) for block in blocks]
+    )
+
+
+@router.get(
+    "/prompts/{block_id}",
+    response_model=PromptBlockResponse,
+    summary="Get a stored prompt block",
+)
+async def get_prompt_block(
+    request: Request, block_id: int, db: AsyncSession = Depends(get_db)
+):
+    """Returns one stored prompt block."""
+    library: PromptLibrary = request.app.state.prompt_library
+    blocks = await library.get_many(db, [block_id])
+    if block_id not in blocks:
+        raise HTTPException(
+            status_code=404, detail=f"Prompt block {block_id} not found."
+        )
+    return PromptBlockResponse(**asdict(blocks[block_id]))
+
+
+@router.delete(
+    "/prompts/{block_id}",
+    status_code=204,
+    summary="Delete a stored prompt block",
+    dependencies=[Depends(verify_captcha)],
+)
+async def delete_prompt_block(
+    request: Request, block_id: int, db: AsyncSession = Depends(get_db)
+):
+    """
+    Deletes a stored prompt block. Returns 409 while a conversation session,
+    or a job that has not finished, references it.
+    """
+    library: PromptLibrary = request.app.state.prompt_library
+    if await crud.prompt_block_in_use(db, block_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Prompt block {block_id} is used by a session or an "
+            "unfinished job.",
+        )
+    library.forget(block_id)
+    if not await crud.delete_prompt_block(db, block_id):
+        raise HTTPException(
+            status_code=404, detail=f"Prompt block {block_id} not found."
+        )
+    return Response(status_code=204)
@@ -0,0 +1,266 @@
+import logging
+import time
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ai.llm_manager import LLMManager
+from ai.metrics import track_usage
+from ai.providers.base import PromptPrefix, estimate_tokens
+from ai.providers.rate_limiter import ProviderUnavailableError
+from app import crud, models
+from app.api.v1.dependencies import verify_captcha
+from app.api.v1.errors import provider_unavailable
+from app.api.v1.schemas import (
+    SessionCreateRequest,
+    SessionMessage,
+    SessionMessageRequest,
+    SessionMessageResponse,
+    SessionResponse,
+)
+from app.conversations import ContextBuilder, build_prefix
+from app.database import get_db
+from app.prompt_library import PromptLibrary
+from app.request_log import RequestLogWriter
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _resolve_prefix(
+    request: Request,
+    db: AsyncSession,
+    system_prompt_id: int | None,
+    context_ids: list[int],
+) -> PromptPrefix | None:
+    library: PromptLibrary = request.app.state.prompt_library
+    try:
+        return await library.resolve(db, system_prompt_id, context_ids)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _get_session(db: AsyncSession, session_id: str) -> models.ConversationSession:
+    session = await crud.get_session(db, session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail=f"Session '{session_id}' not found."
+        )
+    return session
+
+
+def _session_response(
+    session: models.ConversationSession,
+    messages: list[models.ConversationMessage] | None = None,
+) -> SessionResponse:
+    return SessionResponse(
+        id=session.id,
+        provider=session.provider,
+        model=session.model,
+        temperature=session.temperature,
+        system_prompt_id=session.system_prompt_id,
+        context_ids=session.context_ids,
+        max_context_tokens=session.max_context_tokens,
+        context_tokens=session.prefix_tokens
+        + session.summary_tokens
+        + session.window_tokens,
+        summary=session.summary,
+        messages=[
+            SessionMessage(
+                id=message.id,
+                role=message.role,
+                content=message.content,
+                tokens=message.tokens,
+                in_context=message.id >= session.window_start,
+            )
+            for message in messages or []
+        ],
+    )
+
+
+@router.post(
+    "/sessions",
+    response_model=SessionResponse,
+    status_code=201,
+    summary="Start a conversation session",
+    dependencies=[Depends(verify_captcha)],
+)
+async def create_session(
+    request: Request,
+    payload: SessionCreateRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Starts a server-side conversation. Later turns send only the new prompt;
+    the server keeps the history and fits it into `max_context_tokens`.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    builder: ContextBuilder = request.app.state.context_builder
+
+    try:
+        llm_manager.resolve_config(payload.provider, payload.model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    prefix = await _resolve_prefix(
+        request, db, payload.system_prompt_id, payload.context_ids
+    )
+
+    session = await crud.create_session(
+        db,
+        provider=payload.provider,
+        model=payload.model,
+        temperature=payload.temperature,
+        system_prompt_id=payload.system_prompt_id,
+        context_ids=payload.context_ids,
+        max_context_tokens=payload.max_context_tokens or builder.default_max_tokens,
+        prefix_tokens=prefix.estimated_tokens() if prefix else 0,
+    )
+    return _session_response(session)
+
+
+@router.get(
+    "/sessions/{session_id}",
+    response_model=SessionResponse,
+    summary="Get a conversation session and its turns",
+)
+async def get_session(session_id: str, db: AsyncSession = Depends(get_db)):
+    """Returns the session, its running summary and every stored turn."""
+    session = await _get_session(db, session_id)
+    messages = await crud.get_session_messages(db, session_id)
+    return _session_response(session, messages)
+
+
+@router.post(
+    "/sessions/{session_id}/messages",
+    response_model=SessionMessageResponse,
+    summary="Send the next prompt of a conversation",
+    dependencies=[Depends(verify_captcha)],
+)
+async def add_session_message(
+    request: Request,
+    session_id: str,
+    payload: SessionMessageRequest = Body(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Appends a user turn, answers it with the session's history as context
+    and stores the answer. When the history outgrows the session's budget,
+    the oldest exchanges are folded into the running summary (or trimmed).
+    Concurrent turns on one session are rejected with 409.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    builder: ContextBuilder = request.app.state.context_builder
+    request_log: RequestLogWriter = request.app.state.request_log
+
+    session = await _get_session(db, session_id)
+    base_prefix = await _resolve_prefix(
+        request, db, session.system_prompt_id, session.context_ids
+    )
+    messages = await crud.get_session_messages(db, session_id, session.window_start)
+    # Return the connection to the pool before the (long) generation.
+    await db.close()
+
+    try:
+        config = llm_manager.resolve_config(
+            session.provider, session.model, session.temperature, payload.max_tokens
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    prompt_tokens = estimate_tokens(payload.prompt)
+    plan = builder.plan(session, messages, prompt_tokens, payload.max_tokens)
+
+    summary, summary_tokens = session.summary, session.summary_tokens
+    summarized = False
+    if plan.dropped and builder.summarize:
+        try:
+            summary = await builder.fold(llm_manager, config, summary, plan.dropped)
+            summary_tokens = estimate_tokens(summary)
+            summarized = True
+        except Exception as e:
+            logger.warning(f"Summarizing session {session_id} failed, trimming: {e}")
+
+    prefix = build_prefix(base_prefix, summary, plan.history)
+    config = llm_manager.resolve_config(
+        config.provider, config.model, config.temperature, config.max_tokens, prefix
+    )
+
+    started = time.perf_counter()
+    try:
+        with track_usage() as usage:
+            generation = await llm_manager.generate_text(payload.prompt, config)
+    except ProviderUnavailableError as e:
+        request_log.record(
+            "add_session_message", config, payload.prompt, started, error=str(e)
+        )
+        raise provider_unavailable(e)
+    except Exception as e:
+        request_log.record(
+            "add_session_message", config, payload.prompt, started, error=str(e)
+        )
+        raise HTTPException(status_code=500, detail=f"Error generating text: {e}")
+    request_log.record(
+        "add_session_message",
+        generation.config or config,
+        payload.prompt,
+        started,
+        response=generation.text,
+        usage=usage,
+        cached=generation.cached,
+    )
+
+    response_tokens = estimate_tokens(generation.text)
+    if plan.history:
+        window_start = plan.history[0].id
+    elif messages:
+        window_start = messages[-1].id + 1
+    else:
+        window_start = session.window_start
+    window_tokens = plan.window_tokens + prompt_tokens + response_tokens
+
+    appended = await crud.append_session_turn(
+        db,
+        session_id,
+        session.version,
+        [
+            ("user", payload.prompt, prompt_tokens),
+            ("assistant", generation.text, response_tokens),
+        ],
+        {
+            "window_start": window_start,
+            "window_tokens": window_tokens,
+            "summary": summary,
+            "summary_tokens": summary_tokens,
+        },
+    )
+    if not appended:
+        raise HTTPException(
+            status_code=409,
+            detail="The session changed during this request; send the turn again.",
+        )
+
+    return SessionMessageResponse(
+        response=generation.text,
+        usage=usage or None,
+        context_tokens=session.prefix_tokens + summary_tokens + window_tokens,
+        dropped_messages=len(plan.dropped),
+        summarized=summarized,
+    )
+
+
+@router.delete(
+    "/sessions/{session_id}",
+    status_code=204,
+    summary="Delete a conversation session",
+    dependencies=[Depends(verify_captcha)],
+)
+async def delete_session(session_id: str, db: AsyncSession = Depends(get_db)):
+    """Deletes a session and all of its turns."""
+    if not await crud.delete_session(db, session_id):
+        raise HTTPException(
+            status_code=404, detail=f"Session '{session_id}' not found."
+        )
+    return Response(status_code=204)
@@ -0,0 +1,116 @@
+import asyncio
+from dataclasses import asdict
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from ai.llm_manager import LLMManager
+from ai.providers.rate_limiter import ProviderUnavailableError
+from app.api.v1.dependencies import verify_captcha
+from app.api.v1.errors import provider_unavailable
+from app.api.v1.schemas import (
+    VectorUpsertRequest,
+    VectorUpsertResponse,
+    VectorQueryRequest,
+    VectorQueryMatch,
+    VectorQueryResponse,
+)
+from app.vector_store import Collection, VectorStore
+
+router = APIRouter()
+
+
+def _get_collection(request: Request, name: str) -> Collection:
+    vector_store: VectorStore = request.app.state.vector_store
+    try:
+        return vector_store.collection(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _get_embedding_model(llm_manager: LLMManager) -> str:
+    provider = llm_manager.get_current_provider()
+    embedding_model = await provider.get_embedding_model()
+    if embedding_model is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provider '{llm_manager.current_provider}' does not support embeddings.",
+        )
+    return embedding_model
+
+
+@router.post(
+    "/vectors/{collection}/upsert",
+    response_model=VectorUpsertResponse,
+    summary="Embed and store documents in a collection",
+    dependencies=[Depends(verify_captcha)],
+)
+async def upsert_vectors(
+    request: Request, collection: str, payload: VectorUpsertRequest = Body(...)
+):
+    """
+    Embeds the documents with the current provider and stores them in the
+    collection, replacing documents that have the same id.
+    """
+    llm_manager: LLMManager = request.app.state.llm_manager
+    store = _get_collection(request, collection)
+    embedding_model = await _get_embedding_model(llm_manager)
+
+    try:
+        embeddings = await llm_manager.generate_embeddings(
+            [document.text for document in payload.documents]
+        )
+    except ProviderUnavailableError as e:
+        raise provider_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating embeddings: {e}")
+
+    try:
+        count = await asyncio.to_thread(
+            store.upsert,
+            embedding_model,
+            [document.model_dump() for document in payload.documents],
+            embeddings,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return VectorUpsertResponse(
+        collection=collection,
+        model=embedding_model,
+        upserted=len(payload.documents),
+        count=count,
+    )
+
+
+@router.post(
+    "/vectors/{collection}/query",
+    response_model=VectorQueryResponse,
+    summary="Find the documents most similar to a text",
+    dependencies=[Depends(verify_captcha)],
+)
+async def query_vectors(
+    request: Request, collection: str, payload: VectorQueryRequest = Body(...)
+):
+    """Returns the top-k documents in the collection by cosine similarity."""
+    llm_manager: LLMManager = request.app.state.llm_manager
+    store = _get_collection(request, collection)
+    embedding_model = await _get_embedding_model(llm_manager)
+
+    try:
+        embedding = await llm_manager.generate_embedding(payload.text)
+    except ProviderUnavailableError as e:
+        raise provider_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating embedding: {e}")
+
+    try:
+        matches = await asyncio.to_thread(
+            store.query, embedding_model, embedding, payload.top_k, payload.exact
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return VectorQueryResponse(
+        collection=collection,
+        model=embedding_model,
+        matches=[VectorQueryMatch(**asdict(match)) for match in matches],
+    )
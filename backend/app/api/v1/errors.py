@@ -0,0 +1,23 @@
+import math
+
+from fastapi import HTTPException, status
+
+from ai.providers.rate_limiter import ProviderUnavailableError
+
+
+def provider_unavailable(error: ProviderUnavailableError) -> HTTPException:
+    """
+    Maps a provider that is still rate limited or failing after retries to a
+    429 or 503 response, passing on any `Retry-After` hint.
+    """
+    status_code = (
+        status.HTTP_429_TOO_MANY_REQUESTS
+        if error.status_code == 429
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    headers = (
+        {"Retry-After": str(math.ceil(error.retry_after))}
+        if error.retry_after is not None
+        else None
+    )
+    return HTTPException(status_code=status_code, detail=str(error), headers=headers)
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -11,10 +12,90 @@ class TestPromptRequest(BaseModel):
             "An old robot tends to a rooftop garden. It finds a single, withered flower. Describe its thoughts."
         ],
     )
+    provider: Optional[str] = Field(
+        None, description="Provider for this request. Defaults to the current one."
+    )
+    model: Optional[str] = Field(
+        None, description="Model for this request. Defaults to the provider's model."
+    )
+    temperature: Optional[float] = Field(
+        None, ge=0.0, le=2.0, description="Defaults to the provider's temperature."
+    )
+    max_tokens: Optional[int] = Field(
+        None, ge=1, description="Upper bound on generated tokens."
+    )
+    system_prompt_id: Optional[int] = Field(
+        None, description="ID of a stored system prompt to send first."
+    )
+    context_ids: List[int] = Field(
+        default_factory=list,
+        max_length=16,
+        description="IDs of stored context blocks, sent in this order after the "
+        "system prompt and before the prompt.",
+    )
 
 
 class TestPromptResponse(BaseModel):
     response: str
+    usage: Dict[str, Any] | None = Field(
+        None,
+        description="Token usage of the upstream call, with prompt-cache reads "
+        "and writes under input_token_details. Empty for cached responses.",
+    )
+
+
+class CompareTarget(BaseModel):
+    """One (provider, model, temperature) configuration to compare."""
+
+    provider: str = Field(..., description="The provider to use (e.g., 'openai')")
+    model: Optional[str] = Field(
+        None, description="The model to use. Defaults to the provider's model."
+    )
+    temperature: Optional[float] = Field(
+        None, ge=0.0, le=2.0, description="Defaults to the provider's temperature."
+    )
+    max_tokens: Optional[int] = Field(
+        None, ge=1, description="Upper bound on generated tokens."
+    )
+
+
+class CompareRequest(BaseModel):
+    """Request model for sending one prompt to several targets at once."""
+
+    prompt: str = Field(..., min_length=1, max_length=1000)
+    targets: List[CompareTarget] = Field(..., min_length=1, max_length=8)
+    timeout: float = Field(
+        60.0, gt=0, le=300, description="Per-target timeout in seconds."
+    )
+
+
+class CompareResult(BaseModel):
+    """Outcome of one compare target."""
+
+    provider: str
+    model: str
+    temperature: float
+    response: str | None = None
+    error: str | None = None
+    timed_out: bool = False
+    time_to_first_token_ms: float | None = None
+    latency_ms: float
+    usage: Dict[str, Any] | None = None
+
+
+class CompareResponse(BaseModel):
+    """Response model for a compare request."""
+
+    results: List[CompareResult]
+    latency_ms: float
+
+
+class StreamSummary(BaseModel):
+    """Payload of the final `done` event of a streamed generation."""
+
+    time_to_first_token_ms: float | None = None
+    latency_ms: float
+    usage: Dict[str, Any] | None = None
 
 
 class EmbeddingRequest(BaseModel):
@@ -35,6 +116,25 @@ class EmbeddingResponse(BaseModel):
     embedding: List[float]
 
 
+class BatchEmbeddingRequest(BaseModel):
+    """Request model for embedding many texts in one call."""
+
+    texts: List[Annotated[str, Field(min_length=1)]] = Field(
+        ...,
+        min_length=1,
+        max_length=10_000,
+        description="The input texts to embed. Results keep the input order.",
+        examples=[["The quick brown fox.", "jumps over the lazy dog."]],
+    )
+
+
+class BatchEmbeddingResponse(BaseModel):
+    """Response model for batch text embeddings."""
+
+    model: str
+    embeddings: List[List[float]]
+
+
 class ModelListResponse(BaseModel):
     """Response model for listing available models."""
 
@@ -52,6 +152,7 @@ class SettingsResponse(BaseModel):
     model: str
     embedding_model: str | None = None
     temperature: float
+    version: int = Field(1, description="Incremented on every settings update.")
     available_models: List[str]
     available_providers: List[str]
 
@@ -68,3 +169,181 @@ class UpdateSettingsRequest(BaseModel):
     temperature: Optional[float] = Field(
         None, ge=0.0, le=2.0, description="The temperature to use (0.0 to 2.0)"
     )
+
+
+class PromptBlockCreateRequest(BaseModel):
+    """Request model for storing a system prompt or context block."""
+
+    kind: Literal["system", "context"]
+    name: str = Field(..., min_length=1, max_length=200)
+    content: str = Field(..., min_length=1, max_length=200_000)
+
+
+class PromptBlockResponse(BaseModel):
+    """A stored prompt block."""
+
+    id: int
+    kind: str
+    name: str
+    content: str
+
+
+class PromptBlockListResponse(BaseModel):
+    """Response model for listing stored prompt blocks."""
+
+    blocks: List[PromptBlockResponse]
+
+
+class SessionCreateRequest(BaseModel):
+    """Request model for starting a conversation session."""
+
+    provider: Optional[str] = Field(
+        None, description="Provider for the session. Defaults to the current one."
+    )
+    model: Optional[str] = Field(
+        None, description="Model for the session. Defaults to the provider's model."
+    )
+    temperature: Optional[float] = Field(
+        None, ge=0.0, le=2.0, description="Defaults to the provider's temperature."
+    )
+    system_prompt_id: Optional[int] = Field(
+        None, description="ID of a stored system prompt for every turn."
+    )
+    context_ids: List[int] = Field(
+        default_factory=list,
+        max_length=16,
+        description="IDs of stored context blocks for every turn.",
+    )
+    max_context_tokens: Optional[int] = Field(
+        None,
+        ge=512,
+        description="Context budget of the model; older turns are summarized or "
+        "trimmed to stay within it.",
+    )
+
+
+class SessionMessage(BaseModel):
+    """One stored turn of a conversation."""
+
+    id: int
+    role: str
+    content: str
+    tokens: int
+    in_context: bool = Field(
+        ..., description="Whether the turn is still sent verbatim to the model."
+    )
+
+
+class SessionResponse(BaseModel):
+    """A conversation session and its turns."""
+
+    id: str
+    provider: Optional[str]
+    model: Optional[str]
+    temperature: Optional[float]
+    system_prompt_id: Optional[int]
+    context_ids: List[int]
+    max_context_tokens: int
+    context_tokens: int = Field(
+        ..., description="Estimated tokens of the prefix, summary and kept turns."
+    )
+    summary: Optional[str] = None
+    messages: List[SessionMessage] = Field(default_factory=list)
+
+
+class SessionMessageRequest(BaseModel):
+    """Request model for adding a turn to a session."""
+
+    prompt: str = Field(..., min_length=1, max_length=4000)
+    max_tokens: Optional[int] = Field(
+        None, ge=1, description="Upper bound on generated tokens."
+    )
+
+
+class SessionMessageResponse(BaseModel):
+    """The answer to a session turn and the state of the context window."""
+
+    response: str
+    usage: Dict[str, Any] | None = None
+    context_tokens: int
+    dropped_messages: int = Field(
+        0, description="Turns that left the context window with this request."
+    )
+    summarized: bool = False
+
+
+class VectorDocument(BaseModel):
+    """A document to embed and store in a vector collection."""
+
+    id: str = Field(..., min_length=1, max_length=256)
+    text: str = Field(..., min_length=1)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class VectorUpsertRequest(BaseModel):
+    """Request model for upserting documents into a collection."""
+
+    documents: List[VectorDocument] = Field(..., min_length=1, max_length=10_000)
+
+
+class VectorUpsertResponse(BaseModel):
+    """Response model for a collection upsert."""
+
+    collection: str
+    model: str
+    upserted: int
+    count: int
+
+
+class VectorQueryRequest(BaseModel):
+    """Request model for a top-k similarity query."""
+
+    text: str = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=100)
+    exact: bool = Field(
+        False, description="Bypass the approximate index and scan every vector."
+    )
+
+
+class VectorQueryMatch(BaseModel):
+    """A single query result."""
+
+    id: str
+    score: float
+    text: str
+    metadata: Dict[str, Any]
+
+
+class VectorQueryResponse(BaseModel):
+    """Response model for a similarity query."""
+
+    collection: str
+    model: str
+    matches: List[VectorQueryMatch]
+
+
+class JobCreateRequest(TestPromptRequest):
+    """Request model for running a generation in the background."""
+
+    # Jobs are meant for long, unattended generations, so they take larger
+    # prompts than the interactive endpoints.
+    prompt: str = Field(..., min_length=1, max_length=32_000)
+    priority: int = Field(
+        0, ge=0, le=9, description="Jobs with a higher priority run first."
+    )
+
+
+class JobResponse(BaseModel):
+    """A background generation and, once finished, its result."""
+
+    id: str
+    status: str = Field(..., description="One of queued, running, succeeded or failed.")
+    priority: int
+    provider: Optional[str]
+    model: Optional[str]
+    response: Optional[str] = None
+    error: Optional[str] = None
+    usage: Dict[str, Any] | None = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
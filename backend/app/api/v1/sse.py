@@ -0,0 +1,20 @@
+import json
+from typing import Any, Dict
+
+from langchain_core.messages.ai import UsageMetadata, add_usage
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Formats a single Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def merge_usage(
+    total: UsageMetadata | None, usage: Dict[str, Any] | None
+) -> UsageMetadata | None:
+    """Accumulates usage metadata reported across streamed chunks."""
+    if not usage:
+        return total
+    return add_usage(total, UsageMetadata(**usage))
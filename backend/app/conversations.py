@@ -0,0 +1,125 @@
+import dataclasses
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from ai.llm_manager import LLMManager
+from ai.providers.base import GenerationConfig, PromptPrefix
+from . import models
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation with the turns below. Keep "
+    "facts, decisions, names and open questions; drop pleasantries. Reply "
+    "with the updated summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{transcript}"
+)
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+
+@dataclass
+class ContextPlan:
+    """The stored turns to send with a new prompt, and those that no longer fit."""
+
+    history: List[models.ConversationMessage]
+    dropped: List[models.ConversationMessage]
+    window_tokens: int
+
+
+class ContextBuilder:
+    """
+    Fits a conversation into the model's context budget, one turn at a time.
+
+    Each message's token count is computed once when it is stored, and the
+    session row keeps the running total for the messages still in its
+    window. Fitting a new turn only subtracts the counts of the oldest
+    exchanges it drops, so the history is never re-tokenized. With
+    summarization on, dropped exchanges are folded into a running summary
+    that is sent as the last context block; otherwise they are trimmed.
+    """
+
+    def __init__(
+        self,
+        default_max_tokens: int = 8000,
+        response_reserve: int = 1024,
+        summarize: bool = True,
+        summary_max_tokens: int = 256,
+    ):
+        """Initializes the builder.
+
+        Args:
+            default_max_tokens: Context budget of sessions that set none.
+            response_reserve: Tokens kept free for the answer when a request
+                sets no `max_tokens`.
+            summarize: Whether dropped turns are summarized or just trimmed.
+            summary_max_tokens: Upper bound on the running summary.
+        """
+        self.default_max_tokens = default_max_tokens
+        self.response_reserve = response_reserve
+        self.summarize = summarize
+        self.summary_max_tokens = summary_max_tokens
+
+    def plan(
+        self,
+        session: models.ConversationSession,
+        messages: List[models.ConversationMessage],
+        prompt_tokens: int,
+        max_tokens: int | None = None,
+    ) -> ContextPlan:
+        """Drops the oldest whole exchanges until the new prompt fits.
+
+        Args:
+            session: The session, with its running window token count.
+            messages: The messages currently in the window, oldest first.
+            prompt_tokens: Size of the new prompt.
+            max_tokens: The request's answer limit, if any.
+        """
+        budget = session.max_context_tokens - (max_tokens or self.response_reserve)
+        summary_tokens = max(
+            session.summary_tokens, self.summary_max_tokens if self.summarize else 0
+        )
+        fixed = session.prefix_tokens + summary_tokens + prompt_tokens
+        window_tokens = session.window_tokens
+        start = 0
+        while start < len(messages) and fixed + window_tokens > budget:
+            # Drop a whole exchange so the history still opens with a user turn.
+            end = start + 1
+            while end < len(messages) and messages[end].role != "user":
+                end += 1
+            window_tokens -= sum(message.tokens for message in messages[start:end])
+            start = end
+        return ContextPlan(messages[start:], messages[:start], window_tokens)
+
+    async def fold(
+        self,
+        llm_manager: LLMManager,
+        config: GenerationConfig,
+        summary: str | None,
+        dropped: List[models.ConversationMessage],
+    ) -> str:
+        """Returns `summary` updated with the dropped turns only."""
+        transcript = "\n".join(
+            f"{message.role.capitalize()}: {message.content}" for message in dropped
+        )
+        summary_config = dataclasses.replace(
+            config, temperature=0.0, max_tokens=self.summary_max_tokens, prefix=None
+        )
+        generation = await llm_manager.generate_text(
+            SUMMARY_PROMPT.format(summary=summary or "(none)", transcript=transcript),
+            summary_config,
+        )
+        return generation.text.strip()
+
+
+def build_prefix(
+    base: PromptPrefix | None,
+    summary: str | None,
+    history: List[models.ConversationMessage],
+) -> PromptPrefix:
+    """Combines the stored blocks, the running summary and the kept turns."""
+    context: Tuple[str, ...] = base.context if base else ()
+    if summary:
+        context += (SUMMARY_HEADER + summary,)
+    return PromptPrefix(
+        system=base.system if base else None,
+        context=context,
+        history=tuple((message.role, message.content) for message in history),
+    )
@@ -1,29 +1,57 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import String, cast, delete, insert, or_, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from . import models
+from .metrics import timed_query
 
 
+@timed_query
 async def get_settings(db: AsyncSession) -> models.Settings | None:
     """Fetch the current settings from the database."""
     result = await db.execute(select(models.Settings).where(models.Settings.id == 1))
     return result.scalars().first()
 
 
-async def update_settings(db: AsyncSession, settings_data: dict):
-    """Update the settings in the database."""
-    db_settings = await get_settings(db)
-    if not db_settings:
+@timed_query
+async def update_settings(
+    db: AsyncSession, settings_data: dict
+) -> models.SettingsSnapshot | None:
+    """
+    Update the settings in a single UPDATE ... RETURNING statement, bumping the
+    version, and return the new snapshot.
+    """
+    values = {key: value for key, value in settings_data.items() if value is not None}
+    result = await db.execute(
+        update(models.Settings)
+        .where(models.Settings.id == 1)
+        .values(**values, version=models.Settings.version + 1)
+        .returning(
+            models.Settings.provider,
+            models.Settings.model,
+            models.Settings.temperature,
+            models.Settings.version,
+        )
+    )
+    row = result.one_or_none()
+    await db.commit()
+    if row is None:
         return None
+    return models.SettingsSnapshot(**row._mapping)
 
-    for key, value in settings_data.items():
-        if value is not None:
-            setattr(db_settings, key, value)
 
-    await db.commit()
-    await db.refresh(db_settings)
-    return db_settings
+@timed_query
+async def get_settings_version(db: AsyncSession) -> int | None:
+    """Fetch only the current settings version."""
+    result = await db.execute(
+        select(models.Settings.version).where(models.Settings.id == 1)
+    )
+    return result.scalar_one_or_none()
 
 
+@timed_query
 async def create_default_settings(
     db: AsyncSession, provider: str, model: str
 ) -> models.Settings:
@@ -31,9 +59,265 @@ async def create_default_settings(
     Creates the first, default settings row (ID=1) in the database.
     """
     new_settings = models.Settings(
-        id=1, provider=provider, model=model, temperature=0.7
+        id=1, provider=provider, model=model, temperature=0.7, version=1
     )
     db.add(new_settings)
     await db.commit()
     await db.refresh(new_settings)
     return new_settings
+
+
+@timed_query
+async def create_prompt_block(
+    db: AsyncSession, kind: str, name: str, content: str
+) -> models.PromptBlockSnapshot:
+    """Stores a new system prompt or context block."""
+    block = models.PromptBlock(kind=kind, name=name, content=content)
+    db.add(block)
+    await db.commit()
+    return models.PromptBlockSnapshot.from_model(block)
+
+
+@timed_query
+async def get_prompt_blocks(
+    db: AsyncSession, block_ids: list[int]
+) -> list[models.PromptBlockSnapshot]:
+    """Fetch the prompt blocks with the given IDs in one query."""
+    result = await db.execute(
+        select(models.PromptBlock).where(models.PromptBlock.id.in_(block_ids))
+    )
+    return [models.PromptBlockSnapshot.from_model(b) for b in result.scalars()]
+
+
+@timed_query
+async def list_prompt_blocks(
+    db: AsyncSession, kind: str | None = None
+) -> list[models.PromptBlockSnapshot]:
+    """List stored prompt blocks, optionally only those of one kind."""
+    query = select(models.PromptBlock).order_by(models.PromptBlock.id)
+    if kind is not None:
+        query = query.where(models.PromptBlock.kind == kind)
+    result = await db.execute(query)
+    return [models.PromptBlockSnapshot.from_model(b) for b in result.scalars()]
+
+
+@timed_query
+async def prompt_block_in_use(db: AsyncSession, block_id: int) -> bool:
+    """
+    Whether a conversation session, or a job still queued or running,
+    references the prompt block.
+    """
+    # Narrow by the JSON text, then confirm, since "%1%" also matches 12.
+    for model, condition in (
+        (models.ConversationSession, true()),
+        (models.GenerationJob, models.GenerationJob.status.in_(["queued", "running"])),
+    ):
+        result = await db.execute(
+            select(model.system_prompt_id, model.context_ids).where(
+                condition,
+                or_(
+                    model.system_prompt_id == block_id,
+                    cast(model.context_ids, String).like(f"%{block_id}%"),
+                ),
+            )
+        )
+        for system_prompt_id, context_ids in result:
+            if system_prompt_id == block_id or block_id in context_ids:
+                return True
+    return False
+
+
+@timed_query
+async def delete_prompt_block(db: AsyncSession, block_id: int) -> bool:
+    """Delete a prompt block, returning whether it existed."""
+    result = await db.execute(
+        delete(models.PromptBlock).where(models.PromptBlock.id == block_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+@timed_query
+async def create_session(db: AsyncSession, **values) -> models.ConversationSession:
+    """Creates a conversation session with a random, unguessable ID."""
+    session = models.ConversationSession(id=uuid.uuid4().hex, **values)
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+    return session
+
+
+@timed_query
+async def get_session(
+    db: AsyncSession, session_id: str
+) -> models.ConversationSession | None:
+    """Fetch a conversation session without its messages."""
+    return await db.get(models.ConversationSession, session_id)
+
+
+@timed_query
+async def get_session_messages(
+    db: AsyncSession, session_id: str, since_id: int = 0
+) -> list[models.ConversationMessage]:
+    """Fetch a session's messages with IDs from `since_id` on, oldest first."""
+    result = await db.execute(
+        select(models.ConversationMessage)
+        .where(
+            models.ConversationMessage.session_id == session_id,
+            models.ConversationMessage.id >= since_id,
+        )
+        .order_by(models.ConversationMessage.id)
+    )
+    return list(result.scalars())
+
+
+@timed_query
+async def append_session_turn(
+    db: AsyncSession,
+    session_id: str,
+    expected_version: int,
+    messages: list[tuple[str, str, int]],
+    state: dict,
+) -> bool:
+    """
+    Appends (role, content, tokens) messages and updates the session's window
+    state in one transaction, only if the session is still at
+    `expected_version`. Returns False if another turn got there first.
+    """
+    result = await db.execute(
+        update(models.ConversationSession)
+        .where(
+            models.ConversationSession.id == session_id,
+            models.ConversationSession.version == expected_version,
+        )
+        .values(**state, version=expected_version + 1)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    db.add_all(
+        models.ConversationMessage(
+            session_id=session_id, role=role, content=content, tokens=tokens
+        )
+        for role, content, tokens in messages
+    )
+    await db.commit()
+    return True
+
+
+@timed_query
+async def delete_session(db: AsyncSession, session_id: str) -> bool:
+    """Delete a session and its messages, returning whether it existed."""
+    await db.execute(
+        delete(models.ConversationMessage).where(
+            models.ConversationMessage.session_id == session_id
+        )
+    )
+    result = await db.execute(
+        delete(models.ConversationSession).where(
+            models.ConversationSession.id == session_id
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+@timed_query
+async def insert_request_logs(db: AsyncSession, rows: list[dict]) -> None:
+    """Bulk-insert request log rows with a single executemany."""
+    await db.execute(insert(models.RequestLog), rows)
+    await db.commit()
+
+
+@timed_query
+async def create_job(db: AsyncSession, **values) -> models.GenerationJob:
+    """Creates a queued generation job with a random, unguessable ID."""
+    job = models.GenerationJob(id=uuid.uuid4().hex, status="queued", **values)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+@timed_query
+async def get_job(db: AsyncSession, job_id: str) -> models.GenerationJob | None:
+    """Fetch a generation job, bypassing any copy cached in the session."""
+    return await db.get(models.GenerationJob, job_id, populate_existing=True)
+
+
+@timed_query
+async def lease_jobs(
+    db: AsyncSession, job_ids: list[str], until: datetime | None
+) -> None:
+    """Renews (or, with None, releases) the leases of unfinished jobs."""
+    if not job_ids:
+        return
+    await db.execute(
+        update(models.GenerationJob)
+        .where(
+            models.GenerationJob.id.in_(job_ids),
+            models.GenerationJob.status.in_(("queued", "running")),
+        )
+        .values(claimed_until=until)
+    )
+    await db.commit()
+
+
+@timed_query
+async def take_expired_jobs(
+    db: AsyncSession, now: datetime, until: datetime, limit: int
+) -> list[models.GenerationJob]:
+    """
+    Takes over up to `limit` queued or running jobs whose lease has expired,
+    highest priority first and then oldest first, leasing them until `until`. Each job is taken with a
+    conditional UPDATE, so only one process gets it.
+    """
+    expired = or_(
+        models.GenerationJob.claimed_until.is_(None),
+        models.GenerationJob.claimed_until < now,
+    )
+    result = await db.execute(
+        select(models.GenerationJob)
+        .where(models.GenerationJob.status.in_(("queued", "running")), expired)
+        .order_by(models.GenerationJob.priority.desc(), models.GenerationJob.created_at)
+        .limit(limit)
+    )
+    taken = []
+    for job in result.scalars().all():
+        claimed = await db.execute(
+            update(models.GenerationJob)
+            .where(
+                models.GenerationJob.id == job.id,
+                models.GenerationJob.status == job.status,
+                expired,
+            )
+            .values(claimed_until=until)
+            # The loaded rows are returned as read; skip re-evaluating the
+            # criteria against them in Python.
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount > 0:
+            taken.append(job)
+    await db.commit()
+    return taken
+
+
+@timed_query
+async def update_job(
+    db: AsyncSession, job_id: str, expected_status: str, **values
+) -> bool:
+    """
+    Moves a job on from `expected_status` in a single conditional UPDATE.
+    Returns False if the job is no longer in that status, e.g. because
+    another worker process claimed it first.
+    """
+    result = await db.execute(
+        update(models.GenerationJob)
+        .where(
+            models.GenerationJob.id == job_id,
+            models.GenerationJob.status == expected_status,
+        )
+        .values(**values)
+    )
+    await db.commit()
+    return result.rowcount > 0
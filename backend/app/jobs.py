@@ -0,0 +1,299 @@
+import asyncio
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Dict, List, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ai.llm_manager import LLMManager
+from ai.metrics import track_usage
+from . import crud, models
+from .prompt_library import PromptLibrary
+from .request_log import RequestLogWriter
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobRunner:
+    """
+    Runs generation jobs on a bounded pool of background workers.
+
+    Jobs are persisted before they are submitted, and every status change is
+    written back, so any worker process can answer a status query. Queued
+    jobs wait in a bounded in-process priority queue; higher priorities run
+    first and equal priorities in submission order.
+
+    A process leases the jobs it holds and renews the leases while they are
+    queued or running there. When a process dies without shutting down, its
+    leases run out and another process takes the jobs over, re-running
+    those that were running up to `max_attempts` times. Take-overs and
+    claims are conditional UPDATEs, so each job is held and run by one
+    process at a time.
+    """
+
+    def __init__(
+        self,
+        llm_manager: LLMManager,
+        prompt_library: PromptLibrary,
+        session_factory: async_sessionmaker[AsyncSession],
+        request_log: RequestLogWriter | None = None,
+        workers: int = 4,
+        max_queue: int = 1000,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3,
+    ):
+        """Initializes the runner.
+
+        Args:
+            llm_manager: Generates the text.
+            prompt_library: Resolves the stored system prompt and context.
+            session_factory: Creates the sessions job state is written with.
+            request_log: Where finished generations are logged, if anywhere.
+            workers: Jobs run at the same time.
+            max_queue: Jobs waiting to run before new ones are rejected.
+            poll_interval: How often waiters re-read a job run by another
+                process, in seconds.
+            lease_seconds: How long a job stays with a process that stops
+                renewing its lease. Leases are renewed every third of this.
+            max_attempts: Runs of a job before it is failed rather than
+                taken over again.
+        """
+        self.llm_manager = llm_manager
+        self.prompt_library = prompt_library
+        self.session_factory = session_factory
+        self.request_log = request_log
+        self.workers = workers
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_queue)
+        self._order = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        # Jobs queued or running in this process, and events set when one of
+        # them changes status, so local waiters wake without polling.
+        self._local: Set[str] = set()
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def full(self) -> bool:
+        """Returns True if a submitted job would be rejected."""
+        return self._queue.full()
+
+    def lease_until(self) -> datetime:
+        """Returns when a lease taken or renewed now runs out."""
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    async def start(self):
+        """Starts the workers and the task that renews and takes over leases."""
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def _maintain(self):
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    await crud.lease_jobs(db, list(self._local), self.lease_until())
+                await self._take_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Renewing job leases failed: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _take_expired(self):
+        """Queues jobs whose process stopped renewing their lease."""
+        capacity = self.max_queue - self.depth
+        if capacity <= 0:
+            return
+        async with self.session_factory() as db:
+            jobs = await crud.take_expired_jobs(
+                db, datetime.now(timezone.utc), self.lease_until(), capacity
+            )
+        for job in jobs:
+            if job.status == "running":
+                if job.attempts >= self.max_attempts:
+                    await self._set(
+                        job.id,
+                        "running",
+                        status="failed",
+                        error=f"The job was abandoned {job.attempts} times.",
+                        finished_at=datetime.now(timezone.utc),
+                    )
+                    continue
+                await self._set(job.id, "running", status="queued", started_at=None)
+            try:
+                self.submit(job.id, job.priority)
+            except JobQueueFullError:
+                async with self.session_factory() as db:
+                    await crud.lease_jobs(db, [job.id], None)
+        if jobs:
+            logger.info(f"Took over {len(jobs)} jobs with expired leases.")
+
+    def submit(self, job_id: str, priority: int = 0):
+        """Queues a persisted job.
+
+        Raises:
+            JobQueueFullError: If `max_queue` jobs are already waiting.
+        """
+        try:
+            self._queue.put_nowait((-priority, next(self._order), job_id))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"The job queue is full ({self.max_queue} jobs); try again later."
+            )
+        self._local.add(job_id)
+
+    def _notify(self, job_id: str, finished: bool = False):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+        if finished:
+            self._local.discard(job_id)
+
+    async def _set(self, job_id: str, expected_status: str, **values) -> bool:
+        async with self.session_factory() as db:
+            updated = await crud.update_job(db, job_id, expected_status, **values)
+        if updated:
+            self._notify(job_id, values.get("status") != "running")
+        return updated
+
+    async def _work(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job {job_id} could not be run: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        claimed = await self._set(
+            job_id,
+            "queued",
+            status="running",
+            started_at=datetime.now(timezone.utc),
+            attempts=models.GenerationJob.attempts + 1,
+            claimed_until=self.lease_until(),
+        )
+        if not claimed:
+            # Another process claimed it, or it no longer exists.
+            self._notify(job_id, finished=True)
+            return
+
+        started = time.perf_counter()
+        config = None
+        try:
+            async with self.session_factory() as db:
+                job = await crud.get_job(db, job_id)
+                prefix = await self.prompt_library.resolve(
+                    db, job.system_prompt_id, job.context_ids
+                )
+            config = self.llm_manager.resolve_config(
+                job.provider, job.model, job.temperature, job.max_tokens, prefix
+            )
+            with track_usage() as usage:
+                generation = await self.llm_manager.generate_text(job.prompt, config)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back for the next start to pick up.
+            await self._set(
+                job_id, "running", status="queued", started_at=None, claimed_until=None
+            )
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed: {e}")
+            if self.request_log is not None and config is not None:
+                self.request_log.record(
+                    "run_job", config, job.prompt, started, error=str(e)
+                )
+            await self._set(
+                job_id,
+                "running",
+                status="failed",
+                error=str(e),
+                finished_at=datetime.now(timezone.utc),
+            )
+            return
+
+        if self.request_log is not None:
+            self.request_log.record(
+                "run_job",
+                generation.config or config,
+                job.prompt,
+                started,
+                response=generation.text,
+                usage=usage,
+                cached=generation.cached,
+            )
+        await self._set(
+            job_id,
+            "running",
+            status="succeeded",
+            response=generation.text,
+            usage=usage or None,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: float,
+        statuses: Collection[str] = FINISHED_STATUSES,
+    ) -> models.GenerationJob | None:
+        """Waits up to `timeout` seconds for a job to reach one of `statuses`.
+
+        Jobs run by this process wake the waiter as soon as they change;
+        others are re-read every `poll_interval` seconds.
+
+        Returns:
+            The job as last read, or None if it does not exist.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            async with self.session_factory() as db:
+                job = await crud.get_job(db, job_id)
+            remaining = deadline - loop.time()
+            if job is None or job.status in statuses or remaining <= 0:
+                return job
+            delay = min(remaining, self.poll_interval)
+            if job_id in self._local:
+                event = self._changed.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """
+        Stops the workers. Running jobs go back to queued, and the leases of
+        all jobs held here are released so other processes take them over.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            async with self.session_factory() as db:
+                await crud.lease_jobs(db, list(self._local), None)
+        except Exception as e:
+            logger.warning(f"Releasing job leases failed: {e}")
+        self._local.clear()
@@ -0,0 +1,133 @@
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, TypeVar
+
+from ai.metrics import REGISTRY, counter_lines, gauge_lines
+
+T = TypeVar("T")
+
+HTTP_REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response.",
+    ("method", "route"),
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "Completed HTTP requests by status code.",
+    ("method", "route", "status"),
+)
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Duration of crud operations, including commits.",
+    ("operation",),
+)
+REQUEST_LOG_RECORDS = REGISTRY.counter(
+    "request_log_records_total",
+    "Request log records by outcome: written, dropped (queue full) or failed.",
+    ("outcome",),
+)
+
+_sources: Dict[str, Any] = {}
+
+
+def timed_query(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Records the duration of a crud coroutine in DB_QUERY_LATENCY."""
+    histogram = DB_QUERY_LATENCY.labels(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and status counts. For
+    streamed responses the latency covers the whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route name (the endpoint function), which is bounded
+            # and does not depend on how routers are mounted.
+            route = getattr(scope.get("route"), "name", "unmatched")
+            HTTP_REQUEST_LATENCY.labels(scope["method"], route).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
+
+
+def observe_llm_manager(llm_manager):
+    """Exports the LLM manager's cache and coalescing statistics on scrape."""
+    _sources["llm_manager"] = llm_manager
+
+
+def observe_request_log(request_log):
+    """Exports the request log's queue depth on scrape."""
+    _sources["request_log"] = request_log
+
+
+def _collect_llm_manager() -> List[str]:
+    llm_manager = _sources.get("llm_manager")
+    if llm_manager is None:
+        return []
+    cache_stats = llm_manager.cache_stats()
+    coalescer = llm_manager.coalescer.stats()
+    lines = gauge_lines(
+        "cache_hit_ratio",
+        "Share of lookups served from each cache layer.",
+        "cache",
+        {
+            name: stats.get("hit_ratio", stats.get("hit_rate", 0.0))
+            for name, stats in cache_stats.items()
+        },
+    )
+    lines += counter_lines(
+        "llm_coalesced_calls_total",
+        "Upstream calls made and saved by request coalescing.",
+        "kind",
+        {
+            "upstream": coalescer["upstream_calls"],
+            "saved": coalescer["saved_calls"],
+        },
+    )
+    return lines
+
+
+def _collect_request_log() -> List[str]:
+    request_log = _sources.get("request_log")
+    if request_log is None:
+        return []
+    return gauge_lines(
+        "request_log_queue",
+        "Request log records waiting to be written, and the queue's capacity.",
+        "kind",
+        {"depth": request_log.depth, "capacity": request_log.max_queue},
+    )
+
+
+REGISTRY.add_collector(_collect_llm_manager)
+REGISTRY.add_collector(_collect_request_log)
@@ -1,5 +1,19 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, Float
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from .database import Base
 
 
@@ -10,6 +24,187 @@ class Settings(Base):
     provider: Mapped[str] = mapped_column(String, nullable=False, default="openai")
     model: Mapped[str] = mapped_column(String, nullable=False, default="gpt-5-nano")
     temperature: Mapped[float] = mapped_column(Float, nullable=False, default=0.7)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
 
     def __repr__(self):
         return f"<Settings(provider={self.provider}, model={self.model}, temperature={self.temperature})>"
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Immutable in-process copy of the settings row."""
+
+    provider: str
+    model: str
+    temperature: float
+    version: int
+
+    @classmethod
+    def from_model(cls, settings: Settings) -> "SettingsSnapshot":
+        return cls(
+            provider=settings.provider,
+            model=settings.model,
+            temperature=settings.temperature,
+            version=settings.version,
+        )
+
+
+class PromptBlock(Base):
+    """
+    A stored system prompt or context block. Blocks are never edited, so a
+    prefix built from them stays byte-identical and provider-cacheable.
+    """
+
+    __tablename__ = "prompt_blocks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    def __repr__(self):
+        return f"<PromptBlock(id={self.id}, kind={self.kind}, name={self.name})>"
+
+
+@dataclass(frozen=True)
+class PromptBlockSnapshot:
+    """Immutable in-process copy of a prompt block row."""
+
+    id: int
+    kind: str
+    name: str
+    content: str
+
+    @classmethod
+    def from_model(cls, block: PromptBlock) -> "PromptBlockSnapshot":
+        return cls(id=block.id, kind=block.kind, name=block.name, content=block.content)
+
+
+class ConversationSession(Base):
+    """
+    A server-side conversation. Besides its settings, the row keeps the state
+    of the context window: the first message still sent to the model, the
+    running token count of the messages from there on, and a summary of the
+    messages before it.
+    """
+
+    __tablename__ = "conversation_sessions"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    provider: Mapped[str | None] = mapped_column(String, nullable=True)
+    model: Mapped[str | None] = mapped_column(String, nullable=True)
+    temperature: Mapped[float | None] = mapped_column(Float, nullable=True)
+    system_prompt_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    context_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False, default=list)
+    max_context_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    prefix_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    window_start: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    window_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"<ConversationSession(id={self.id}, version={self.version})>"
+
+
+class ConversationMessage(Base):
+    """One turn of a conversation, with its token count computed once."""
+
+    __tablename__ = "conversation_messages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(
+        String(32),
+        ForeignKey("conversation_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    role: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<ConversationMessage(id={self.id}, role={self.role})>"
+
+
+class RequestLog(Base):
+    """
+    One generation served by the API, for capacity planning. Rows are written
+    in batches by `RequestLogWriter`, so `created_at` is the request's time,
+    not the insert's.
+    """
+
+    __tablename__ = "request_logs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    endpoint: Mapped[str] = mapped_column(String, nullable=False)
+    provider: Mapped[str] = mapped_column(String, nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    latency_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    cached: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    input_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    output_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cache_read_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cache_creation_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<RequestLog(id={self.id}, endpoint={self.endpoint})>"
+
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class GenerationJob(Base):
+    """
+    A generation run in the background. The row holds the request, its
+    status and, once finished, the result, so any worker process can answer
+    a status query.
+    """
+
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[str] = mapped_column(
+        String, nullable=False, default="queued", index=True
+    )
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    provider: Mapped[str | None] = mapped_column(String, nullable=True)
+    model: Mapped[str | None] = mapped_column(String, nullable=True)
+    temperature: Mapped[float | None] = mapped_column(Float, nullable=True)
+    max_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    system_prompt_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    context_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False, default=list)
+    response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    usage: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # The process holding the job renews this while the job is queued or
+    # running there; once it passes, another process may take the job over.
+    claimed_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self):
+        return f"<GenerationJob(id={self.id}, status={self.status})>"
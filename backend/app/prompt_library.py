@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ai.providers.base import PromptPrefix
+from . import crud, models
+
+SYSTEM = "system"
+CONTEXT = "context"
+
+
+class PromptLibrary:
+    """
+    Per-worker LRU cache of stored prompt blocks in front of the database.
+
+    Blocks never change after creation, so each is fetched at most once per
+    worker while it stays cached. A block deleted through another worker may
+    still be served here until it is evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._blocks: OrderedDict[int, models.PromptBlockSnapshot] = OrderedDict()
+
+    def remember(self, block: models.PromptBlockSnapshot):
+        self._blocks[block.id] = block
+        self._blocks.move_to_end(block.id)
+        while len(self._blocks) > self.max_entries:
+            self._blocks.popitem(last=False)
+
+    def forget(self, block_id: int):
+        self._blocks.pop(block_id, None)
+
+    async def get_many(
+        self, db: AsyncSession, block_ids: List[int]
+    ) -> Dict[int, models.PromptBlockSnapshot]:
+        """Returns the blocks that exist among `block_ids`, by ID."""
+        found = {}
+        for block_id in block_ids:
+            block = self._blocks.get(block_id)
+            if block is not None:
+                self._blocks.move_to_end(block_id)
+                found[block_id] = block
+        missing = [block_id for block_id in block_ids if block_id not in found]
+        if missing:
+            for block in await crud.get_prompt_blocks(db, missing):
+                self.remember(block)
+                found[block.id] = block
+        return found
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        system_prompt_id: int | None,
+        context_ids: List[int],
+    ) -> PromptPrefix | None:
+        """Builds the prompt prefix for a request from stored block IDs.
+
+        Raises:
+            LookupError: If a referenced block does not exist.
+            ValueError: If a block is referenced as the wrong kind.
+        """
+        block_ids = list(context_ids)
+        if system_prompt_id is not None:
+            block_ids.insert(0, system_prompt_id)
+        if not block_ids:
+            return None
+
+        blocks = await self.get_many(db, block_ids)
+        missing = [block_id for block_id in block_ids if block_id not in blocks]
+        if missing:
+            raise LookupError(f"Prompt blocks not found: {missing}")
+
+        system = None
+        if system_prompt_id is not None:
+            if blocks[system_prompt_id].kind != SYSTEM:
+                raise ValueError(f"Block {system_prompt_id} is not a system prompt.")
+            system = blocks[system_prompt_id].content
+        for block_id in context_ids:
+            if blocks[block_id].kind != CONTEXT:
+                raise ValueError(f"Block {block_id} is not a context block.")
+        return PromptPrefix(
+            system=system,
+            context=tuple(blocks[block_id].content for block_id in context_ids),
+        )
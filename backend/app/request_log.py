@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ai.providers.base import GenerationConfig
+from . import crud
+from .metrics import REQUEST_LOG_RECORDS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogWriter:
+    """
+    Write-behind log of generations served by the API.
+
+    Handlers call `record`, which only appends a row to a bounded in-process
+    queue, so logging never adds a database round trip to user latency. A
+    background task drains the queue and inserts rows in batches of up to
+    `batch_size`, or whatever arrived within `flush_interval` seconds of the
+    first row, with one executemany each. When the queue is full, new rows
+    are dropped and counted rather than slowing requests down. `aclose`
+    writes out what is left.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        enabled: bool = True,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        """Initializes the writer.
+
+        Args:
+            session_factory: Creates the sessions batches are written with.
+            enabled: Whether requests are logged at all.
+            max_queue: Rows buffered before new ones are dropped.
+            batch_size: Most rows written by one insert.
+            flush_interval: Longest a row waits for its batch to fill, in
+                seconds.
+        """
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=max_queue)
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        """Rows waiting to be written."""
+        return self._queue.qsize()
+
+    def start(self):
+        """Starts the background task that drains the queue."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def record(
+        self,
+        endpoint: str,
+        config: GenerationConfig,
+        prompt: str,
+        started: float,
+        response: str | None = None,
+        error: str | None = None,
+        usage: Dict[str, Any] | None = None,
+        cached: bool = False,
+    ):
+        """Queues one generation for writing, without waiting.
+
+        Args:
+            endpoint: Name of the endpoint that served it, e.g., "test_prompt".
+            config: The resolved provider, model and parameters.
+            prompt: The user prompt.
+            started: `time.perf_counter()` when generation started.
+            response: The generated text, or what was streamed of it.
+            error: The error message if generation failed.
+            usage: Token usage collected with `track_usage`.
+            cached: Whether the response cache served it.
+        """
+        if not self.enabled:
+            return
+        usage = usage or {}
+        details = usage.get("input_token_details") or {}
+        row = {
+            "created_at": datetime.now(timezone.utc),
+            "endpoint": endpoint,
+            "provider": config.provider,
+            "model": config.model,
+            "prompt": prompt,
+            "response": response,
+            "error": error,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "cached": cached,
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "cache_read_tokens": details.get("cache_read"),
+            "cache_creation_tokens": details.get("cache_creation"),
+        }
+        if self._closing:
+            self._drop(1)
+            return
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._drop(1)
+
+    def _drop(self, count: int):
+        if self.dropped == 0:
+            logger.warning("Request log queue is full; dropping records.")
+        self.dropped += count
+        REQUEST_LOG_RECORDS.labels("dropped").inc(count)
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Waits for a first row, then collects more until full or timed out."""
+        loop = asyncio.get_running_loop()
+        try:
+            batch = [
+                await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            ]
+        except TimeoutError:
+            return []
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if self._closing:
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                )
+            except TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            async with self.session_factory() as db:
+                await crud.insert_request_logs(db, batch)
+        except Exception as e:
+            logger.warning(f"Writing {len(batch)} request log records failed: {e}")
+            self.failed += len(batch)
+            REQUEST_LOG_RECORDS.labels("failed").inc(len(batch))
+            return
+        self.written += len(batch)
+        REQUEST_LOG_RECORDS.labels("written").inc(len(batch))
+
+    async def _run(self):
+        while not (self._closing and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def aclose(self, timeout: float = 10.0):
+        """Stops accepting rows and writes out the queue, for up to `timeout` seconds."""
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except TimeoutError:
+            logger.warning(
+                f"Request log flush timed out; {self.depth} records were not written."
+            )
+        self._task = None
@@ -0,0 +1,360 @@
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single worker.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+@dataclass
+class VectorMatch:
+    """A stored document returned by a similarity query."""
+
+    id: str
+    score: float
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class _IVFIndex:
+    """
+    Inverted-file index: rows are bucketed by their nearest k-means centroid,
+    and a query only scores the rows of its `nprobe` closest buckets.
+    """
+
+    def __init__(self, vectors: np.ndarray, nprobe: int, iterations: int = 10):
+        count = vectors.shape[0]
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(count, size=min(count, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+        self.centroids = centroids
+        self.nprobe = min(nprobe, nlist)
+        self.lists: List[List[int]] = [[] for _ in range(nlist)]
+        self.size = 0
+        self.add(vectors, 0)
+
+    def add(self, vectors: np.ndarray, first_row: int):
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        for offset, cluster in enumerate(assignment):
+            self.lists[cluster].append(first_row + offset)
+        self.size = first_row + len(vectors)
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        nearest = np.argsort(self.centroids @ query)[-self.nprobe :]
+        return np.fromiter(
+            (row for cluster in nearest for row in self.lists[cluster]), dtype=np.int64
+        )
+
+
+class Collection:
+    """
+    A named set of documents with unit-normalized float32 vectors.
+
+    Vectors live in a memory-mapped `vectors.f32` matrix, so large collections
+    are paged in lazily; ids, texts and metadata live in an append-only
+    `items.jsonl` sidecar, and `collection.json` records the dimension, row
+    count and embedding model.
+
+    Several worker processes can share a collection: upserts hold an
+    exclusive `fcntl` lock on `collection.lock` and queries a shared one,
+    and each process catches up with rows written by the others, read from
+    the header and the new tail of the sidecar, before using the collection.
+    """
+
+    def __init__(self, path: str, index_threshold: int, nprobe: int):
+        self.path = path
+        self.index_threshold = index_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._vectors: np.memmap | None = None
+        self._index: _IVFIndex | None = None
+        self.dim = 0
+        self.count = 0
+        self.embedding_model: str | None = None
+        self.ids: List[str] = []
+        self.items: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # How far the sidecar has been read, to notice other processes' writes.
+        self._items_offset = 0
+        with self._file_lock(exclusive=False):
+            self._refresh()
+
+    @property
+    def _header_path(self) -> str:
+        return os.path.join(self.path, "collection.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _items_path(self) -> str:
+        return os.path.join(self.path, "items.jsonl")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.path, "collection.lock")
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive: bool):
+        """
+        Holds the collection's lock file across processes: exclusive while
+        writing, shared while reading. Reads of a collection that does not
+        exist yet take no lock, so queries do not create directories.
+        """
+        if fcntl is None or (not exclusive and not os.path.isdir(self.path)):
+            yield
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Catches up with what other processes wrote since the last read."""
+        # Every upsert appends to the sidecar, so its size tells whether
+        # anything was written since.
+        try:
+            size = os.path.getsize(self._items_path)
+        except FileNotFoundError:
+            return
+        if size == self._items_offset:
+            return
+        with open(self._header_path) as f:
+            header = json.load(f)
+        first_new_row = self.count
+        self.dim = header["dim"]
+        self.count = header["count"]
+        self.embedding_model = header.get("embedding_model")
+        self.ids.extend([""] * (self.count - len(self.ids)))
+        self.items.extend({} for _ in range(self.count - len(self.items)))
+
+        with open(self._items_path, "rb") as f:
+            f.seek(self._items_offset)
+            tail = f.read()
+        complete = tail[: tail.rfind(b"\n") + 1]
+        self._items_offset += len(complete)
+        rewritten = False
+        for line in complete.splitlines():
+            record = json.loads(line)
+            row = record.pop("row")
+            if row < self.count:
+                rewritten = rewritten or row < first_new_row
+                self.ids[row] = record["id"]
+                self.items[row] = record
+                self._rows[record["id"]] = row
+
+        capacity = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        if capacity != self._capacity:
+            if self._vectors is not None:
+                del self._vectors
+            self._vectors = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r+",
+                shape=(capacity, self.dim),
+            )
+        if rewritten:
+            self._index = None
+        elif self._index is not None and self.count > first_new_row:
+            self._index.add(self._vectors[first_new_row : self.count], first_new_row)
+
+    def upsert(
+        self,
+        embedding_model: str,
+        documents: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+    ) -> int:
+        """Stores documents and their embeddings, replacing existing ids.
+
+        Returns:
+            The number of documents in the collection afterwards.
+
+        Raises:
+            ValueError: If the embeddings come from a different model or have
+                a different dimension than the collection.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            if self.count == 0 and self._vectors is None:
+                os.makedirs(self.path, exist_ok=True)
+                self.dim = matrix.shape[1]
+                self.embedding_model = embedding_model
+                self._resize(max(1024, len(documents)))
+            if embedding_model != self.embedding_model or matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Collection uses '{self.embedding_model}' ({self.dim} dims); "
+                    f"got '{embedding_model}' ({matrix.shape[1]} dims)."
+                )
+
+            first_new_row = self.count
+            records = []
+            for document, vector in zip(documents, matrix):
+                row = self._rows.get(document["id"])
+                if row is None:
+                    row = self.count
+                    if row >= self._capacity:
+                        self._resize(self._capacity * 2)
+                    self.count += 1
+                    self._rows[document["id"]] = row
+                    self.ids.append(document["id"])
+                    self.items.append({})
+                elif self._index is not None:
+                    # Moving an existing row between lists is not supported;
+                    # rebuild the index on the next query instead.
+                    self._index = None
+                self._vectors[row] = vector
+                record = {
+                    "id": document["id"],
+                    "text": document["text"],
+                    "metadata": document.get("metadata") or {},
+                }
+                self.items[row] = record
+                records.append({**record, "row": row})
+
+            self._vectors.flush()
+            with open(self._items_path, "ab") as f:
+                f.writelines(
+                    (json.dumps(record) + "\n").encode("utf-8") for record in records
+                )
+                self._items_offset = f.tell()
+            self._write_header()
+            if self._index is not None and self.count > first_new_row:
+                self._index.add(
+                    self._vectors[first_new_row : self.count], first_new_row
+                )
+            return self.count
+
+    def query(
+        self, embedding_model: str, embedding: List[float], top_k: int, exact: bool
+    ) -> List[VectorMatch]:
+        """Returns the `top_k` documents most similar to `embedding`.
+
+        Collections with at least `index_threshold` rows are searched through
+        an approximate IVF index unless `exact` is set.
+        """
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            if self.count == 0 or self._vectors is None:
+                return []
+            if embedding_model != self.embedding_model:
+                raise ValueError(
+                    f"Collection uses '{self.embedding_model}', not '{embedding_model}'."
+                )
+            query = np.asarray(embedding, dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+
+            vectors = self._vectors[: self.count]
+            if exact or self.count < self.index_threshold:
+                rows = None
+                scores = vectors @ query
+            else:
+                if self._index is None or self._index.size != self.count:
+                    self._index = _IVFIndex(np.asarray(vectors), self.nprobe)
+                rows = self._index.candidates(query)
+                scores = vectors[rows] @ query
+
+            k = min(top_k, len(scores))
+            if k == 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [
+                VectorMatch(
+                    id=self.ids[row],
+                    score=float(scores[position]),
+                    text=self.items[row]["text"],
+                    metadata=self.items[row]["metadata"],
+                )
+                for position, row in (
+                    (int(p), int(rows[p]) if rows is not None else int(p)) for p in best
+                )
+            ]
+
+    @property
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _resize(self, capacity: int):
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+
+    def _write_header(self):
+        tmp_path = self._header_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "count": self.count,
+                    "embedding_model": self.embedding_model,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._header_path)
+
+
+class VectorStore:
+    """Opens collections under a root directory on first use."""
+
+    def __init__(self, root: str, index_threshold: int = 50_000, nprobe: int = 8):
+        """Initializes the store.
+
+        Args:
+            root: Directory holding one sub-directory per collection.
+            index_threshold: Row count from which queries use the IVF index.
+            nprobe: Number of IVF buckets scanned per query.
+        """
+        self.root = root
+        self.index_threshold = index_threshold
+        self.nprobe = nprobe
+        self._collections: Dict[str, Collection] = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> Collection:
+        """Returns the named collection, loading it from disk if needed.
+
+        Raises:
+            ValueError: If the name is not a valid collection name.
+        """
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name '{name}'.")
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = Collection(
+                    os.path.join(self.root, name), self.index_threshold, self.nprobe
+                )
+            return self._collections[name]
@@ -0,0 +1,130 @@
+"""
+Measures the import cost of the backend's modules and provider SDKs.
+
+Each module is imported in a fresh interpreter with `-X importtime`, so the
+numbers are what a cold serverless start pays for it. Run from `backend/`:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --max-ms main=1500 --json import_time.json
+
+Exits with status 1 if any `--max-ms` budget is exceeded.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "main",
+    "ai.llm_manager",
+    "ai.providers.openai_provider",
+    "ai.providers.anthropic_provider",
+    "ai.providers.gemini_provider",
+    "openai",
+    "anthropic",
+    "google.genai",
+    "langchain_openai",
+    "langchain_core",
+    "numpy",
+    "sqlalchemy",
+    "fastapi",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str, repeat: int) -> dict:
+    """Imports `module` in `repeat` fresh interpreters and keeps the fastest run."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=backend_dir,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+
+        total_us = 0
+        heaviest = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            cumulative_us = int(match.group(2))
+            depth = len(match.group(3)) // 2
+            name = match.group(4)
+            if name == module:
+                total_us = cumulative_us
+            if depth == 1:
+                heaviest.append((cumulative_us, name))
+
+        if best is None or total_us < best["total_ms"] * 1000:
+            heaviest.sort(reverse=True)
+            best = {
+                "module": module,
+                "total_ms": total_us / 1000,
+                "heaviest_imports": [
+                    {"module": name, "ms": us / 1000} for us, name in heaviest[:5]
+                ],
+            }
+    return best
+
+
+def parse_budgets(values: list[str]) -> dict[str, float]:
+    budgets = {}
+    for value in values:
+        module, _, limit = value.partition("=")
+        budgets[module] = float(limit)
+    return budgets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "modules", nargs="*", help="Modules to measure. Defaults to a standard set."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per module; the fastest is kept."
+    )
+    parser.add_argument(
+        "--max-ms",
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Fail if MODULE takes longer than MS milliseconds to import.",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.max_ms)
+    modules = args.modules or DEFAULT_MODULES
+    results = [measure(module, args.repeat) for module in modules]
+
+    failed = False
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<36} error: {result['error']}")
+            continue
+        budget = budgets.get(result["module"])
+        over = budget is not None and result["total_ms"] > budget
+        failed |= over
+        suffix = f"  OVER BUDGET ({budget:.0f} ms)" if over else ""
+        print(f"{result['module']:<36} {result['total_ms']:>9.1f} ms{suffix}")
+        for child in result["heaviest_imports"]:
+            print(f"    {child['module']:<32} {child['ms']:>9.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
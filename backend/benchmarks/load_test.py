@@ -0,0 +1,263 @@
+"""
+Load-tests the backend's own overhead against the in-process fake provider.
+
+Requests go through the real FastAPI app (middleware, routing, validation,
+caches, database) over an in-memory ASGI transport, so no network or paid
+API is involved. The fake provider is configured with `FAKE_*` variables,
+e.g. `FAKE_LATENCY_MS=0` to isolate the backend; `--cassettes` replays
+recorded provider traffic instead. Run from `backend/`:
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --requests 2000 --concurrency 64 \\
+        --json load_test.json --compare previous.json
+
+Captcha verification is bypassed, since it is a network call to hCaptcha.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = {
+    "test": ("POST", "/api/v1/test", lambda i: {"prompt": f"Benchmark prompt {i}"}),
+    "embed": ("POST", "/api/v1/embed", lambda i: {"text": f"Benchmark text {i}"}),
+    "settings": ("GET", "/api/v1/settings", None),
+}
+
+
+def configure_environment(args: argparse.Namespace):
+    """Selects the fake provider and isolates the run from local state."""
+    from ai.llm_manager import PROVIDER_REGISTRY
+
+    # Blank keys are skipped by the manager and not overridden by `.env`.
+    for name in PROVIDER_REGISTRY:
+        if name != "fake":
+            os.environ[f"{name.upper()}_API_KEY"] = ""
+    if args.cassettes:
+        os.environ["LLM_CASSETTE_MODE"] = "replay"
+        os.environ["LLM_CASSETTE_DIR"] = args.cassettes
+        # Benchmark prompts differ from the recorded ones.
+        os.environ.setdefault("LLM_CASSETTE_STRICT", "false")
+    else:
+        os.environ.setdefault("FAKE_API_KEY", "benchmark")
+        os.environ["DEFAULT_PROVIDER"] = "fake"
+    if args.latency_ms is not None:
+        os.environ["FAKE_LATENCY_MS"] = str(args.latency_ms)
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    )
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+    os.environ.setdefault("VECTOR_STORE_PATH", os.path.join(workdir, "vectors"))
+    os.environ.setdefault("SETTINGS_REFRESH_INTERVAL", "0")
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(
+    client: httpx.AsyncClient, endpoint: str, count: int, concurrency: int, offset: int
+) -> tuple[list[float], int, float]:
+    """Sends `count` requests with at most `concurrency` in flight.
+
+    Returns the latencies in seconds, the number of failed requests and the
+    wall-clock duration.
+    """
+    method, path, body = ENDPOINTS[endpoint]
+    latencies: list[float] = []
+    errors = 0
+    next_index = offset
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < offset + count:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.request(
+                method, path, json=body(index) if body else None
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def measure_memory(
+    client: httpx.AsyncClient, endpoint: str, count: int, concurrency: int, offset: int
+) -> dict:
+    """Traces allocations over a separate pass, so they do not skew latency."""
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    await drive(client, endpoint, count, concurrency, offset)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_kib_per_in_flight_request": (peak - baseline)
+        / 1024
+        / min(concurrency, count),
+        "retained_kib_per_request": (current - baseline) / 1024 / count,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import main
+    from app.api.v1 import dependencies
+
+    # The engine echoes every statement by default, which would dominate.
+    main.engine.echo = False
+    main.app.dependency_overrides[dependencies.verify_captcha] = lambda: None
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            offset = 0
+            for endpoint in args.endpoints:
+                await drive(client, endpoint, args.warmup, args.concurrency, offset)
+                offset += args.warmup
+                latencies, errors, elapsed = await drive(
+                    client, endpoint, args.requests, args.concurrency, offset
+                )
+                offset += args.requests
+                memory = await measure_memory(
+                    client, endpoint, args.memory_requests, args.concurrency, offset
+                )
+                offset += args.memory_requests
+
+                ordered = sorted(latencies)
+                results.append(
+                    {
+                        "endpoint": endpoint,
+                        "requests": len(latencies),
+                        "errors": errors,
+                        "throughput_rps": len(latencies) / elapsed,
+                        "latency_ms": {
+                            "mean": statistics.fmean(ordered) * 1000,
+                            "p50": percentile(ordered, 0.50) * 1000,
+                            "p95": percentile(ordered, 0.95) * 1000,
+                            "p99": percentile(ordered, 0.99) * 1000,
+                            "max": ordered[-1] * 1000,
+                        },
+                        "memory": memory,
+                    }
+                )
+            fake = main.app.state.llm_manager.providers.get("fake")
+            # The fake provider may itself be wrapped by a cassette recorder.
+            fake_config = getattr(getattr(fake, "inner", fake), "config", None)
+            fake_config = asdict(fake_config) if fake_config is not None else None
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "concurrency": args.concurrency,
+        "fake_provider": fake_config,
+        "cassettes": args.cassettes,
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }
+
+
+def print_report(report: dict, previous: dict | None):
+    baseline = {
+        result["endpoint"]: result for result in (previous or {}).get("results", [])
+    }
+    print(
+        f"{'endpoint':<10} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'errors':>7} {'KiB/req':>9}"
+    )
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        print(
+            f"{result['endpoint']:<10} {result['throughput_rps']:>9.1f} "
+            f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f} "
+            f"{result['errors']:>7} "
+            f"{result['memory']['peak_kib_per_in_flight_request']:>9.1f}"
+        )
+        old = baseline.get(result["endpoint"])
+        if old:
+            rps = result["throughput_rps"] / old["throughput_rps"] - 1
+            p95 = latency["p95"] / old["latency_ms"]["p95"] - 1
+            print(f"{'':<10} {rps:>+9.1%} {'':>9} {p95:>+9.1%}  vs {previous['label']}")
+    print(f"max RSS: {report['max_rss_mib']:.1f} MiB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=list(ENDPOINTS),
+        default=list(ENDPOINTS),
+        help="Endpoints to drive, one after another.",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--warmup", type=int, default=20, help="Untimed requests per endpoint."
+    )
+    parser.add_argument(
+        "--memory-requests",
+        type=int,
+        default=100,
+        help="Requests per endpoint in the separate allocation-tracing pass.",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, help="Shortcut for FAKE_LATENCY_MS."
+    )
+    parser.add_argument(
+        "--cassettes",
+        metavar="DIR",
+        help="Replay recorded provider cassettes instead of the fake provider.",
+    )
+    parser.add_argument("--label", default="run", help="Name stored with the results.")
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Earlier --json results to compare against.")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    report = asyncio.run(run(args))
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = sum(result["errors"] for result in report["results"])
+    injected = (report["fake_provider"] or {}).get("error_rate")
+    return 1 if failed and not injected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
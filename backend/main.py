@@ -1,17 +1,36 @@
+import asyncio
 import contextlib
 import logging
+import os
 import sys
+import tempfile
+import time
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.api.v1.endpoints import playground
+from app.api.v1 import dependencies
+from app.api.v1.endpoints import (
+    compare,
+    jobs,
+    playground,
+    prompts,
+    sessions,
+    vectors,
+)
 from ai.llm_manager import LLMManager
-from app.database import get_db, engine, Base
-from app import crud, models
+from app.database import get_db, engine, Base, AsyncSessionLocal
+from app import crud, metrics, models
+from ai.metrics import REGISTRY
+from app.conversations import ContextBuilder
+from app.jobs import JobRunner
+from app.prompt_library import PromptLibrary
+from app.request_log import RequestLogWriter
+from app.vector_store import VectorStore
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,63 +41,197 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@contextlib.contextmanager
+def startup_phase(name: str):
+    """Logs how long a phase of application startup took."""
+    started = time.perf_counter()
+    yield
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Startup phase '{name}' took {elapsed_ms:.0f} ms.")
+
+
+async def apply_settings(llm_manager: LLMManager, snapshot: models.SettingsSnapshot):
+    """Applies a settings snapshot to the LLM manager."""
+    llm_manager.set_provider(snapshot.provider)
+    provider = llm_manager.get_current_provider()
+    await provider.set_model(snapshot.model)
+    await provider.set_temperature(snapshot.temperature)
+
+
+async def refresh_settings_snapshot(app: FastAPI, interval: float):
+    """
+    Periodically checks the settings version so that updates made through
+    another worker process reach this one's snapshot and LLM manager.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                version = await crud.get_settings_version(db)
+                if version is None or version == app.state.settings_snapshot.version:
+                    continue
+                db_settings = await crud.get_settings(db)
+            if db_settings is None:
+                continue
+            snapshot = models.SettingsSnapshot.from_model(db_settings)
+            await apply_settings(app.state.llm_manager, snapshot)
+            app.state.settings_snapshot = snapshot
+            logger.info(f"Settings refreshed to version {snapshot.version}.")
+        except Exception as e:
+            logger.warning(f"Settings refresh failed: {e}")
+
+
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Application startup: Creating database tables...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created (if they didn't exist).")
+    startup_started = time.perf_counter()
 
-    logger.info("Initializing and validating LLM providers...")
-    llm_manager = LLMManager()
+    with startup_phase("providers"):
+        logger.info("Initializing LLM providers...")
+        llm_manager = LLMManager()
+        # Validation runs concurrently for all providers, under one deadline,
+        # and overlaps with the database setup below. In "background" mode the
+        # app starts serving right away and requests for a provider that is
+        # still pending wait for its check to finish.
+        llm_manager.start_validation(
+            float(os.getenv("PROVIDER_VALIDATION_TIMEOUT", "10"))
+        )
 
-    try:
-        await llm_manager.validate_providers()
-    except Exception as e:
-        logger.warning(f"CRITICAL: Unable to validate providers: {e}")
+    with startup_phase("database"):
+        logger.info("Application startup: Creating database tables...")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables created (if they didn't exist).")
+
+    if os.getenv("PROVIDER_VALIDATION_MODE", "blocking") == "background":
+        logger.info(
+            f"Validating providers in the background: {llm_manager.pending_providers}"
+        )
+    else:
+        with startup_phase("validation"):
+            try:
+                await llm_manager.wait_for_validation()
+            except Exception as e:
+                logger.warning(f"CRITICAL: Unable to validate providers: {e}")
 
     app.state.llm_manager = llm_manager
+    metrics.observe_llm_manager(llm_manager)
     logger.info("LLM Manager initialized.")
 
-    logger.info("Loading initial settings from database...")
-    async for db in get_db():
-        try:
-            db_settings = await crud.get_settings(db)
+    app.state.captcha_client = dependencies.create_http_client()
 
-            if not db_settings:
-                logger.info("No settings found. Seeding database with defaults...")
+    app.state.prompt_library = PromptLibrary(
+        max_entries=int(os.getenv("PROMPT_LIBRARY_CACHE_ENTRIES", "1024"))
+    )
 
-                default_provider_name = list(llm_manager.providers.keys())[0]
-                default_provider = llm_manager.providers[default_provider_name]
-                available_models = await default_provider.list_models()
-                default_model = (
-                    available_models[0] if available_models else "default-model"
-                )
+    app.state.context_builder = ContextBuilder(
+        default_max_tokens=int(os.getenv("SESSION_MAX_CONTEXT_TOKENS", "8000")),
+        response_reserve=int(os.getenv("SESSION_RESPONSE_RESERVE_TOKENS", "1024")),
+        summarize=os.getenv("SESSION_SUMMARIZE", "true").lower() == "true",
+        summary_max_tokens=int(os.getenv("SESSION_SUMMARY_MAX_TOKENS", "256")),
+    )
+
+    request_log = RequestLogWriter(
+        AsyncSessionLocal,
+        enabled=os.getenv("REQUEST_LOG_ENABLED", "true").lower() == "true",
+        max_queue=int(os.getenv("REQUEST_LOG_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("REQUEST_LOG_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("REQUEST_LOG_FLUSH_INTERVAL", "1.0")),
+    )
+    request_log.start()
+    app.state.request_log = request_log
+    metrics.observe_request_log(request_log)
+
+    job_runner = JobRunner(
+        llm_manager,
+        app.state.prompt_library,
+        AsyncSessionLocal,
+        request_log=request_log,
+        workers=int(os.getenv("JOB_WORKERS", "4")),
+        max_queue=int(os.getenv("JOB_QUEUE_SIZE", "1000")),
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "1.0")),
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    )
+    await job_runner.start()
+    app.state.job_runner = job_runner
+
+    app.state.vector_store = VectorStore(
+        # Defaults outside the working directory so that running from the
+        # source tree does not write collections into it.
+        os.getenv(
+            "VECTOR_STORE_PATH",
+            os.path.join(tempfile.gettempdir(), "ai_playground_vector_store"),
+        ),
+        index_threshold=int(os.getenv("VECTOR_INDEX_THRESHOLD", "50000")),
+        nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+    )
+
+    with startup_phase("settings"):
+        logger.info("Loading initial settings from database...")
+        async for db in get_db():
+            try:
+                db_settings = await crud.get_settings(db)
+
+                if not db_settings:
+                    logger.info("No settings found. Seeding database with defaults...")
+
+                    # Only pick a default from providers known to be valid.
+                    await llm_manager.wait_for_validation()
+                    default_provider_name = list(llm_manager.providers.keys())[0]
+                    available_models = await llm_manager.list_models(
+                        default_provider_name
+                    )
+                    default_model = (
+                        available_models[0] if available_models else "default-model"
+                    )
+
+                    db_settings = await crud.create_default_settings(
+                        db=db, provider=default_provider_name, model=default_model
+                    )
+                    logger.info(
+                        f"Default settings created: {default_provider_name} / {default_model}"
+                    )
 
-                db_settings = await crud.create_default_settings(
-                    db=db, provider=default_provider_name, model=default_model
-                )
                 logger.info(
-                    f"Default settings created: {default_provider_name} / {default_model}"
+                    f"Applying settings: {db_settings.provider} / {db_settings.model}"
                 )
+                snapshot = models.SettingsSnapshot.from_model(db_settings)
+                await apply_settings(llm_manager, snapshot)
+                app.state.settings_snapshot = snapshot
 
-            logger.info(
-                f"Applying settings: {db_settings.provider} / {db_settings.model}"
-            )
-            llm_manager.set_provider(db_settings.provider)
-            provider = llm_manager.get_current_provider()
-            await provider.set_model(db_settings.model)
-            await provider.set_temperature(db_settings.temperature)
+            except Exception as e:
+                logger.warning(f"CRITICAL: Failed to load or create settings: {e}")
+                raise e
 
-        except Exception as e:
-            logger.warning(f"CRITICAL: Failed to load or create settings: {e}")
-            raise e
+            finally:
+                break
+
+    refresh_interval = float(os.getenv("SETTINGS_REFRESH_INTERVAL", "30"))
+    refresh_task = (
+        asyncio.create_task(refresh_settings_snapshot(app, refresh_interval))
+        if refresh_interval > 0
+        else None
+    )
 
-        finally:
-            break
+    logger.info(
+        f"Startup finished in {(time.perf_counter() - startup_started) * 1000:.0f} ms."
+    )
 
     yield
 
+    if refresh_task is not None:
+        refresh_task.cancel()
+
+    logger.info("Application shutdown: Stopping job workers...")
+    await job_runner.aclose()
+
+    logger.info("Application shutdown: Flushing the request log...")
+    await request_log.aclose(float(os.getenv("REQUEST_LOG_SHUTDOWN_TIMEOUT", "10")))
+
+    logger.info("Application shutdown: Closing LLM provider clients...")
+    await llm_manager.aclose()
+    await app.state.captcha_client.aclose()
+
 
 app = FastAPI(
     lifespan=lifespan,
@@ -99,15 +252,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "X-Captcha-Session", "Retry-After"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
+app.add_middleware(dependencies.CaptchaSessionMiddleware)
+
 app.include_router(
     playground.router,
     prefix="/api/v1",
     tags=["Playground"],
 )
 
+app.include_router(
+    compare.router,
+    prefix="/api/v1",
+    tags=["Compare"],
+)
+
+app.include_router(
+    prompts.router,
+    prefix="/api/v1",
+    tags=["Prompts"],
+)
+
+app.include_router(
+    sessions.router,
+    prefix="/api/v1",
+    tags=["Sessions"],
+)
+
+app.include_router(
+    jobs.router,
+    prefix="/api/v1",
+    tags=["Jobs"],
+)
+
+app.include_router(
+    vectors.router,
+    prefix="/api/v1",
+    tags=["Vectors"],
+)
+
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """
+    Prometheus metrics in the text exposition format. Rendered on the event
+    loop, which is the only thread that records metrics. Each gunicorn worker
+    keeps its own metrics and labels them with `worker`, so aggregate across
+    workers in queries, e.g. `sum without (worker) (...)`.
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,70 @@
+import contextlib
+import os
+import tempfile
+
+# The app reads its configuration at import time, so the test environment is
+# set up before anything from it is imported: an SQLite database in a
+# temporary directory and only the deterministic fake provider.
+DATA_DIR = tempfile.mkdtemp(prefix="ai_playground_tests_")
+for name in ("OPENAI", "ANTHROPIC", "GEMINI", "DEEPSEEK", "XAI"):
+    os.environ.pop(f"{name}_API_KEY", None)
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{DATA_DIR}/test.db",
+        "FAKE_API_KEY": "test",
+        "DEFAULT_PROVIDER": "fake",
+        "FAKE_LATENCY_MS": "0",
+        "FAKE_EMBEDDING_DIMENSIONS": "16",
+        "EMBEDDING_CACHE_PATH": "",
+        "VECTOR_STORE_PATH": os.path.join(DATA_DIR, "vector_store"),
+        "SETTINGS_REFRESH_INTERVAL": "0",
+        "LLM_CASSETTE_MODE": "",
+    }
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from ai.llm_manager import LLMManager  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def llm_manager():
+    """A fresh LLM manager with only the fake provider."""
+    LLMManager._instance = None
+    manager = LLMManager()
+    yield manager
+    LLMManager._instance = None
+
+
+@contextlib.contextmanager
+def run_app():
+    """Runs the app's lifespan around a test client."""
+    import main
+    from app.database import engine
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+    # The next test starts on a new database file.
+    engine.sync_engine.dispose(close=False)
+
+
+@pytest.fixture
+def client(llm_manager):
+    """A test client for the app, started on an empty database."""
+    import main
+    from app.api.v1.dependencies import verify_captcha
+    from app.database import engine
+
+    database = engine.url.database
+    if os.path.exists(database):
+        os.remove(database)
+    main.app.dependency_overrides[verify_captcha] = lambda: None
+    with run_app() as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
@@ -0,0 +1,70 @@
+import httpx
+import pytest
+
+from app.api.v1 import dependencies
+from tests.conftest import run_app
+
+
+@pytest.fixture
+def captcha(client, monkeypatch):
+    """Enforces the captcha against a fake hCaptcha that accepts "good"."""
+    monkeypatch.setattr(dependencies, "HCAPTCHA_SECRET_KEY", "secret")
+    monkeypatch.setattr(dependencies, "CAPTCHA_SESSION_SECRET", "session-secret")
+    client.app.dependency_overrides.pop(dependencies.verify_captcha)
+    calls = []
+
+    def verify(request):
+        calls.append(request)
+        return httpx.Response(
+            200, json={"success": b"response=good" in request.content}
+        )
+
+    previous = client.app.state.captcha_client
+    client.app.state.captcha_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(verify)
+    )
+    client.portal.call(previous.aclose)
+    return calls
+
+
+def generate(client, **headers):
+    return client.post("/api/v1/test", json={"prompt": "hello"}, headers=headers)
+
+
+def test_captcha_is_required(client, captcha):
+    assert generate(client).status_code == 401
+    assert generate(client, **{"X-Captcha-Token": "bad"}).status_code == 401
+    assert generate(client, **{"X-Captcha-Token": "good"}).status_code == 200
+
+
+def test_session_token_skips_the_captcha_for_the_same_client(client, captcha):
+    first = generate(client, **{"X-Captcha-Token": "good", "User-Agent": "browser"})
+    token = first.headers["X-Captcha-Session"]
+
+    again = generate(client, **{"X-Captcha-Session": token, "User-Agent": "browser"})
+
+    assert again.status_code == 200
+    assert len(captcha) == 1
+
+
+def test_session_token_is_bound_to_the_client(client, captcha):
+    first = generate(client, **{"X-Captcha-Token": "good", "User-Agent": "browser"})
+    token = first.headers["X-Captcha-Session"]
+
+    replayed = generate(client, **{"X-Captcha-Session": token, "User-Agent": "curl"})
+
+    assert replayed.status_code == 401
+
+
+def test_session_token_expires(client, captcha, monkeypatch):
+    monkeypatch.setattr(dependencies, "CAPTCHA_SESSION_TTL", -1)
+    token = generate(client, **{"X-Captcha-Token": "good"}).headers["X-Captcha-Session"]
+
+    assert generate(client, **{"X-Captcha-Session": token}).status_code == 401
+
+
+def test_each_lifespan_gets_an_open_captcha_client(llm_manager):
+    for _ in range(2):
+        with run_app() as test_client:
+            assert not test_client.app.state.captcha_client.is_closed
+        assert test_client.app.state.captcha_client.is_closed
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from ai.providers.base import PromptPrefix
+from ai.providers.cassette import (
+    CASSETTE_SUFFIX,
+    CassetteMissError,
+    RecordingProvider,
+    ReplayProvider,
+    load_replay_providers,
+)
+from ai.providers.fake_provider import FakeProvider, FakeProviderConfig
+
+pytestmark = pytest.mark.anyio
+
+
+def fake_provider():
+    return FakeProvider(
+        api_key="test",
+        config=FakeProviderConfig(latency_ms=0, embedding_dimensions=8),
+    )
+
+
+async def record(directory, prompts, pid=None, monkeypatch=None):
+    if pid is not None:
+        monkeypatch.setattr(os, "getpid", lambda: pid)
+    recorder = RecordingProvider(fake_provider(), str(directory))
+    texts = [await recorder.generate_text(prompt) for prompt in prompts]
+    await recorder.aclose()
+    return texts
+
+
+async def test_replay_returns_recorded_generations(tmp_path):
+    recorder = RecordingProvider(fake_provider(), str(tmp_path))
+    prefix = PromptPrefix(system="Be brief.")
+    text = await recorder.generate_text("hello", prefix=prefix)
+    streamed = [chunk.text async for chunk in recorder.stream_text("streamed")]
+    vector = await recorder.generate_embedding("embed me")
+    models = await recorder.list_models()
+    await recorder.aclose()
+
+    replay = load_replay_providers(str(tmp_path), latency_scale=0)["fake"]
+
+    assert await replay.generate_text("hello", prefix=prefix) == text
+    assert [c.text async for c in replay.stream_text("streamed")] == streamed
+    assert await replay.generate_embedding("embed me") == pytest.approx(vector)
+    assert await replay.list_models() == models
+    assert replay.misses == 0
+
+
+async def test_strict_replay_raises_on_a_miss(tmp_path):
+    await record(tmp_path, ["hello"])
+    replay = load_replay_providers(str(tmp_path), latency_scale=0)["fake"]
+
+    with pytest.raises(CassetteMissError):
+        await replay.generate_text("never recorded")
+    with pytest.raises(CassetteMissError):
+        await replay.generate_text("hello", temperature=0.1)
+
+
+async def test_lenient_replay_rotates_through_recordings(tmp_path):
+    texts = await record(tmp_path, ["a", "b"])
+    replay = load_replay_providers(str(tmp_path), latency_scale=0, strict=False)["fake"]
+
+    served = [await replay.generate_text(f"unseen {i}") for i in range(4)]
+
+    assert served == texts * 2
+    assert replay.misses == 4
+
+
+async def test_each_process_records_its_own_cassette(tmp_path, monkeypatch):
+    first = await record(tmp_path, ["a"], pid=101, monkeypatch=monkeypatch)
+    second = await record(tmp_path, ["b"], pid=202, monkeypatch=monkeypatch)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        f"fake.101{CASSETTE_SUFFIX}",
+        f"fake.202{CASSETTE_SUFFIX}",
+    ]
+    for pid in (101, 202):
+        with gzip.open(tmp_path / f"fake.{pid}{CASSETTE_SUFFIX}", "rt") as f:
+            assert json.loads(f.readline())["op"] == "provider"
+
+    providers = load_replay_providers(str(tmp_path), latency_scale=0)
+    assert list(providers) == ["fake"]
+    assert await providers["fake"].generate_text("a") == first[0]
+    assert await providers["fake"].generate_text("b") == second[0]
+
+
+async def test_truncated_cassette_keeps_its_complete_entries(tmp_path):
+    texts = await record(tmp_path, ["a", "b"])
+    (path,) = tmp_path.iterdir()
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) - 12])
+
+    replay = ReplayProvider(str(path), latency_scale=0)
+
+    assert replay.name == "fake"
+    assert await replay.generate_text("a") == texts[0]
+
+
+async def test_recorder_delegates_provider_state(tmp_path):
+    inner = fake_provider()
+    recorder = RecordingProvider(inner, str(tmp_path))
+
+    assert recorder.api_key == inner.api_key
+    assert recorder.http_client is inner.http_client
+    with pytest.raises(NotImplementedError):
+        recorder.llm
+    await recorder.set_model("fake-small")
+    assert recorder.model == "fake-small"
+
+    await recorder.aclose()
+
+    assert inner.http_client.is_closed
+    assert os.listdir(tmp_path) == []
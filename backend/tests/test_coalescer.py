@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from ai.coalescer import RequestCoalescer
+
+pytestmark = pytest.mark.anyio
+
+
+def upstream(result="answer", delay=0.01):
+    calls = []
+
+    async def call():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        return result
+
+    return call, calls
+
+
+async def test_concurrent_identical_calls_share_one_upstream_call():
+    coalescer = RequestCoalescer()
+    call, calls = upstream()
+
+    results = await asyncio.gather(*(coalescer.run("k", call) for _ in range(5)))
+
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert coalescer.stats()["saved_calls"] == 4
+
+
+async def test_different_keys_and_later_calls_are_not_merged():
+    coalescer = RequestCoalescer()
+    call, calls = upstream()
+
+    await asyncio.gather(coalescer.run("a", call), coalescer.run("b", call))
+    await coalescer.run("a", call)
+
+    assert len(calls) == 3
+
+
+async def test_errors_reach_every_waiter():
+    coalescer = RequestCoalescer()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(
+        coalescer.run("k", fail), coalescer.run("k", fail), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["upstream failed"] * 2
+
+
+async def test_cancelled_waiter_leaves_the_call_to_the_others():
+    coalescer = RequestCoalescer()
+    call, calls = upstream(delay=0.05)
+    first = asyncio.create_task(coalescer.run("k", call))
+    second = asyncio.create_task(coalescer.run("k", call))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+
+    assert await second == "answer"
+    assert len(calls) == 1
+    assert coalescer.stats()["cancelled_calls"] == 0
+
+
+async def test_call_is_cancelled_once_every_waiter_is_gone():
+    coalescer = RequestCoalescer()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(coalescer.run("k", call))
+    await started.wait()
+    waiter.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert coalescer.stats()["cancelled_calls"] == 1
+
+
+async def test_manager_coalesces_identical_generations(llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    calls = []
+    generate_text = provider.generate_text
+
+    async def slow(*args, **kwargs):
+        calls.append(args[0])
+        await asyncio.sleep(0.02)
+        return await generate_text(*args, **kwargs)
+
+    monkeypatch.setattr(provider, "generate_text", slow)
+    config = llm_manager.resolve_config()
+
+    results = await asyncio.gather(
+        llm_manager.generate_text("same", config),
+        llm_manager.generate_text("same", config),
+        llm_manager.generate_text("other", config),
+    )
+
+    assert results[0].text == results[1].text
+    assert sorted(calls) == ["other", "same"]
@@ -0,0 +1,79 @@
+import asyncio
+
+from tests.test_streaming import events
+
+TARGETS = [
+    {"provider": "fake", "model": "fake-large"},
+    {"provider": "fake", "model": "fake-small", "max_tokens": 4},
+]
+
+
+def slow_small_model(llm_manager, monkeypatch):
+    """Makes fake-small hang so that it runs into the compare timeout."""
+    provider = llm_manager.get_current_provider()
+    stream_text = provider.stream_text
+
+    async def stream(prompt, model=None, **kwargs):
+        if model == "fake-small":
+            await asyncio.sleep(10)
+        async for chunk in stream_text(prompt, model=model, **kwargs):
+            yield chunk
+
+    monkeypatch.setattr(provider, "stream_text", stream)
+
+
+def test_compares_targets_side_by_side(client):
+    response = client.post(
+        "/api/v1/compare", json={"prompt": "hello", "targets": TARGETS}
+    )
+
+    assert response.status_code == 200
+    large, small = response.json()["results"]
+    assert (large["model"], small["model"]) == ("fake-large", "fake-small")
+    assert len(small["response"].split()) == 4
+    assert large["response"] != small["response"]
+    assert large["error"] is None and large["usage"]["output_tokens"] > 0
+
+
+def test_slow_target_times_out_without_holding_up_the_others(
+    client, llm_manager, monkeypatch
+):
+    slow_small_model(llm_manager, monkeypatch)
+
+    response = client.post(
+        "/api/v1/compare",
+        json={"prompt": "hello", "targets": TARGETS, "timeout": 0.2},
+    )
+
+    large, small = response.json()["results"]
+    assert large["response"] and not large["timed_out"]
+    assert small["timed_out"] and small["response"] is None
+    assert response.json()["latency_ms"] < 2000
+
+
+def test_stream_interleaves_targets_and_ends_with_done(client):
+    response = client.post(
+        "/api/v1/compare/stream", json={"prompt": "hello", "targets": TARGETS}
+    )
+
+    stream = events(response)
+    results = {data["target"]: data for event, data in stream if event == "result"}
+    for target, result in results.items():
+        tokens = [
+            data["text"]
+            for event, data in stream
+            if event == "token" and data["target"] == target
+        ]
+        assert "".join(tokens) == result["response"]
+    assert sorted(results) == [0, 1]
+    assert stream[-1][0] == "done"
+
+
+def test_unknown_providers_are_rejected(client):
+    response = client.post(
+        "/api/v1/compare",
+        json={"prompt": "hello", "targets": [{"provider": "nope"}]},
+    )
+
+    assert response.status_code == 400
+    assert "nope" in response.json()["detail"]
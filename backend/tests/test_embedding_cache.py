@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from ai.embedding_cache import EmbeddingCache, make_key
+
+pytestmark = pytest.mark.anyio
+
+VECTOR_BYTES = 4 * 4
+
+
+def vector(seed):
+    return [float(seed), 1.0, 2.0, 3.0]
+
+
+def stored_bytes(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT SUM(LENGTH(vector)) FROM embeddings").fetchone()[0]
+
+
+def test_keys_ignore_whitespace_differences_only():
+    assert make_key("p", "m", "a  b\n") == make_key("p", "m", "a b")
+    assert make_key("p", "m", "a b") != make_key("p", "other", "a b")
+
+
+async def test_memory_hit_and_miss():
+    cache = EmbeddingCache()
+    await cache.put_many({"a": vector(1)})
+
+    assert await cache.get_many(["a", "b"]) == {"a": vector(1)}
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+async def test_memory_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(memory_max_bytes=2 * VECTOR_BYTES)
+    await cache.put_many({"a": vector(1), "b": vector(2)})
+    await cache.get_many(["a"])
+    await cache.put_many({"c": vector(3)})
+
+    assert set(await cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+async def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(disk_path=path)
+    await cache.put_many({"a": vector(1)})
+    cache.close()
+
+    restarted = EmbeddingCache(disk_path=path)
+
+    assert await restarted.get_many(["a"]) == {"a": vector(1)}
+    assert restarted.stats()["disk_hits"] == 1
+    restarted.close()
+
+
+async def test_disk_tier_evicts_by_size(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(memory_max_bytes=0, disk_path=path, disk_max_bytes=48)
+    for seed in range(5):
+        await cache.put_many({str(seed): vector(seed)})
+    await cache.put_many({"4": vector(40)})
+
+    assert set(await cache.get_many([str(seed) for seed in range(5)])) == {
+        "2",
+        "3",
+        "4",
+    }
+    assert cache.stats()["disk_bytes"] == stored_bytes(path) == 3 * VECTOR_BYTES
+    cache.close()
+
+
+async def test_processes_sharing_a_file_share_its_size_bound(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    first = EmbeddingCache(memory_max_bytes=0, disk_path=path, disk_max_bytes=64)
+    second = EmbeddingCache(memory_max_bytes=0, disk_path=path, disk_max_bytes=64)
+
+    for seed in range(6):
+        await first.put_many({f"first-{seed}": vector(seed)})
+        await second.put_many({f"second-{seed}": vector(seed)})
+
+    assert stored_bytes(path) == 64
+    assert second.stats()["disk_bytes"] == 64
+    first.close()
+    second.close()
+
+
+async def test_existing_file_without_size_row_is_counted(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO embeddings VALUES ('old', zeroblob(16), 0)")
+    conn.close()
+
+    cache = EmbeddingCache(disk_path=path)
+
+    assert cache.stats()["disk_bytes"] == VECTOR_BYTES
+    cache.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from ai.providers.base import split_batches
+
+pytestmark = pytest.mark.anyio
+
+
+def test_split_batches_bounds_items_and_tokens():
+    texts = ["one"] * 5
+
+    assert split_batches(texts, max_items=2, max_tokens=100) == [
+        ["one", "one"],
+        ["one", "one"],
+        ["one"],
+    ]
+    assert [len(batch) for batch in split_batches(["x" * 400] * 3, 10, 150)] == [
+        1,
+        1,
+        1,
+    ]
+
+
+async def test_batches_keep_input_order(llm_manager):
+    provider = llm_manager.get_current_provider()
+    texts = [f"text {i}" for i in range(7)]
+    provider.embedding_batch_size = 3
+
+    batched = await provider.generate_embeddings(texts)
+
+    assert batched == [await provider.generate_embedding(text) for text in texts]
+
+
+async def test_manager_embeds_each_distinct_text_once(llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    sent = []
+    embed_batch = provider._embed_batch
+
+    async def recorded(texts):
+        sent.extend(texts)
+        return await embed_batch(texts)
+
+    monkeypatch.setattr(provider, "_embed_batch", recorded)
+
+    first = await llm_manager.generate_embeddings(["a", "b", "a"])
+    second = await llm_manager.generate_embeddings(["b", "c"])
+
+    assert first[0] == first[2] != first[1]
+    # Cached vectors are stored as float32.
+    assert second[0] == pytest.approx(first[1], abs=1e-6)
+    assert sorted(sent) == ["a", "b", "c"]
+
+
+def test_batch_endpoint_returns_full_vectors_in_order(client):
+    texts = ["first", "second", "first"]
+
+    response = client.post("/api/v1/embed/batch", json={"texts": texts})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["model"] == "fake-embedding"
+    assert len(body["embeddings"]) == 3
+    assert all(len(vector) == 16 for vector in body["embeddings"])
+    assert body["embeddings"][0] == body["embeddings"][2]
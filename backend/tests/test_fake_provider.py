@@ -0,0 +1,144 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from ai.providers.base import PromptPrefix
+from ai.providers.fake_provider import (
+    FAKE_MODELS,
+    FakeProvider,
+    FakeProviderConfig,
+    FakeProviderError,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def fake(**settings):
+    settings.setdefault("latency_ms", 0)
+    settings.setdefault("embedding_dimensions", 8)
+    return FakeProvider(api_key="test", config=FakeProviderConfig(**settings))
+
+
+async def test_completions_depend_only_on_the_input():
+    first, second = fake(), fake(seed=1)
+
+    text = await first.generate_text("hello")
+
+    assert text == await second.generate_text("hello")
+    assert text != await first.generate_text("goodbye")
+    assert text != await first.generate_text("hello", model="fake-small")
+    assert len(text.split()) == 64
+    assert len((await first.generate_text("hello", max_tokens=5)).split()) == 5
+
+
+async def test_streams_yield_the_completion_then_usage():
+    provider = fake()
+
+    chunks = [chunk async for chunk in provider.stream_text("hello", max_tokens=4)]
+
+    assert "".join(chunk.text for chunk in chunks) == await provider.generate_text(
+        "hello", max_tokens=4
+    )
+    assert len(chunks) == 5
+    assert chunks[-1].usage["output_tokens"] == 4
+
+
+async def test_repeated_prefixes_are_reported_as_cache_reads():
+    provider = fake()
+    prefix = PromptPrefix(system="Be brief.", context=("A document.",))
+
+    await provider.generate_text("one", prefix=prefix)
+    chunks = [chunk async for chunk in provider.stream_text("two", prefix=prefix)]
+
+    details = chunks[-1].usage["input_token_details"]
+    assert details == {"cache_read": prefix.estimated_tokens()}
+
+
+async def test_embeddings_are_deterministic_unit_vectors():
+    provider = fake()
+
+    first, other = await provider._embed_batch(["text", "other"])
+
+    assert len(first) == 8
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    assert first == await fake(seed=7).generate_embedding("text")
+    assert first != other
+    assert await provider.get_embedding_model() == "fake-embedding"
+
+
+async def test_embeddings_can_be_disabled():
+    provider = fake(embedding_dimensions=0)
+
+    assert await provider.get_embedding_model() is None
+    with pytest.raises(NotImplementedError):
+        await provider.generate_embedding("text")
+
+
+@pytest.mark.parametrize(
+    "distribution", ["uniform", "normal", "lognormal", "exponential"]
+)
+def test_latencies_follow_a_seeded_distribution(distribution):
+    def samples(seed):
+        provider = fake(
+            latency_distribution=distribution,
+            latency_ms=100,
+            latency_spread_ms=20,
+            seed=seed,
+        )
+        return [provider._latency() for _ in range(2000)]
+
+    latencies = samples(1)
+
+    assert latencies == samples(1)
+    assert latencies != samples(2)
+    assert min(latencies) >= 0
+    assert sum(latencies) / len(latencies) == pytest.approx(0.1, rel=0.1)
+
+
+async def test_latency_and_streaming_rate_are_applied():
+    provider = fake(latency_ms=50, tokens_per_second=200, response_tokens=10)
+
+    started = time.perf_counter()
+    await provider.generate_text("hello")
+
+    assert time.perf_counter() - started >= 0.05 + 10 / 200
+
+
+async def test_injected_errors_carry_their_status():
+    provider = fake(error_rate=1.0, error_status=400)
+
+    with pytest.raises(FakeProviderError) as raised:
+        await provider.generate_text("hello")
+    assert raised.value.status_code == 400
+    assert await fake(error_rate=0.0).list_models() == FAKE_MODELS
+
+
+async def test_error_rate_is_roughly_honoured():
+    provider = fake(error_rate=0.25, error_status=400)
+    failures = 0
+    for _ in range(400):
+        try:
+            await provider.list_models()
+        except FakeProviderError:
+            failures += 1
+
+    assert math.isclose(failures / 400, 0.25, abs_tol=0.06)
+
+
+def test_config_is_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("FAKE_LATENCY_DISTRIBUTION", "uniform")
+    monkeypatch.setenv("FAKE_LATENCY_MS", "5")
+    monkeypatch.setenv("FAKE_ERROR_RATE", "0.5")
+
+    config = FakeProviderConfig.from_env()
+
+    assert (config.latency_distribution, config.latency_ms, config.error_rate) == (
+        "uniform",
+        5.0,
+        0.5,
+    )
+    monkeypatch.setenv("FAKE_LATENCY_DISTRIBUTION", "pareto")
+    with pytest.raises(ValueError):
+        FakeProviderConfig.from_env()
@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app import crud
+from app.database import AsyncSessionLocal
+
+
+def run(client, operation, *args, **kwargs):
+    """Runs a database operation on the app's event loop."""
+
+    async def call():
+        async with AsyncSessionLocal() as db:
+            return await operation(db, *args, **kwargs)
+
+    return client.portal.call(call)
+
+
+def wait_for(client, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] == status or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def abandoned_job(client, attempts):
+    """A job left running by a process whose lease has expired."""
+    job = run(client, crud.create_job, prompt="abandoned")
+    run(
+        client,
+        crud.update_job,
+        job.id,
+        "queued",
+        status="running",
+        attempts=attempts,
+        claimed_until=datetime.now(timezone.utc) - timedelta(seconds=1),
+    )
+    return job
+
+
+def test_job_runs_to_completion(client):
+    response = client.post("/api/v1/jobs", json={"prompt": "hello", "priority": 3})
+
+    assert response.status_code == 202
+    job = wait_for(client, response.json()["id"], "succeeded")
+    assert job["status"] == "succeeded"
+    assert job["priority"] == 3
+    assert job["response"]
+
+
+def test_jobs_accept_longer_prompts_than_interactive_requests(client):
+    prompt = "word " * 1000
+
+    assert client.post("/api/v1/test", json={"prompt": prompt}).status_code == 422
+    assert client.post("/api/v1/jobs", json={"prompt": "x" * 40_000}).status_code == 422
+    response = client.post("/api/v1/jobs", json={"prompt": prompt})
+    assert response.status_code == 202
+    assert wait_for(client, response.json()["id"], "succeeded")["status"] == "succeeded"
+
+
+def test_expired_jobs_are_taken_by_priority_then_age(client):
+    now = datetime.now(timezone.utc)
+    expired = now - timedelta(seconds=1)
+    low = run(client, crud.create_job, prompt="low", claimed_until=expired)
+    high = run(
+        client, crud.create_job, prompt="high", priority=5, claimed_until=expired
+    )
+    later_low = run(client, crud.create_job, prompt="later", claimed_until=None)
+    run(
+        client,
+        crud.create_job,
+        prompt="leased",
+        priority=9,
+        claimed_until=now + timedelta(minutes=1),
+    )
+
+    until = now + timedelta(minutes=1)
+    taken = run(client, crud.take_expired_jobs, now, until, 10)
+
+    assert [job.id for job in taken] == [high.id, low.id, later_low.id]
+    assert run(client, crud.take_expired_jobs, now, until, 10) == []
+
+
+def test_abandoned_running_job_is_taken_over_and_rerun(client):
+    runner = client.app.state.job_runner
+    job = abandoned_job(client, attempts=1)
+
+    client.portal.call(runner._take_expired)
+
+    finished = wait_for(client, job.id, "succeeded")
+    assert finished["status"] == "succeeded"
+    stored = run(client, crud.get_job, job.id)
+    assert stored.attempts == 2
+
+
+def test_job_abandoned_too_often_fails(client):
+    runner = client.app.state.job_runner
+    job = abandoned_job(client, attempts=runner.max_attempts)
+
+    client.portal.call(runner._take_expired)
+
+    failed = client.get(f"/api/v1/jobs/{job.id}").json()
+    assert failed["status"] == "failed"
+    assert "abandoned" in failed["error"]
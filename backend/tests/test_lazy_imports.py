@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ai.llm_manager import PROVIDER_REGISTRY, load_provider_class
+from ai.providers.base import LLMProvider
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SDK_MODULES = [
+    "openai",
+    "anthropic",
+    "google.genai",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+]
+
+
+def imported_after(code):
+    """Runs `code` in a fresh interpreter and returns the SDKs it imported."""
+    script = (
+        "import json, sys\n"
+        f"{code}\n"
+        f"print(json.dumps([m for m in {SDK_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_manager_imports_no_sdk_without_its_key():
+    # The test environment only sets FAKE_API_KEY.
+    assert (
+        imported_after(
+            "from ai.llm_manager import LLMManager\nLLMManager().get_current_provider()"
+        )
+        == []
+    )
+
+
+def test_a_provider_imports_only_its_own_sdk():
+    imported = imported_after(
+        "from ai.llm_manager import load_provider_class\n"
+        "load_provider_class('anthropic')"
+    )
+
+    assert "anthropic" in imported
+    assert not {"openai", "google.genai", "langchain_openai"} & set(imported)
+
+
+@pytest.mark.parametrize("name", sorted(PROVIDER_REGISTRY))
+def test_registry_entries_resolve_to_their_provider(name):
+    provider_class = load_provider_class(name)
+
+    assert issubclass(provider_class, LLMProvider)
+    assert provider_class.name == name
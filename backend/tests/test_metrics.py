@@ -0,0 +1,92 @@
+import os
+
+from ai.metrics import Registry, record_usage, track_usage
+from ai.providers.fake_provider import FakeProviderError
+
+WORKER = f'worker="{os.getpid()}"'
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("test").observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP latency Latency.", "# TYPE latency histogram"]
+    assert lines[2:] == [
+        f'latency_bucket{{{WORKER},route="test",le="0.1"}} 2',
+        f'latency_bucket{{{WORKER},route="test",le="1"}} 3',
+        f'latency_bucket{{{WORKER},route="test",le="+Inf"}} 4',
+        f'latency_sum{{{WORKER},route="test"}} 3.65',
+        f'latency_count{{{WORKER},route="test"}} 4',
+    ]
+
+
+def test_counters_reuse_label_children_and_escape_values():
+    registry = Registry()
+    counter = registry.counter("errors", "Errors.", ("type",))
+    counter.labels('bad "quote"').inc()
+    counter.labels('bad "quote"').inc(2)
+
+    assert counter.labels('bad "quote"') is counter.labels('bad "quote"')
+    assert f'errors{{{WORKER},type="bad \\"quote\\""}} 3' in registry.render()
+
+
+def test_tracked_usage_adds_up_every_call():
+    with track_usage() as usage:
+        record_usage("fake", "m", {"input_tokens": 3, "output_tokens": 5})
+        record_usage(
+            "fake",
+            "m",
+            {
+                "input_tokens": 4,
+                "output_tokens": 1,
+                "input_token_details": {"cache_read": 2},
+            },
+        )
+    record_usage("fake", "m", {"input_tokens": 100})
+
+    assert usage == {
+        "input_tokens": 7,
+        "output_tokens": 6,
+        "input_token_details": {"cache_read": 2},
+    }
+
+
+def test_metrics_endpoint_reports_requests_tokens_and_errors(
+    client, llm_manager, monkeypatch
+):
+    client.post("/api/v1/test", json={"prompt": "hello", "model": "fake-small"})
+    provider = llm_manager.get_current_provider()
+
+    async def fail(*args, **kwargs):
+        raise FakeProviderError(400, "rejected")
+
+    monkeypatch.setattr(provider, "generate_text", fail)
+    client.post("/api/v1/test", json={"prompt": "hello again"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        f'http_requests_total{{{WORKER},method="POST",route="test_prompt",status="200"}}'
+        in body
+    )
+    assert (
+        f'llm_upstream_duration_seconds_count{{{WORKER},provider="fake",'
+        'model="fake-small",operation="generate"}' in body
+    )
+    assert (
+        f'llm_tokens_total{{{WORKER},provider="fake",model="fake-small",type="output"}}'
+        in body
+    )
+    assert (
+        f'llm_errors_total{{{WORKER},provider="fake",type="FakeProviderError"}}' in body
+    )
+    assert "cache_hit_ratio{" in body
+    assert f'request_log_queue{{{WORKER},kind="capacity"}} 10000' in body
+    assert "db_query_duration_seconds_count{" in body
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ai import model_catalog
+from ai.model_catalog import ModelCatalogCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only the module's clock: the event loop keeps the real one.
+    monkeypatch.setattr(
+        model_catalog, "time", SimpleNamespace(monotonic=lambda: now[0])
+    )
+    return now
+
+
+def loader(*catalogs, error=None):
+    """Returns each catalog in turn, raising `error` once they run out."""
+    remaining = list(catalogs)
+    calls = []
+
+    async def load():
+        calls.append(None)
+        await asyncio.sleep(0)
+        if not remaining:
+            raise error
+        return remaining.pop(0)
+
+    return load, calls
+
+
+async def test_fresh_entries_are_served_from_cache(clock):
+    cache = ModelCatalogCache(ttl=60)
+    load, calls = loader(["a"], ["b"])
+
+    assert await cache.get("fake", load) == ["a"]
+    clock[0] += 59
+    assert await cache.get("fake", load) == ["a"]
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+async def test_stale_entries_are_served_while_refreshing(clock):
+    cache = ModelCatalogCache(ttl=60, stale_ttl=600)
+    load, calls = loader(["a"], ["b"])
+    await cache.get("fake", load)
+    clock[0] += 61
+
+    assert await cache.get("fake", load) == ["a"]
+    assert await cache.get("fake", load) == ["a"]
+    await asyncio.sleep(0.01)
+
+    assert await cache.get("fake", load) == ["b"]
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 2
+
+
+async def test_expired_entries_are_reloaded(clock):
+    cache = ModelCatalogCache(ttl=60, stale_ttl=600)
+    load, calls = loader(["a"], ["b"])
+    await cache.get("fake", load)
+    clock[0] += 661
+
+    assert await cache.get("fake", load) == ["b"]
+    assert len(calls) == 2
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = ModelCatalogCache()
+    load, calls = loader(["a"])
+
+    results = await asyncio.gather(*(cache.get("fake", load) for _ in range(5)))
+
+    assert results == [["a"]] * 5
+    assert len(calls) == 1
+
+
+async def test_failed_refresh_keeps_the_stale_catalog(clock):
+    cache = ModelCatalogCache(ttl=60, stale_ttl=600)
+    load, _ = loader(["a"], error=RuntimeError("upstream down"))
+    await cache.get("fake", load)
+    clock[0] += 61
+
+    assert await cache.get("fake", load) == ["a"]
+    await asyncio.sleep(0.01)
+
+    assert await cache.get("fake", load) == ["a"]
+    assert cache.stats()["refresh_errors"] == 1
+
+
+async def test_invalidate_forces_a_reload():
+    cache = ModelCatalogCache()
+    load, calls = loader(["a"], ["b"])
+    await cache.get("fake", load)
+
+    cache.invalidate("fake")
+
+    assert await cache.get("fake", load) == ["b"]
+    assert len(calls) == 2
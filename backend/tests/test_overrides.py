@@ -0,0 +1,46 @@
+import asyncio
+
+
+def test_overrides_apply_to_one_request_only(client, llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    settings = (provider.model, provider.temperature)
+    seen = []
+    generate_text = provider.generate_text
+
+    async def recorded(prompt, **kwargs):
+        seen.append((kwargs["model"], kwargs["temperature"], kwargs["max_tokens"]))
+        return await generate_text(prompt, **kwargs)
+
+    monkeypatch.setattr(provider, "generate_text", recorded)
+    response = client.post(
+        "/api/v1/test",
+        json={
+            "prompt": "hello",
+            "model": "fake-small",
+            "temperature": 1.5,
+            "max_tokens": 5,
+        },
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["response"].split()) == 5
+    client.post("/api/v1/test", json={"prompt": "hello"})
+    assert seen == [("fake-small", 1.5, 5), (*settings, None)]
+    assert (provider.model, provider.temperature) == settings
+
+
+def test_config_is_fixed_when_resolved(llm_manager):
+    config = llm_manager.resolve_config(max_tokens=3)
+    provider = llm_manager.get_current_provider()
+    asyncio.run(provider.set_model("fake-small"))
+
+    assert config.model == "fake-large"
+    assert llm_manager.resolve_config().model == "fake-small"
+
+
+def test_unknown_provider_and_invalid_overrides_are_rejected(client):
+    unknown = client.post("/api/v1/test", json={"prompt": "hi", "provider": "nope"})
+    too_hot = client.post("/api/v1/test", json={"prompt": "hi", "temperature": 3})
+
+    assert unknown.status_code == 400
+    assert too_hot.status_code == 422
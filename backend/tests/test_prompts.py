@@ -0,0 +1,79 @@
+def create_block(client, kind, name, content):
+    response = client.post(
+        "/api/v1/prompts", json={"kind": kind, "name": name, "content": content}
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def capture_prefixes(llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    prefixes = []
+    generate_text = provider.generate_text
+
+    async def recorded(prompt, **kwargs):
+        prefixes.append(kwargs["prefix"])
+        return await generate_text(prompt, **kwargs)
+
+    monkeypatch.setattr(provider, "generate_text", recorded)
+    return prefixes
+
+
+def test_stored_blocks_are_sent_ahead_of_the_prompt(client, llm_manager, monkeypatch):
+    prefixes = capture_prefixes(llm_manager, monkeypatch)
+    system = create_block(client, "system", "terse", "Answer in one line.")
+    first = create_block(client, "context", "doc 1", "First document.")
+    second = create_block(client, "context", "doc 2", "Second document.")
+
+    response = client.post(
+        "/api/v1/test",
+        json={
+            "prompt": "Summarize.",
+            "system_prompt_id": system,
+            "context_ids": [second, first],
+        },
+    )
+
+    assert response.status_code == 200
+    (prefix,) = prefixes
+    assert prefix.system == "Answer in one line."
+    assert prefix.context == ("Second document.", "First document.")
+    listed = client.get("/api/v1/prompts").json()["blocks"]
+    assert [block["name"] for block in listed] == ["terse", "doc 1", "doc 2"]
+
+
+def test_repeated_prefix_is_reported_as_a_cache_read(client):
+    system = create_block(client, "system", "long", "Stable instructions. " * 50)
+    request = {"prompt": "Hi", "system_prompt_id": system}
+
+    first = client.post("/api/v1/test", json=request).json()["usage"]
+    second = client.post("/api/v1/test", json=request).json()["usage"]
+
+    assert not first.get("input_token_details", {}).get("cache_read")
+    assert second["input_token_details"]["cache_read"] > 0
+
+
+def test_missing_or_misused_blocks_are_rejected(client):
+    context = create_block(client, "context", "doc", "A document.")
+
+    missing = client.post("/api/v1/test", json={"prompt": "Hi", "context_ids": [999]})
+    misused = client.post(
+        "/api/v1/test", json={"prompt": "Hi", "system_prompt_id": context}
+    )
+
+    assert missing.status_code == 404
+    assert misused.status_code == 400
+
+
+def test_blocks_in_use_cannot_be_deleted(client):
+    system = create_block(client, "system", "terse", "Answer in one line.")
+    unused = create_block(client, "context", "doc", "A document.")
+    session = client.post("/api/v1/sessions", json={"system_prompt_id": system})
+    assert session.status_code == 201
+
+    assert client.delete(f"/api/v1/prompts/{system}").status_code == 409
+    assert client.delete(f"/api/v1/prompts/{unused}").status_code == 204
+    assert client.get(f"/api/v1/prompts/{unused}").status_code == 404
+
+    client.delete(f"/api/v1/sessions/{session.json()['id']}")
+    assert client.delete(f"/api/v1/prompts/{system}").status_code == 204
@@ -0,0 +1,169 @@
+import json
+
+import httpx
+import pytest
+
+from ai.metrics import track_usage
+from ai.providers.anthropic_provider import AnthropicProvider
+from ai.providers.base import PromptPrefix
+from ai.providers.gemini_provider import GeminiProvider
+
+pytestmark = pytest.mark.anyio
+
+
+def sse(*events):
+    return "".join(
+        (f"event: {name}\n" if name else "") + f"data: {json.dumps(data)}\n\n"
+        for name, data in events
+    )
+
+
+def anthropic_handler(requests):
+    usage = {
+        "input_tokens": 5,
+        "output_tokens": 2,
+        "cache_read_input_tokens": 10,
+        "cache_creation_input_tokens": 0,
+    }
+    message = {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-test",
+        "content": [{"type": "text", "text": "Hello there"}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage,
+    }
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if not body.get("stream"):
+            return httpx.Response(200, json=message)
+        events = sse(
+            (
+                "message_start",
+                {"type": "message_start", "message": {**message, "content": []}},
+            ),
+            (
+                "content_block_start",
+                {
+                    "type": "content_block_start",
+                    "index": 0,
+                    "content_block": {"type": "text", "text": ""},
+                },
+            ),
+            (
+                "content_block_delta",
+                {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": "text_delta", "text": "Hello"},
+                },
+            ),
+            (
+                "content_block_delta",
+                {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": "text_delta", "text": " there"},
+                },
+            ),
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            (
+                "message_delta",
+                {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": 2},
+                },
+            ),
+            ("message_stop", {"type": "message_stop"}),
+        )
+        return httpx.Response(
+            200, text=events, headers={"content-type": "text/event-stream"}
+        )
+
+    return handle
+
+
+def gemini_handler(requests):
+    def response(text):
+        return {
+            "candidates": [
+                {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+            ],
+            "usageMetadata": {
+                "promptTokenCount": 15,
+                "candidatesTokenCount": 2,
+                "cachedContentTokenCount": 10,
+                "totalTokenCount": 17,
+            },
+        }
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, json.loads(request.content)))
+        if request.url.path.endswith(":generateContent"):
+            return httpx.Response(200, json=response("Hello there"))
+        events = sse((None, response("Hello")), (None, response(" there")))
+        return httpx.Response(
+            200, text=events, headers={"content-type": "text/event-stream"}
+        )
+
+    return handle
+
+
+PREFIX = PromptPrefix(
+    system="Be brief.", context=("Some context.",), history=(("user", "Hi"),)
+)
+
+
+async def test_anthropic_chat_uses_the_shared_client():
+    requests = []
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(anthropic_handler(requests))
+    )
+    provider = AnthropicProvider("key", model="claude-test", http_client=http_client)
+
+    with track_usage() as usage:
+        text = await provider.generate_text("Hello?", prefix=PREFIX, max_tokens=50)
+    chunks = [chunk async for chunk in provider.stream_text("Hello?", temperature=0)]
+
+    assert text == "Hello there"
+    assert usage["input_tokens"] == 15
+    assert usage["input_token_details"]["cache_read"] == 10
+    assert "".join(chunk.text for chunk in chunks) == "Hello there"
+    assert chunks[-1].usage["output_tokens"] == 2
+    generate, stream = requests
+    assert generate["max_tokens"] == 50
+    assert generate["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert generate["messages"][-2]["content"][0]["cache_control"]
+    assert generate["messages"][-1] == {"role": "user", "content": "Hello?"}
+    assert stream["temperature"] == 0
+    await provider.aclose()
+
+
+async def test_gemini_chat_uses_the_shared_client():
+    requests = []
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(gemini_handler(requests))
+    )
+    provider = GeminiProvider("key", model="gemini-test", http_client=http_client)
+
+    with track_usage() as usage:
+        text = await provider.generate_text("Hello?", prefix=PREFIX, max_tokens=50)
+    chunks = [chunk async for chunk in provider.stream_text("Hello?")]
+
+    assert text == "Hello there"
+    assert usage["input_tokens"] == 15
+    assert usage["input_token_details"]["cache_read"] == 10
+    assert "".join(chunk.text for chunk in chunks) == "Hello there"
+    assert chunks[-1].usage["output_tokens"] == 2
+    (generate_path, generate), (stream_path, _) = requests
+    assert generate_path.endswith("gemini-test:generateContent")
+    assert stream_path.endswith("gemini-test:streamGenerateContent")
+    assert generate["systemInstruction"]["parts"][0]["text"] == PREFIX.text()
+    assert generate["generationConfig"]["maxOutputTokens"] == 50
+    assert [content["role"] for content in generate["contents"]] == ["user", "user"]
+    await provider.aclose()
@@ -0,0 +1,151 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ai.providers.fake_provider import FakeProviderError
+from ai.providers.rate_limiter import (
+    AdaptiveRateLimiter,
+    ProviderUnavailableError,
+    RateLimitConfig,
+    is_retryable,
+    retry_after_of,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def limiter(**settings):
+    settings.setdefault("base_delay", 0)
+    return AdaptiveRateLimiter("fake", RateLimitConfig(**settings))
+
+
+def failing(*errors, result="ok"):
+    """A call that raises `errors` in turn, then returns `result`."""
+    remaining = list(errors)
+    calls = []
+
+    async def call():
+        calls.append(None)
+        if remaining:
+            raise remaining.pop(0)
+        return result
+
+    return call, calls
+
+
+def test_retryable_errors():
+    assert is_retryable(FakeProviderError(429, "slow down"))
+    assert is_retryable(FakeProviderError(503, "overloaded"))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(FakeProviderError(400, "bad request"))
+    assert not is_retryable(ValueError("bug"))
+
+
+def test_retry_after_header():
+    def error(**headers):
+        e = FakeProviderError(429, "slow down")
+        e.response = httpx.Response(429, headers=headers)
+        return e
+
+    assert retry_after_of(error(**{"retry-after": "2"})) == 2.0
+    assert retry_after_of(error(**{"retry-after-ms": "250"})) == 0.25
+    assert retry_after_of(FakeProviderError(429, "no response")) is None
+
+
+async def test_retries_transient_failures():
+    rate_limiter = limiter()
+    call, calls = failing(FakeProviderError(503, "down"), httpx.ReadTimeout("slow"))
+
+    assert await rate_limiter.call(call) == "ok"
+    assert len(calls) == 3
+    assert rate_limiter.stats()["retries"] == 2
+
+
+async def test_does_not_retry_client_errors():
+    rate_limiter = limiter()
+    call, calls = failing(FakeProviderError(400, "bad request"))
+
+    with pytest.raises(FakeProviderError):
+        await rate_limiter.call(call)
+    assert len(calls) == 1
+
+
+async def test_gives_up_after_max_retries():
+    rate_limiter = limiter(max_retries=2)
+    call, calls = failing(*[FakeProviderError(503, "down")] * 5)
+
+    with pytest.raises(ProviderUnavailableError) as raised:
+        await rate_limiter.call(call)
+    assert raised.value.status_code == 503
+    assert len(calls) == 3
+    assert rate_limiter.stats()["failures"] == 1
+
+
+async def test_retry_budget_limits_retries():
+    rate_limiter = limiter(retry_budget_cap=1, max_retries=10)
+    call, calls = failing(*[FakeProviderError(503, "down")] * 5)
+
+    with pytest.raises(ProviderUnavailableError, match="retry budget"):
+        await rate_limiter.call(call)
+    assert len(calls) == 2
+
+
+async def test_throttling_backs_off_multiplicatively_and_recovers_additively():
+    rate_limiter = limiter(max_concurrency=8)
+    call, _ = failing(FakeProviderError(429, "slow down"))
+
+    await rate_limiter.call(call)
+
+    assert rate_limiter.concurrency_limit == 4 + 1 / 8
+    assert rate_limiter.rate_scale == pytest.approx(0.5 * 1.05)
+    assert rate_limiter.stats()["throttled"] == 1
+    for _ in range(100):
+        await rate_limiter.call(failing()[0])
+    assert rate_limiter.concurrency_limit == 8
+    assert rate_limiter.rate_scale == 1.0
+
+
+async def test_concurrency_is_capped():
+    rate_limiter = limiter(max_concurrency=2)
+    active = peak = 0
+
+    async def call():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    await asyncio.gather(*(rate_limiter.call(call) for _ in range(6)))
+
+    assert peak == 2
+    assert rate_limiter.stats()["active"] == 0
+
+
+async def test_streams_are_retried_only_before_the_first_item():
+    rate_limiter = limiter()
+    attempts = []
+
+    def stream(fail_after_first):
+        async def items():
+            attempts.append(None)
+            if len(attempts) == 1 and not fail_after_first:
+                raise FakeProviderError(503, "down")
+            yield "a"
+            if fail_after_first:
+                raise FakeProviderError(503, "down")
+            yield "b"
+
+        return items
+
+    assert [item async for item in rate_limiter.stream(stream(False))] == ["a", "b"]
+    assert len(attempts) == 2
+
+    attempts.clear()
+    received = []
+    with pytest.raises(FakeProviderError):
+        async for item in rate_limiter.stream(stream(True)):
+            received.append(item)
+    assert received == ["a"]
+    assert len(attempts) == 1
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+
+from ai.providers.base import GenerationConfig
+from app import models
+from app.request_log import RequestLogWriter
+from tests.test_jobs import run
+
+pytestmark = pytest.mark.anyio
+
+CONFIG = GenerationConfig(provider="fake", model="fake-large", temperature=0.0)
+
+
+class FakeSession:
+    """Collects the batches a writer inserts, failing the first `failures`."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, rows):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append([row["prompt"] for row in rows])
+
+    async def commit(self):
+        pass
+
+
+def record(writer, *prompts):
+    for prompt in prompts:
+        writer.record("test_prompt", CONFIG, prompt, time.perf_counter())
+
+
+async def test_rows_are_written_in_batches_of_at_most_batch_size():
+    session = FakeSession()
+    writer = RequestLogWriter(session, batch_size=2, flush_interval=0.05)
+    record(writer, "a", "b", "c")
+
+    writer.start()
+    await writer.aclose()
+
+    assert session.batches == [["a", "b"], ["c"]]
+    assert writer.written == 3
+
+
+async def test_partial_batches_are_flushed_after_the_interval():
+    session = FakeSession()
+    writer = RequestLogWriter(session, batch_size=100, flush_interval=0.05)
+    writer.start()
+    record(writer, "a")
+
+    await asyncio.sleep(0.2)
+
+    assert session.batches == [["a"]]
+    await writer.aclose()
+
+
+async def test_a_full_queue_drops_and_counts_new_rows():
+    session = FakeSession()
+    writer = RequestLogWriter(session, max_queue=2)
+    record(writer, "a", "b", "c", "d")
+
+    assert (writer.depth, writer.dropped) == (2, 2)
+    writer.start()
+    await writer.aclose()
+    assert session.batches == [["a", "b"]]
+
+
+async def test_failed_batches_are_counted_and_later_ones_written():
+    session = FakeSession(failures=1)
+    writer = RequestLogWriter(session, batch_size=1, flush_interval=0.05)
+    record(writer, "a", "b")
+
+    writer.start()
+    await writer.aclose()
+
+    assert session.batches == [["b"]]
+    assert (writer.written, writer.failed) == (1, 1)
+
+
+async def test_rows_recorded_after_close_are_dropped():
+    session = FakeSession()
+    writer = RequestLogWriter(session)
+    writer.start()
+    await writer.aclose()
+
+    record(writer, "late")
+
+    assert writer.dropped == 1
+    assert session.batches == []
+
+
+async def test_disabled_writer_records_nothing():
+    writer = RequestLogWriter(FakeSession(), enabled=False)
+    writer.start()
+    record(writer, "a")
+
+    assert writer.depth == 0
+    await writer.aclose()
+
+
+def test_generations_reach_the_database(client):
+    response = client.post("/api/v1/test", json={"prompt": "logged prompt"})
+    assert response.status_code == 200
+
+    async def logged(db):
+        result = await db.execute(select(models.RequestLog))
+        return result.scalars().all()
+
+    deadline = time.monotonic() + 5
+    while not (rows := run(client, logged)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    (row,) = rows
+    assert (row.endpoint, row.provider, row.prompt) == (
+        "test_prompt",
+        "fake",
+        "logged prompt",
+    )
+    assert row.response == response.json()["response"]
+    assert row.output_tokens == response.json()["usage"]["output_tokens"]
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ai import resilience
+from ai.providers.base import GenerationConfig, TextChunk
+from ai.providers.fake_provider import FakeProviderError
+from ai.providers.rate_limiter import ProviderUnavailableError
+from ai.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    ResilientRouter,
+    parse_fallbacks,
+)
+
+pytestmark = pytest.mark.anyio
+
+PRIMARY = GenerationConfig(provider="primary", model="a", temperature=0.0)
+BACKUP = GenerationConfig(provider="backup", model="b", temperature=0.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only the module's clock: the event loop keeps the real one.
+    monkeypatch.setattr(
+        resilience,
+        "time",
+        SimpleNamespace(monotonic=lambda: now[0], perf_counter=time.perf_counter),
+    )
+    return now
+
+
+def responder(outcomes):
+    """A call answering each provider with its outcome: text, error or delay."""
+    calls = []
+
+    async def call(config):
+        calls.append(config.provider)
+        outcome = outcomes[config.provider]
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, float):
+            await asyncio.sleep(outcome)
+            return config.provider
+        return outcome
+
+    return call, calls
+
+
+def test_parse_fallbacks():
+    assert parse_fallbacks("openai:gpt-4o-mini, anthropic,") == [
+        ("openai", "gpt-4o-mini"),
+        ("anthropic", None),
+    ]
+
+
+def test_breaker_opens_on_errors_and_probes_after_cooldown(clock):
+    breaker = CircuitBreaker(window=4, min_calls=4, error_threshold=0.5, cooldown=30)
+    for ok in (True, False, True):
+        breaker.record(ok)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(min_calls=2, error_threshold=1.0, slow_call_ms=100)
+    breaker.record(True, latency_ms=150)
+    breaker.record(True, latency_ms=101)
+
+    assert breaker.state == OPEN
+
+
+def test_abandoned_probe_can_be_retried(clock):
+    breaker = CircuitBreaker(min_calls=1, error_threshold=1.0, cooldown=1)
+    breaker.record(False)
+    clock[0] += 1
+    assert breaker.allow()
+
+    breaker.abandon()
+
+    assert breaker.allow()
+
+
+async def test_fails_over_to_the_next_candidate():
+    router = ResilientRouter(enabled=True, hedging=False)
+    call, calls = responder({"primary": FakeProviderError(503, "down"), "backup": "b"})
+
+    assert await router.generate([PRIMARY, BACKUP], call) == (BACKUP, "b")
+    assert calls == ["primary", "backup"]
+    assert router.stats()["failovers"] == 1
+
+
+async def test_skips_providers_with_an_open_circuit():
+    router = ResilientRouter(
+        enabled=True, hedging=False, breaker_options={"min_calls": 1}
+    )
+    call, calls = responder({"primary": FakeProviderError(503, "down"), "backup": "b"})
+    await router.generate([PRIMARY, BACKUP], call)
+    calls.clear()
+
+    assert await router.generate([PRIMARY, BACKUP], call) == (BACKUP, "b")
+    assert calls == ["backup"]
+    assert router.stats()["breakers"]["primary"]["state"] == OPEN
+
+
+async def test_raises_when_no_candidate_succeeds():
+    router = ResilientRouter(enabled=True, hedging=False)
+    call, _ = responder(
+        {
+            "primary": FakeProviderError(503, "down"),
+            "backup": FakeProviderError(500, ""),
+        }
+    )
+
+    with pytest.raises(ProviderUnavailableError):
+        await router.generate([PRIMARY, BACKUP], call)
+
+
+async def test_hedges_a_slow_attempt():
+    router = ResilientRouter(enabled=True, hedge_min_samples=3)
+    fast, _ = responder({"primary": 0.0})
+    for _ in range(3):
+        await router.generate([PRIMARY], fast)
+    call, calls = responder({"primary": 5.0, "backup": "b"})
+
+    assert await asyncio.wait_for(router.generate([PRIMARY, BACKUP], call), 1) == (
+        BACKUP,
+        "b",
+    )
+    assert calls == ["primary", "backup"]
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+    # The slow attempt was cancelled, not counted against the provider.
+    assert router.breaker("primary").state == CLOSED
+
+
+async def test_stream_fails_over_before_the_first_token():
+    router = ResilientRouter(enabled=True, hedging=False)
+
+    async def open_stream(config):
+        if config.provider == "primary":
+            raise FakeProviderError(503, "down")
+            yield
+        yield TextChunk(text="hello")
+        yield TextChunk(text=" world")
+
+    chunks = [
+        chunk.text async for chunk in router.stream([PRIMARY, BACKUP], open_stream)
+    ]
+
+    assert chunks == ["hello", " world"]
+    assert router.breaker("primary").state == CLOSED
+    assert router.failovers == 1
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ai import response_cache
+from ai.response_cache import ResponseCache, make_key
+
+pytestmark = pytest.mark.anyio
+
+
+def test_hit_miss_and_expiry(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(monotonic=lambda: now))
+    cache = ResponseCache(enabled=True, ttl=10)
+    cache.put("k", "answer")
+
+    assert cache.get("k") == "answer"
+    assert cache.get("other") is None
+    now = 111.0
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 0, "hit_ratio": 1 / 3}
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(enabled=True, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+
+
+def test_applies_only_to_low_temperatures():
+    assert not ResponseCache(enabled=False).applies_to(0.0)
+    cache = ResponseCache(enabled=True, max_temperature=0.2)
+    assert cache.applies_to(0.2)
+    assert not cache.applies_to(0.3)
+
+
+def test_key_covers_every_request_setting():
+    key = make_key("p", "m", 0.0, "prompt", 10, "prefix")
+
+    assert key == make_key("p", "m", 0, "prompt", 10, "prefix")
+    assert key != make_key("p", "m", 0.0, "prompt", 11, "prefix")
+    assert key != make_key("p", "m", 0.0, "prompt", 10, "")
+    assert key != make_key("p", "other", 0.0, "prompt", 10, "prefix")
+
+
+async def test_manager_serves_repeated_low_temperature_prompts_from_cache(
+    llm_manager, monkeypatch
+):
+    llm_manager.response_cache = ResponseCache(enabled=True, max_temperature=0.0)
+    provider = llm_manager.get_current_provider()
+    calls = []
+    generate_text = provider.generate_text
+
+    async def counted(*args, **kwargs):
+        calls.append(kwargs["temperature"])
+        return await generate_text(*args, **kwargs)
+
+    monkeypatch.setattr(provider, "generate_text", counted)
+    deterministic = llm_manager.resolve_config(temperature=0.0)
+    sampled = llm_manager.resolve_config(temperature=0.7)
+
+    first = await llm_manager.generate_text("hello", deterministic)
+    second = await llm_manager.generate_text("hello", deterministic)
+    await llm_manager.generate_text("hello", sampled)
+    await llm_manager.generate_text("hello", sampled)
+
+    assert (first.cached, second.cached) == (False, True)
+    assert second.text == first.text
+    assert calls == [0.0, 0.7, 0.7]
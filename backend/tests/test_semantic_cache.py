@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from ai.semantic_cache import SemanticCache, normalize
+
+
+def unit(*values):
+    return normalize(list(values))
+
+
+def test_hit_above_threshold_and_miss_below():
+    cache = SemanticCache(enabled=True, threshold=0.9)
+    cache.insert(("p",), unit(1, 0, 0), "answer")
+
+    assert cache.lookup(("p",), unit(1, 0.1, 0)) == "answer"
+    assert cache.lookup(("p",), unit(0, 1, 0)) is None
+    assert cache.lookup(("other",), unit(1, 0, 0)) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_partition_evicts_least_recently_used_entry():
+    cache = SemanticCache(enabled=True, threshold=0.99, capacity=2)
+    cache.insert(("p",), unit(1, 0, 0), "a")
+    cache.insert(("p",), unit(0, 1, 0), "b")
+    cache.lookup(("p",), unit(1, 0, 0))
+
+    cache.insert(("p",), unit(0, 0, 1), "c")
+
+    assert cache.lookup(("p",), unit(1, 0, 0)) == "a"
+    assert cache.lookup(("p",), unit(0, 1, 0)) is None
+    assert cache.lookup(("p",), unit(0, 0, 1)) == "c"
+
+
+def test_entries_are_bounded_across_partitions():
+    cache = SemanticCache(enabled=True, threshold=0.99, capacity=4, max_entries=6)
+    rng = np.random.default_rng(0)
+    for temperature in range(100):
+        for _ in range(2):
+            cache.insert((str(temperature),), normalize(rng.standard_normal(8)), "x")
+
+    stats = cache.stats()
+    assert stats["entries"] <= 6
+    assert stats["partitions"] == 3
+
+
+def test_recently_used_partitions_survive():
+    cache = SemanticCache(enabled=True, threshold=0.99, capacity=2, max_entries=2)
+    cache.insert(("old",), unit(1, 0), "old")
+    cache.insert(("new",), unit(0, 1), "new")
+    cache.lookup(("old",), unit(1, 0))
+
+    cache.insert(("newest",), unit(1, 1), "newest")
+
+    assert cache.lookup(("old",), unit(1, 0)) == "old"
+    assert cache.lookup(("new",), unit(0, 1)) is None
+
+
+@pytest.mark.anyio
+async def test_manager_keeps_temperatures_apart(llm_manager):
+    llm_manager.semantic_cache = SemanticCache(enabled=True, threshold=0.95)
+    hot = llm_manager.resolve_config("fake", None, 1.2)
+    cold = llm_manager.resolve_config("fake", None, 0.0)
+
+    first = await llm_manager.generate_text("What is the capital of France?", hot)
+    other = await llm_manager.generate_text("What is the capital of France?", cold)
+    again = await llm_manager.generate_text("What is the capital of France?", cold)
+
+    assert not first.cached
+    assert not other.cached
+    assert again.cached
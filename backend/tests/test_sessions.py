@@ -0,0 +1,66 @@
+def start_session(client, **settings):
+    response = client.post("/api/v1/sessions", json=settings)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def send(client, session_id, prompt, **settings):
+    response = client.post(
+        f"/api/v1/sessions/{session_id}/messages", json={"prompt": prompt, **settings}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_later_turns_carry_the_history(client, llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    prefixes = []
+    generate_text = provider.generate_text
+
+    async def recorded(prompt, **kwargs):
+        prefixes.append(kwargs["prefix"])
+        return await generate_text(prompt, **kwargs)
+
+    monkeypatch.setattr(provider, "generate_text", recorded)
+    session_id = start_session(client)
+
+    first = send(client, session_id, "My name is Ada.")
+    send(client, session_id, "What is my name?")
+
+    assert prefixes[0] is None or prefixes[0].history == ()
+    assert prefixes[1].history == (
+        ("user", "My name is Ada."),
+        ("assistant", first["response"]),
+    )
+    messages = client.get(f"/api/v1/sessions/{session_id}").json()["messages"]
+    assert [message["role"] for message in messages] == [
+        "user",
+        "assistant",
+        "user",
+        "assistant",
+    ]
+
+
+def test_old_turns_are_folded_into_a_summary_within_the_budget(client):
+    session_id = start_session(client, max_context_tokens=512)
+    prompt = "Tell me more about the garden. " * 8
+
+    turns = [send(client, session_id, prompt, max_tokens=16) for _ in range(6)]
+
+    assert any(turn["dropped_messages"] for turn in turns)
+    assert any(turn["summarized"] for turn in turns)
+    assert all(turn["context_tokens"] <= 512 for turn in turns)
+    session = client.get(f"/api/v1/sessions/{session_id}").json()
+    assert session["summary"]
+    kept = [message["in_context"] for message in session["messages"]]
+    assert kept[0] is False and kept[-1] is True
+    assert kept == sorted(kept)
+
+
+def test_unknown_sessions_and_providers(client):
+    assert client.get("/api/v1/sessions/missing").status_code == 404
+    assert client.post("/api/v1/sessions", json={"provider": "nope"}).status_code == 400
+
+    session_id = start_session(client)
+    assert client.delete(f"/api/v1/sessions/{session_id}").status_code == 204
+    assert client.get(f"/api/v1/sessions/{session_id}").status_code == 404
@@ -0,0 +1,59 @@
+import asyncio
+
+from app import crud
+from app.database import AsyncSessionLocal
+
+
+def stored_settings():
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return await crud.get_settings(db)
+
+    return asyncio.run(read())
+
+
+def test_update_settings(client, llm_manager):
+    response = client.put(
+        "/api/v1/settings", json={"model": "fake-small", "temperature": 0.2}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["model"] == "fake-small"
+    assert response.json()["version"] == 2
+    provider = llm_manager.get_current_provider()
+    assert (provider.model, provider.temperature) == ("fake-small", 0.2)
+    assert client.app.state.settings_snapshot.version == 2
+
+
+def test_invalid_model_leaves_settings_unchanged(client, llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+    snapshot = client.app.state.settings_snapshot
+
+    async def reject(model):
+        raise ValueError(f"Unknown model '{model}'.")
+
+    monkeypatch.setattr(provider, "set_model", reject)
+    response = client.put(
+        "/api/v1/settings", json={"model": "no-such-model", "temperature": 0.1}
+    )
+
+    assert response.status_code == 400
+    assert client.app.state.settings_snapshot is snapshot
+    stored = stored_settings()
+    assert (stored.model, stored.temperature, stored.version) == (
+        snapshot.model,
+        snapshot.temperature,
+        snapshot.version,
+    )
+    assert (provider.model, provider.temperature) == (
+        snapshot.model,
+        snapshot.temperature,
+    )
+
+
+def test_unknown_provider_is_rejected(client):
+    response = client.put("/api/v1/settings", json={"provider": "nope"})
+
+    assert response.status_code == 400
+    assert client.app.state.settings_snapshot.version == 1
+    assert stored_settings().provider == "fake"
@@ -0,0 +1,52 @@
+import json
+
+from ai.providers.base import TextChunk
+
+
+def events(response):
+    """Parses a Server-Sent Events body into (event, data) pairs."""
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_streams_tokens_then_a_summary(client):
+    expected = client.post("/api/v1/test", json={"prompt": "hello"}).json()
+
+    response = client.post("/api/v1/test/stream", json={"prompt": "hello"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    stream = events(response)
+    tokens = [data["text"] for event, data in stream if event == "token"]
+    assert "".join(tokens) == expected["response"]
+    event, summary = stream[-1]
+    assert event == "done"
+    assert summary["time_to_first_token_ms"] <= summary["latency_ms"]
+    assert summary["usage"]["output_tokens"] == len(tokens)
+
+
+def test_failure_midway_ends_with_an_error_event(client, llm_manager, monkeypatch):
+    provider = llm_manager.get_current_provider()
+
+    async def broken(*args, **kwargs):
+        yield TextChunk(text="partial")
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(provider, "stream_text", broken)
+
+    stream = events(client.post("/api/v1/test/stream", json={"prompt": "hello"}))
+
+    assert stream[0] == ("token", {"text": "partial"})
+    assert stream[-1][0] == "error"
+    assert "connection reset" in stream[-1][1]["detail"]
+
+
+def test_invalid_overrides_fail_before_streaming(client):
+    response = client.post(
+        "/api/v1/test/stream", json={"prompt": "hello", "provider": "missing"}
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from ai.providers.fake_provider import FakeProvider, FakeProviderConfig
+
+pytestmark = pytest.mark.anyio
+
+
+def provider(name, delay=0.0, error=None):
+    """A fake provider whose credential check takes `delay` and may fail."""
+    fake = FakeProvider(api_key="test", config=FakeProviderConfig(latency_ms=0))
+    fake.name = name
+
+    async def validate_credentials():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+
+    fake.validate_credentials = validate_credentials
+    return fake
+
+
+async def test_providers_are_validated_concurrently(llm_manager):
+    llm_manager.providers = {
+        name: provider(name, delay=0.2) for name in ("a", "b", "c", "d")
+    }
+    started = time.perf_counter()
+
+    await llm_manager.validate_providers(timeout=5)
+
+    assert time.perf_counter() - started < 0.6
+    assert sorted(llm_manager.providers) == ["a", "b", "c", "d"]
+
+
+async def test_failing_and_late_providers_are_removed(llm_manager):
+    llm_manager.providers = {
+        "bad": provider("bad", error=ValueError("invalid key")),
+        "late": provider("late", delay=5),
+        "good": provider("good"),
+    }
+    llm_manager.current_provider = "bad"
+
+    await llm_manager.validate_providers(timeout=0.2)
+
+    assert list(llm_manager.providers) == ["good"]
+    assert llm_manager.current_provider == "good"
+
+
+async def test_requests_wait_for_a_pending_validation(llm_manager):
+    llm_manager.providers = {"slow": provider("slow", delay=0.1)}
+    llm_manager.current_provider = "slow"
+    llm_manager.start_validation(timeout=5)
+
+    assert llm_manager.pending_providers == ["slow"]
+    assert await llm_manager.list_models() == ["fake-large", "fake-small"]
+    assert llm_manager.pending_providers == []
+
+
+async def test_no_valid_provider_is_an_error(llm_manager):
+    llm_manager.providers = {"bad": provider("bad", error=ValueError("invalid"))}
+
+    with pytest.raises(RuntimeError):
+        await llm_manager.validate_providers(timeout=1)
@@ -0,0 +1,111 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app.vector_store import VectorStore
+
+DIM = 8
+
+
+def vector(seed: int) -> list[float]:
+    return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+
+def documents(ids):
+    return [{"id": f"doc-{i}", "text": f"text {i}"} for i in ids]
+
+
+def test_upsert_and_query(tmp_path):
+    collection = VectorStore(str(tmp_path)).collection("docs")
+    collection.upsert("model", documents(range(3)), [vector(i) for i in range(3)])
+
+    matches = collection.query("model", vector(1), top_k=2, exact=True)
+
+    assert [match.id for match in matches][0] == "doc-1"
+    assert matches[0].score == pytest.approx(1.0)
+    assert len(matches) == 2
+
+
+def test_upsert_replaces_existing_ids(tmp_path):
+    collection = VectorStore(str(tmp_path)).collection("docs")
+    collection.upsert("model", documents([0, 1]), [vector(0), vector(1)])
+
+    count = collection.upsert("model", [{"id": "doc-0", "text": "new"}], [vector(5)])
+
+    assert count == 2
+    best = collection.query("model", vector(5), top_k=1, exact=True)[0]
+    assert (best.id, best.text) == ("doc-0", "new")
+
+
+def test_rejects_other_embedding_models(tmp_path):
+    collection = VectorStore(str(tmp_path)).collection("docs")
+    collection.upsert("model", documents([0]), [vector(0)])
+
+    with pytest.raises(ValueError):
+        collection.upsert("other", documents([1]), [vector(1)])
+    with pytest.raises(ValueError):
+        collection.query("other", vector(0), top_k=1, exact=True)
+
+
+def test_reloads_from_disk(tmp_path):
+    VectorStore(str(tmp_path)).collection("docs").upsert(
+        "model", documents(range(5)), [vector(i) for i in range(5)]
+    )
+
+    collection = VectorStore(str(tmp_path)).collection("docs")
+
+    assert collection.count == 5
+    assert collection.query("model", vector(3), top_k=1, exact=True)[0].id == "doc-3"
+
+
+def test_approximate_index_finds_near_duplicates(tmp_path):
+    collection = VectorStore(str(tmp_path), index_threshold=100).collection("docs")
+    ids = range(400)
+    collection.upsert("model", documents(ids), [vector(i) for i in ids])
+
+    matches = collection.query("model", vector(123), top_k=1, exact=False)
+
+    assert matches[0].id == "doc-123"
+
+
+def upsert_range(root: str, start: int, stop: int):
+    collection = VectorStore(root).collection("shared")
+    for i in range(start, stop):
+        collection.upsert("model", documents([i]), [vector(i)])
+
+
+def test_processes_share_a_collection(tmp_path):
+    root = str(tmp_path)
+    # Both processes open the collection before either has written to it.
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=upsert_range, args=(root, start, start + 100))
+        for start in (0, 100)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    collection = VectorStore(root).collection("shared")
+    assert collection.count == 200
+    for i in (0, 99, 100, 199):
+        assert collection.query("model", vector(i), top_k=1, exact=True)[0].id == (
+            f"doc-{i}"
+        )
+
+
+def test_sees_rows_written_by_another_store(tmp_path):
+    first = VectorStore(str(tmp_path)).collection("docs")
+    second = VectorStore(str(tmp_path)).collection("docs")
+    first.upsert("model", documents([0]), [vector(0)])
+
+    second.upsert("model", documents([1]), [vector(1)])
+    first.upsert("model", [{"id": "doc-1", "text": "updated"}], [vector(7)])
+
+    assert first.count == second.count == 2
+    best = second.query("model", vector(7), top_k=1, exact=True)[0]
+    assert (best.id, best.text) == ("doc-1", "updated")
+    assert second.query("model", vector(0), top_k=1, exact=True)[0].id == "doc-0"